@@ -0,0 +1,50 @@
+"""
+Endpoint de consulta de los registros de auditoría
+"""
+from flask import request, jsonify, Blueprint
+from flask_jwt_extended import jwt_required
+from datetime import datetime
+from utils.decorators import role_required
+from services.audit_service import AuditLogService
+
+audit_bp = Blueprint('audit', __name__)
+
+MAX_PAGE_SIZE = 500
+
+@audit_bp.route('/api/v1/audit-logs', methods=['GET'])
+@jwt_required()
+@role_required(['admin'])
+def list_audit_logs():
+    """
+    Lista registros de auditoría del más reciente al más antiguo, paginados por cursor
+    
+    Filtros: user_id, entity_type + entity_id, action, since/until (ISO 8601).
+    La respuesta incluye next_cursor para pedir la página siguiente.
+    """
+    args = request.args
+    try:
+        since = datetime.fromisoformat(args['since']) if args.get('since') else None
+        until = datetime.fromisoformat(args['until']) if args.get('until') else None
+    except ValueError:
+        return jsonify({'error': 'Formato de fecha incorrecto. Use ISO 8601 (YYYY-MM-DD o YYYY-MM-DDTHH:MM:SS)'}), 400
+    
+    limit = min(max(args.get('limit', 100, type=int), 1), MAX_PAGE_SIZE)
+    
+    try:
+        logs, next_cursor = AuditLogService.query(
+            user_id=args.get('user_id', type=int),
+            entity_type=args.get('entity_type'),
+            entity_id=args.get('entity_id', type=int),
+            action=args.get('action'),
+            start=since,
+            end=until,
+            cursor=args.get('cursor'),
+            limit=limit
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({
+        'items': [log.to_dict() for log in logs],
+        'next_cursor': next_cursor
+    })
@@ -1,12 +1,15 @@
 """
 API endpoint para datos analíticos del dashboard
 """
+from collections import defaultdict
 from flask import jsonify
 from datetime import datetime, timedelta
-from sqlalchemy import func, extract, distinct
-from models.visitor import Visitor, VisitorCheckIn
+from sqlalchemy import func
+from models.visitor import Visitor
 from models.event import Event
 from models.database import db
+from services.analytics_service import AnalyticsService
+from services.single_flight import get_cache_metrics, get_or_recompute
 
 def init_dashboard_analytics(app):
     
@@ -14,38 +17,23 @@ def init_dashboard_analytics(app):
     def get_dashboard_analytics():
         """
         Obtener datos analíticos para los gráficos del dashboard
+        
+        Los datos de asistencia se leen de check_in_rollups (agregados por
+        día, hora, evento y ubicación), no de visitor_check_ins. El resultado
+        se cachea: solo un worker lo recalcula cuando expira o cuando un nuevo
+        check-in cambia la generación, y el resto sirve el valor anterior.
         """
         try:
-            # 1. Tendencia de asistencia por día (últimos 30 días)
-            attendance_trend = get_attendance_trend()
-            
-            # 2. Comparativa por tipos de eventos
-            event_types_comparison = get_event_types_comparison()
-            
-            # 3. Mapa de calor de días y horas de mayor tráfico
-            traffic_heatmap = get_traffic_heatmap()
-            
-            # 4. Distribución por edad o región (usando datos simulados por ahora)
-            visitor_distribution = get_visitor_distribution()
-            
-            # 5. Comparación de asistencia entre salas
-            room_comparison = get_room_comparison()
-            
-            # 6. Estadísticas adicionales
-            peak_hours = get_peak_hours()
-            monthly_growth = get_monthly_growth()
+            data = get_or_recompute(
+                'dashboard',
+                build_dashboard_data,
+                timeout=app.config.get('DASHBOARD_CACHE_TIMEOUT', 60),
+                stale_timeout=app.config.get('DASHBOARD_CACHE_STALE_TIMEOUT', 600)
+            )
             
             return jsonify({
                 'success': True,
-                'data': {
-                    'attendanceTrend': attendance_trend,
-                    'eventTypesComparison': event_types_comparison,
-                    'trafficHeatmap': traffic_heatmap,
-                    'visitorDistribution': visitor_distribution,
-                    'roomComparison': room_comparison,
-                    'peakHours': peak_hours,
-                    'monthlyGrowth': monthly_growth
-                }
+                'data': data
             })
             
         except Exception as e:
@@ -55,6 +43,34 @@ def init_dashboard_analytics(app):
                 'error': str(e)
             }), 500
     
+    @app.route('/api/dashboard-data/cache-metrics', methods=['GET'])
+    def get_dashboard_cache_metrics():
+        """
+        Obtener métricas de la caché del dashboard (aciertos, fallos y tiempos de recálculo)
+        """
+        return jsonify({
+            'success': True,
+            'metrics': get_cache_metrics('dashboard')
+        })
+    
+    def build_dashboard_data():
+        """Calcular todos los datos del dashboard"""
+        return {
+            # 1. Tendencia de asistencia por día (últimos 30 días)
+            'attendanceTrend': get_attendance_trend(),
+            # 2. Comparativa por tipos de eventos
+            'eventTypesComparison': get_event_types_comparison(),
+            # 3. Mapa de calor de días y horas de mayor tráfico
+            'trafficHeatmap': get_traffic_heatmap(),
+            # 4. Distribución por edad o región (usando datos simulados por ahora)
+            'visitorDistribution': get_visitor_distribution(),
+            # 5. Comparación de asistencia entre salas
+            'roomComparison': get_room_comparison(),
+            # 6. Estadísticas adicionales
+            'peakHours': get_peak_hours(),
+            'monthlyGrowth': get_monthly_growth()
+        }
+    
     def get_attendance_trend():
         """Obtener tendencia de asistencia en los últimos 30 días"""
         end_date = datetime.now()
@@ -68,20 +84,13 @@ def init_dashboard_analytics(app):
             current_date += timedelta(days=1)
         
         # Consultar asistencia real
-        attendance_data = db.session.query(
-            func.date(VisitorCheckIn.check_in_time).label('date'),
-            func.count(VisitorCheckIn.id).label('count')
-        ).filter(
-            VisitorCheckIn.check_in_time >= start_date
-        ).group_by(
-            func.date(VisitorCheckIn.check_in_time)
-        ).all()
+        attendance_data = AnalyticsService.get_daily_counts(start_date.date())
         
         # Actualizar el diccionario con datos reales
-        for record in attendance_data:
-            date_str = record.date.strftime('%Y-%m-%d')
+        for day, count in attendance_data.items():
+            date_str = day.strftime('%Y-%m-%d')
             if date_str in date_dict:
-                date_dict[date_str] = record.count
+                date_dict[date_str] = count
         
         # Convertir a lista ordenada
         result = []
@@ -106,22 +115,18 @@ def init_dashboard_analytics(app):
         }
         
         # Obtener todos los eventos con sus visitantes
-        events = db.session.query(
-            Event.id,
-            Event.title,
-            func.count(VisitorCheckIn.id).label('visitor_count')
-        ).outerjoin(
-            VisitorCheckIn, Event.id == VisitorCheckIn.event_id
-        ).group_by(
-            Event.id, Event.title
-        ).all()
+        event_counts = AnalyticsService.get_event_counts()
+        events = [
+            {'title': title, 'visitor_count': event_counts.get(event_id, 0)}
+            for event_id, title in db.session.query(Event.id, Event.title)
+        ]
         
         # Clasificar eventos por tipo
         type_counts = {type_name: 0 for type_name in event_types.keys()}
         event_count_by_type = {type_name: 0 for type_name in event_types.keys()}
         
         for event in events:
-            title_lower = event.title.lower()
+            title_lower = event['title'].lower()
             event_classified = False
             
             for type_name, keywords in event_types.items():
@@ -130,7 +135,7 @@ def init_dashboard_analytics(app):
                     
                 for keyword in keywords:
                     if keyword in title_lower:
-                        type_counts[type_name] += event.visitor_count
+                        type_counts[type_name] += event['visitor_count']
                         event_count_by_type[type_name] += 1
                         event_classified = True
                         break
@@ -139,7 +144,7 @@ def init_dashboard_analytics(app):
                     break
             
             if not event_classified:
-                type_counts['Otros'] += event.visitor_count
+                type_counts['Otros'] += event['visitor_count']
                 event_count_by_type['Otros'] += 1
         
         # Formatear resultado
@@ -162,24 +167,18 @@ def init_dashboard_analytics(app):
         # Obtener check-ins de los últimos 3 meses
         start_date = datetime.now() - timedelta(days=90)
         
-        check_ins = db.session.query(
-            extract('dow', VisitorCheckIn.check_in_time).label('day_of_week'),
-            extract('hour', VisitorCheckIn.check_in_time).label('hour'),
-            func.count(VisitorCheckIn.id).label('count')
-        ).filter(
-            VisitorCheckIn.check_in_time >= start_date
-        ).group_by(
-            extract('dow', VisitorCheckIn.check_in_time),
-            extract('hour', VisitorCheckIn.check_in_time)
-        ).all()
+        # Agrupar por (día de la semana, hora); 0 = domingo
+        counts = defaultdict(int)
+        for day, hour, count in AnalyticsService.get_daily_hourly_counts(start_date.date()):
+            counts[(day.isoweekday() % 7, hour)] += count
         
         # Crear matriz para el mapa de calor
         heatmap_data = []
-        for check_in in check_ins:
+        for (day_of_week, hour), count in sorted(counts.items()):
             heatmap_data.append({
-                'day': int(check_in.day_of_week),
-                'hour': int(check_in.hour),
-                'value': check_in.count
+                'day': day_of_week,
+                'hour': hour,
+                'value': count
             })
         
         return heatmap_data
@@ -214,23 +213,22 @@ def init_dashboard_analytics(app):
         # Obtener eventos agrupados por ubicación
         room_data = db.session.query(
             Event.location,
-            func.count(distinct(Event.id)).label('event_count'),
-            func.count(VisitorCheckIn.id).label('visitor_count')
-        ).outerjoin(
-            VisitorCheckIn, Event.id == VisitorCheckIn.event_id
+            func.count(Event.id).label('event_count')
         ).group_by(
             Event.location
         ).all()
+        location_counts = AnalyticsService.get_location_counts()
         
         # Calcular métricas adicionales
         result = []
         for room in room_data:
-            avg_attendance = room.visitor_count / room.event_count if room.event_count > 0 else 0
+            visitor_count = location_counts.get(room.location, 0)
+            avg_attendance = visitor_count / room.event_count if room.event_count > 0 else 0
             
             result.append({
                 'room': room.location,
                 'eventCount': room.event_count,
-                'totalVisitors': room.visitor_count,
+                'totalVisitors': visitor_count,
                 'avgAttendance': round(avg_attendance, 1)
             })
         
@@ -241,22 +239,14 @@ def init_dashboard_analytics(app):
     
     def get_peak_hours():
         """Obtener horas pico de asistencia"""
-        peak_data = db.session.query(
-            extract('hour', VisitorCheckIn.check_in_time).label('hour'),
-            func.count(VisitorCheckIn.id).label('count')
-        ).group_by(
-            extract('hour', VisitorCheckIn.check_in_time)
-        ).order_by(
-            func.count(VisitorCheckIn.id).desc()
-        ).limit(5).all()
+        peak_data = AnalyticsService.get_hour_counts(limit=5)
         
         result = []
-        for record in peak_data:
-            hour = int(record.hour)
+        for hour, count in peak_data:
             hour_str = f"{hour:02d}:00"
             result.append({
                 'hour': hour_str,
-                'count': record.count
+                'count': count
             })
         
         return result
@@ -267,36 +257,26 @@ def init_dashboard_analytics(app):
         end_date = datetime.now()
         start_date = end_date - timedelta(days=180)
         
-        monthly_data = db.session.query(
-            extract('year', VisitorCheckIn.check_in_time).label('year'),
-            extract('month', VisitorCheckIn.check_in_time).label('month'),
-            func.count(VisitorCheckIn.id).label('count')
-        ).filter(
-            VisitorCheckIn.check_in_time >= start_date
-        ).group_by(
-            extract('year', VisitorCheckIn.check_in_time),
-            extract('month', VisitorCheckIn.check_in_time)
-        ).order_by(
-            extract('year', VisitorCheckIn.check_in_time),
-            extract('month', VisitorCheckIn.check_in_time)
-        ).all()
+        monthly_data = defaultdict(int)
+        for day, count in AnalyticsService.get_daily_counts(start_date.date()).items():
+            monthly_data[(day.year, day.month)] += count
         
         result = []
         prev_count = 0
         
-        for record in monthly_data:
-            month_name = datetime(int(record.year), int(record.month), 1).strftime('%B %Y')
+        for (year, month), count in sorted(monthly_data.items()):
+            month_name = datetime(year, month, 1).strftime('%B %Y')
             growth_rate = 0
             
             if prev_count > 0:
-                growth_rate = ((record.count - prev_count) / prev_count) * 100
+                growth_rate = ((count - prev_count) / prev_count) * 100
             
             result.append({
                 'month': month_name,
-                'visitors': record.count,
+                'visitors': count,
                 'growthRate': round(growth_rate, 1)
             })
             
-            prev_count = record.count
+            prev_count = count
         
         return result
@@ -10,6 +10,7 @@ from flask_jwt_extended import (
 from models.user import User
 from models.database import db
 from models.notification import Notification
+from services.auth_service import AuthService
 from datetime import datetime, timedelta
 from utils.decorators import role_required
 from utils.email_service import send_email
@@ -113,8 +114,10 @@ class Login(Resource):
         user.last_login = datetime.utcnow()
         db.session.commit()
         
-        access_token = create_access_token(identity=str(user.id))
-        refresh_token = create_refresh_token(identity=str(user.id))
+        # Rol y permisos firmados en el token (ver utils/decorators.py)
+        claims = AuthService.token_claims(user)
+        access_token = create_access_token(identity=str(user.id), additional_claims=claims)
+        refresh_token = create_refresh_token(identity=str(user.id), additional_claims=claims)
         
         return {
             'access_token': access_token,
@@ -191,9 +194,15 @@ class Refresh(Resource):
         try:
             # Verificar identidad desde token
             identity = get_jwt_identity()
+            user = User.query.get(identity)
+            if not user or not user.is_active:
+                return {'error': 'Token de refresco inválido'}, 401
             
-            # Generar nuevo token de acceso
-            new_access_token = create_access_token(identity=str(identity))
+            # Generar nuevo token de acceso con el rol y los permisos actuales
+            new_access_token = create_access_token(
+                identity=str(user.id),
+                additional_claims=AuthService.token_claims(user)
+            )
             
             return {'access_token': new_access_token}, 200
         except Exception as e:
@@ -10,6 +10,7 @@ from models.database import db
 from datetime import datetime
 from utils.validators import validate_required_fields, validate_event_data
 from utils.decorators import role_required
+from cache import cached
 import csv
 import io
 import xlsxwriter
@@ -36,6 +37,7 @@ class EventList(Resource):
     Operaciones para lista de eventos
     """
     @events_namespace.doc('list_events')
+    @cached(timeout=None, tags=['events'])
     @events_namespace.marshal_list_with(event_model)
     def get(self):
         """
@@ -84,6 +86,7 @@ class EventResource(Resource):
     Operaciones para eventos individuales
     """
     @events_namespace.doc('get_event')
+    @cached(timeout=None, tags=['event:{id}'])
     @events_namespace.marshal_with(event_model)
     def get(self, id):
         """
@@ -157,6 +160,7 @@ class ActiveEventList(Resource):
     Operaciones para eventos activos
     """
     @events_namespace.doc('list_active_events')
+    @cached(timeout=None, tags=['events'])
     @events_namespace.marshal_list_with(event_model)
     def get(self):
         """
@@ -10,6 +10,7 @@ from models.database import db
 from datetime import datetime
 from utils.validators import validate_required_fields
 from utils.decorators import role_required
+from cache import cached
 
 kiosks_namespace = Namespace('kiosks', description='Operaciones relacionadas con kioscos')
 
@@ -263,6 +264,7 @@ class KioskEvents(Resource):
     Endpoint para obtener eventos relevantes para un kiosco
     """
     @kiosks_namespace.doc('kiosk_events')
+    @cached(timeout=None, tags=['events', 'kiosk:{id}'])
     def get(self, id):
         """
         Obtener lista de eventos activos relevantes para este kiosco
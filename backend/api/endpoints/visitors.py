@@ -11,8 +11,9 @@ from models.database import db
 from datetime import datetime, date, timedelta
 from utils.validators import validate_required_fields, validate_visitor_data
 from utils.decorators import role_required
-from sqlalchemy import func, desc, or_
-import csv
+from services.search_service import SearchService
+from services.export_service import ExportService, VISITOR_EXPORT_HEADERS
+from sqlalchemy import func, desc
 import io
 import xlsxwriter
 
@@ -101,11 +102,10 @@ class VisitorList(Resource):
         query = Visitor.query
         
         # Aplicar filtros
+        search_rank = None
         if search_term:
-            query = query.filter(or_(
-                Visitor.name.ilike(f'%{search_term}%'),
-                Visitor.email.ilike(f'%{search_term}%')
-            ))
+            search_condition, search_rank = SearchService.visitor_search(search_term)
+            query = query.filter(search_condition)
         
         if event_id:
             # Subconsulta para visitantes que tienen check-in en el evento
@@ -140,7 +140,9 @@ class VisitorList(Resource):
                 query = query.filter(~Visitor.id.in_(visitor_ids_with_checkin))
         
         # Ejecutar consulta paginada
-        paginated_visitors = query.order_by(desc(Visitor.created_at)).paginate(page=page, per_page=per_page)
+        # Con búsqueda, las coincidencias exactas de código o email van primero
+        order = [desc(Visitor.created_at)] if search_rank is None else [search_rank.desc(), desc(Visitor.created_at)]
+        paginated_visitors = query.order_by(*order).paginate(page=page, per_page=per_page)
         
         # Preparar respuesta
         response = {
@@ -248,8 +250,9 @@ class VisitorResource(Resource):
         """
         visitor = Visitor.query.get_or_404(id)
         
-        # Eliminar check-ins asociados
-        VisitorCheckIn.query.filter_by(visitor_id=id).delete()
+        # Eliminar check-ins asociados (uno a uno para ajustar los contadores del evento)
+        for check_in in VisitorCheckIn.query.filter_by(visitor_id=id):
+            db.session.delete(check_in)
         
         db.session.delete(visitor)
         db.session.commit()
@@ -525,48 +528,15 @@ class VisitorExport(Resource):
                 visitor_ids_with_checkin = db.session.query(VisitorCheckIn.visitor_id).distinct().subquery()
                 query = query.filter(~Visitor.id.in_(visitor_ids_with_checkin))
         
-        # Obtener visitantes
-        visitors = query.order_by(desc(Visitor.created_at)).all()
-        
-        # Preparar datos para exportación
-        visitor_data = []
-        for visitor in visitors:
-            visitor_item = {
-                'ID': visitor.id,
-                'Nombre': visitor.name,
-                'Email': visitor.email or '',
-                'Teléfono': visitor.phone or '',
-                'Fecha de Registro': visitor.created_at.strftime('%Y-%m-%d %H:%M:%S')
-            }
-            
-            # Obtener información de check-ins
-            check_ins = VisitorCheckIn.query.filter_by(visitor_id=visitor.id).all()
-            check_in_info = []
-            for check_in in check_ins:
-                event = Event.query.get(check_in.event_id)
-                event_name = event.title if event else "Evento desconocido"
-                check_in_info.append(f"{event_name} ({check_in.created_at.strftime('%Y-%m-%d %H:%M')})")
-            
-            visitor_item['Check-ins'] = '; '.join(check_in_info) if check_in_info else 'Ninguno'
-            visitor_data.append(visitor_item)
-        
         # Exportar según formato solicitado
         if export_format == 'csv':
-            # Crear CSV en memoria
-            output = io.StringIO()
-            fieldnames = ['ID', 'Nombre', 'Email', 'Teléfono', 'Fecha de Registro', 'Check-ins']
-            
-            writer = csv.DictWriter(output, fieldnames=fieldnames)
-            writer.writeheader()
-            for visitor in visitor_data:
-                writer.writerow(visitor)
-            
-            # Crear respuesta con el archivo
-            output.seek(0)
-            response = make_response(output.getvalue())
-            response.headers['Content-Disposition'] = f'attachment; filename=visitantes_{datetime.now().strftime("%Y%m%d")}.csv'
-            response.headers['Content-type'] = 'text/csv'
-            return response
+            # Los visitantes y sus check-ins se leen con un JOIN y se envían por bloques
+            filename = f'visitantes_{datetime.now().strftime("%Y%m%d")}.csv'
+            return ExportService.csv_response(
+                [VISITOR_EXPORT_HEADERS],
+                ExportService.visitor_check_in_rows(query),
+                filename
+            )
         
         else:  # Excel
             # Crear Excel en memoria
@@ -585,7 +555,7 @@ class VisitorExport(Resource):
                     worksheet.write(2, 0, f'Evento: {event.title}')
             
             # Cabeceras para datos de visitantes
-            headers = ['ID', 'Nombre', 'Email', 'Teléfono', 'Fecha de Registro', 'Check-ins']
+            headers = VISITOR_EXPORT_HEADERS
             header_format = workbook.add_format({'bold': True, 'bg_color': '#D0D0D0'})
             
             row = 4
@@ -594,9 +564,9 @@ class VisitorExport(Resource):
             
             # Datos de visitantes
             row += 1
-            for visitor in visitor_data:
-                for col, header in enumerate(headers):
-                    worksheet.write(row, col, visitor[header])
+            for visitor in ExportService.visitor_check_in_rows(query):
+                for col, value in enumerate(visitor):
+                    worksheet.write(row, col, value)
                 row += 1
             
             # Ajustar anchos de columna
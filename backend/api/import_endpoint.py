@@ -0,0 +1,47 @@
+"""
+Endpoint para importar visitantes en bloque desde CSV o XLSX
+"""
+from flask import current_app, request, jsonify, Blueprint
+from flask_jwt_extended import jwt_required
+from utils.decorators import role_required
+from services.import_service import VisitorImportService, IMPORT_FORMATS
+
+import_bp = Blueprint('import', __name__)
+
+@import_bp.route('/api/v1/visitors/import', methods=['POST'])
+@jwt_required()
+@role_required(['admin', 'staff'])
+def import_visitors():
+    """
+    Importar una lista de visitantes (campo `file` de un formulario multipart)
+    
+    El formato se toma del parámetro `format` o de la extensión del archivo;
+    `batch_size` puede reducir el tamaño de los lotes, nunca superar
+    VISITOR_IMPORT_BATCH_SIZE. La respuesta incluye los totales y los errores por fila; las filas válidas
+    se importan aunque otras fallen.
+    """
+    if 'file' not in request.files:
+        return jsonify({'error': 'No se envió ningún archivo'}), 400
+    
+    file = request.files['file']
+    if file.filename == '':
+        return jsonify({'error': 'El archivo no tiene nombre'}), 400
+    
+    file_format = (request.form.get('format') or request.args.get('format') or
+                   file.filename.rsplit('.', 1)[-1]).lower()
+    if file_format not in IMPORT_FORMATS:
+        return jsonify({'error': f"Formato no soportado. Use {' o '.join(IMPORT_FORMATS)}"}), 400
+    
+    # Cada lote es una transacción: limitar su tamaño como el `limit` de los listados
+    max_batch_size = current_app.config.get('VISITOR_IMPORT_BATCH_SIZE', 5000)
+    batch_size = min(max(request.args.get('batch_size', max_batch_size, type=int), 1), max_batch_size)
+    
+    try:
+        rows = VisitorImportService.read_rows(file.stream, file_format)
+        report = VisitorImportService.import_visitors(rows, batch_size=batch_size)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': f'Error al importar visitantes: {str(e)}'}), 500
+    
+    return jsonify(report), 200
@@ -0,0 +1,57 @@
+"""
+Endpoint SSE con los registros y check-ins en tiempo real
+"""
+import json
+from queue import Empty
+from flask import Blueprint, Response, current_app, request
+from services.event_service import EventService
+import services.checkin_stream as checkin_stream
+
+stream_bp = Blueprint('stream', __name__)
+
+def format_sse(data, event=None, event_id=None):
+    """Serializar un mensaje en formato text/event-stream"""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    if event:
+        lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data)}")
+    return '\n'.join(lines) + '\n\n'
+
+@stream_bp.route('/api/v1/stream/checkins', methods=['GET'])
+def stream_checkins():
+    """
+    Stream de registros y check-ins con el total de check-ins de cada evento
+    
+    Envía primero un 'snapshot' con los totales actuales y después un
+    evento 'checkin' por cada cambio; ?event_id= limita el stream a un evento.
+    """
+    event_id = request.args.get('event_id', type=int)
+    heartbeat = current_app.config.get('CHECKIN_STREAM_HEARTBEAT', 15)
+    
+    broadcaster = checkin_stream.checkin_broadcaster
+    broadcaster.start()
+    # Suscribirse antes de leer los totales para no perder cambios intermedios
+    queue = broadcaster.subscribe()
+    snapshot = EventService.get_check_in_counts(None if event_id is None else [event_id])
+    
+    def generate():
+        yield f"retry: {heartbeat * 1000}\n\n"
+        yield format_sse({'check_ins': snapshot}, event='snapshot')
+        while True:
+            try:
+                message = queue.get(timeout=heartbeat)
+            except Empty:
+                # Comentario SSE para mantener viva la conexión en proxies
+                yield ": ping\n\n"
+                continue
+            if event_id is None or message.get('event_id') == event_id:
+                yield format_sse(message, event='checkin', event_id=message.get('id'))
+    
+    # El generador no usa la sesión de la base de datos ni el contexto de la petición
+    response = Response(generate(), mimetype='text/event-stream')
+    response.call_on_close(lambda: broadcaster.unsubscribe(queue))
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
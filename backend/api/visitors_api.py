@@ -1,7 +1,7 @@
 """
 Endpoints para la gestión avanzada de visitantes
 """
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, jsonify, request, stream_with_context, url_for
 import json
 from datetime import datetime
 from sqlalchemy import func
@@ -9,7 +9,11 @@ from models.database import db
 from models.visitor import Visitor, VisitorCheckIn
 from models.event import Event
 from models.kiosk import Kiosk
-from services.email_service import send_invitation_email
+from models.invitation_job import InvitationJob, InvitationResult
+from services.search_service import SearchService
+from services.visitor_service import VisitorService
+from services.invitation_service import InvitationService
+from tasks import send_bulk_invitations
 
 visitors_bp = Blueprint('visitors_api', __name__)
 
@@ -17,69 +21,34 @@ visitors_bp = Blueprint('visitors_api', __name__)
 def get_visitors_summary():
     """
     Endpoint para obtener un resumen de los visitantes con sus últimos eventos e intereses
+    
+    Paginado por ID con `cursor` (ID del último visitante recibido) y `limit`.
+    Con `stream=true` devuelve todos los visitantes como un arreglo JSON que
+    se envía por lotes, sin construir la respuesta completa en memoria.
     """
     try:
-        # Obtener todos los visitantes
-        visitors = Visitor.query.all()
+        limit = min(max(request.args.get('limit', 100, type=int), 1), 1000)
+        cursor = request.args.get('cursor', type=int)
+        
+        if request.args.get('stream', '').lower() == 'true':
+            def generate():
+                yield '['
+                for position, summary in enumerate(VisitorService.iter_visitor_summaries(limit)):
+                    yield (',' if position else '') + json.dumps(summary, ensure_ascii=False)
+                yield ']'
+            
+            return Response(stream_with_context(generate()), mimetype='application/json')
         
-        # Preparar los datos de resumen
-        summary_data = []
+        summary_data = VisitorService.get_visitor_summaries(cursor, limit)
         
-        for visitor in visitors:
-            # Obtener el último evento al que asistió
-            last_checkin = VisitorCheckIn.query.filter_by(
-                visitor_id=visitor.id
-            ).order_by(VisitorCheckIn.check_in_time.desc()).first()
-            
-            last_event = None
-            if last_checkin:
-                event = Event.query.get(last_checkin.event_id)
-                if event:
-                    last_event = {
-                        "title": event.title,
-                        "type": event.type,
-                        "date": last_checkin.check_in_time.isoformat()
-                    }
-            
-            # Obtener intereses
-            interests = visitor.get_interests()
-            
-            # Obtener estadísticas de visitas por tipo
-            visit_stats = {}
-            event_types = db.session.query(Event.type).join(
-                VisitorCheckIn,
-                VisitorCheckIn.event_id == Event.id
-            ).filter(
-                VisitorCheckIn.visitor_id == visitor.id
-            ).group_by(Event.type).all()
-            
-            for event_type in event_types:
-                type_name = event_type[0]
-                visit_count = db.session.query(VisitorCheckIn).join(
-                    Event,
-                    VisitorCheckIn.event_id == Event.id
-                ).filter(
-                    VisitorCheckIn.visitor_id == visitor.id,
-                    Event.type == type_name
-                ).count()
-                
-                visit_stats[type_name] = visit_count
-            
-            # Crear el objeto de resumen para este visitante
-            visitor_summary = {
-                "id": visitor.id,
-                "name": visitor.name,
-                "email": visitor.email,
-                "phone": visitor.phone,
-                "code": visitor.registration_code,
-                "last_event": last_event,
-                "interests": interests,
-                "total_visits": visit_stats
+        return jsonify({
+            "items": summary_data,
+            "pagination": {
+                "limit": limit,
+                "cursor": cursor,
+                "next_cursor": summary_data[-1]["id"] if len(summary_data) == limit else None
             }
-            
-            summary_data.append(visitor_summary)
-        
-        return jsonify(summary_data)
+        })
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -97,15 +66,10 @@ def get_visitors_with_filters():
         
         query = Visitor.query
         
-        # Filtrar por búsqueda
+        # Filtrar por búsqueda (índice de texto, coincidencias exactas primero)
         if search:
-            query = query.filter(
-                db.or_(
-                    Visitor.name.contains(search),
-                    Visitor.email.contains(search),
-                    Visitor.phone.contains(search)
-                )
-            )
+            condition, rank = SearchService.visitor_search(search)
+            query = query.filter(condition).order_by(rank.desc(), Visitor.id.desc())
         
         # Filtrar por evento
         if event_id:
@@ -167,12 +131,14 @@ def get_visitors_with_filters():
 def send_invitations():
     """
     Enviar invitaciones por correo a visitantes seleccionados
+    
+    El envío se procesa en segundo plano; la respuesta (202) incluye el ID
+    del envío para consultar su progreso y el resultado por visitante.
     """
     try:
         data = request.json
         
         visitor_ids = data.get('visitor_ids', [])
-        event_type = data.get('event_type', '')
         event_id = data.get('event_id')
         
         if not visitor_ids:
@@ -184,61 +150,57 @@ def send_invitations():
         # Obtener el evento
         event = Event.query.get_or_404(event_id)
         
-        # Obtener visitantes
-        visitors = Visitor.query.filter(Visitor.id.in_(visitor_ids)).all()
-        
-        if not visitors:
+        # Comprobar que existe al menos uno de los visitantes
+        if not db.session.query(Visitor.query.filter(Visitor.id.in_(visitor_ids)).exists()).scalar():
             return jsonify({"error": "No se encontraron visitantes con los IDs proporcionados"}), 404
         
-        # Enviar invitaciones
-        results = []
-        for visitor in visitors:
-            # Verificar si el visitante ya está registrado para este evento
-            existing_checkin = VisitorCheckIn.query.filter_by(
-                visitor_id=visitor.id,
-                event_id=event.id
-            ).first()
-            
-            if existing_checkin:
-                results.append({
-                    "visitor_id": visitor.id,
-                    "name": visitor.name,
-                    "email": visitor.email,
-                    "success": False,
-                    "message": "El visitante ya está registrado para este evento"
-                })
-                continue
-            
-            # Enviar correo de invitación
-            try:
-                send_invitation_email(
-                    visitor.email, 
-                    visitor.name, 
-                    event.type, 
-                    event.title, 
-                    visitor.registration_code
-                )
-                
-                results.append({
-                    "visitor_id": visitor.id,
-                    "name": visitor.name,
-                    "email": visitor.email,
-                    "success": True,
-                    "message": "Invitación enviada exitosamente"
-                })
-            except Exception as e:
-                results.append({
-                    "visitor_id": visitor.id,
-                    "name": visitor.name,
-                    "email": visitor.email,
-                    "success": False,
-                    "message": f"Error al enviar invitación: {str(e)}"
-                })
+        job = InvitationService.create_job(event.id, visitor_ids)
+        
+        try:
+            send_bulk_invitations.delay(job.id)
+        except Exception as e:
+            job.status = InvitationJob.STATUS_FAILED
+            job.error = f"No se pudo encolar el envío: {str(e)}"
+            db.session.commit()
+            return jsonify({"error": job.error, "job": job.to_dict()}), 503
         
+        # En modo eager el envío ya terminó en su propia sesión
+        db.session.refresh(job)
         return jsonify({
             "success": True,
-            "message": f"Proceso de envío completado. {sum(1 for r in results if r['success'])} de {len(results)} invitaciones enviadas.",
-            "results": results
-        })
+            "message": f"Envío de {job.total} invitaciones en proceso.",
+            "job_id": job.id,
+            "status_url": url_for('visitors_api.get_invitation_job', job_id=job.id),
+            "job": job.to_dict()
+        }), 202
     except Exception as e:
         return jsonify({"error": str(e)}), 500
+
+@visitors_bp.route("/api/v1/invitations/jobs/<job_id>", methods=["GET"])
+def get_invitation_job(job_id):
+    """
+    Consultar el estado de un envío de invitaciones y sus resultados
+    
+    Los resultados se paginan con `page` y `limit`; `status` filtra por
+    SENT, SKIPPED o FAILED.
+    """
+    job = db.get_or_404(InvitationJob, job_id)
+    page = request.args.get('page', 1, type=int)
+    limit = min(request.args.get('limit', 100, type=int), 1000)
+    status = request.args.get('status')
+    
+    results = job.results.order_by(InvitationResult.id)
+    if status:
+        results = results.filter(InvitationResult.status == status.upper())
+    pagination = results.paginate(page=page, per_page=limit, error_out=False)
+    
+    return jsonify({
+        "job": job.to_dict(),
+        "results": [result.to_dict() for result in pagination.items],
+        "pagination": {
+            "page": page,
+            "limit": limit,
+            "total": pagination.total,
+            "pages": pagination.pages
+        }
+    })
@@ -5,18 +5,31 @@ import os
 from datetime import datetime
 from flask import Flask, jsonify, request
 from flask_cors import CORS
+from flask_jwt_extended import JWTManager
 from flask_sqlalchemy import SQLAlchemy
 from models.database import db, init_app
-from models.visitor import Visitor, VisitorCheckIn
+from models.visitor import Visitor, VisitorCheckIn, EventVisitor
 from models.event import Event
 from models.user import User
 from models.kiosk import Kiosk
+from models.analytics import CheckInRollup
 from config.database_config import config
+from services.event_service import EventService
+from services.visitor_service import VisitorService
+from services.search_service import SearchService
 from dotenv import load_dotenv
 from api.dashboard_analytics import init_dashboard_analytics
 from api.export_endpoint import export_bp
 from api.upload_endpoint import upload_bp
 from api.visitors_api import visitors_bp
+from api.stream_endpoint import stream_bp
+from api.audit_endpoint import audit_bp
+from api.import_endpoint import import_bp
+from cache import cached, init_cache
+from services.registration_code_index import init_registration_code_index
+from tasks import celery, init_celery  # Worker: celery -A app:celery worker (y beat para las tareas periódicas)
+from services.checkin_stream import init_checkin_stream, publish_check_in
+from services.audit_service import init_audit_log
 from flask import send_from_directory
 
 # Cargar variables de entorno
@@ -37,7 +50,12 @@ def create_app(config_name=None):
     
     # Inicializar extensiones
     CORS(app)
+    JWTManager(app)
     init_app(app)
+    init_cache(app)
+    init_celery(app)
+    init_checkin_stream(app)
+    init_audit_log(app)
     
     return app
 
@@ -55,6 +73,18 @@ app.register_blueprint(upload_bp)
 # Registrar blueprint de API de visitantes avanzada
 app.register_blueprint(visitors_bp)
 
+# Registrar blueprint del stream de check-ins (requiere worker asíncrono)
+app.register_blueprint(stream_bp)
+
+# Registrar blueprint de consulta de auditoría
+app.register_blueprint(audit_bp)
+
+# Registrar blueprint de importación masiva de visitantes
+app.register_blueprint(import_bp)
+
+# Precargar el índice de códigos de registro para el kiosco
+init_registration_code_index(app)
+
 # ========================
 # RUTA DE ARCHIVOS ESTÁTICOS
 # ========================
@@ -117,6 +147,7 @@ def login():
 # ENDPOINTS DE EVENTOS
 # ========================
 @app.route("/api/v1/events/", methods=["GET"])
+@cached(timeout=None, tags=['events', 'event-stats'])
 def get_events():
     """Obtener lista de eventos"""
     try:
@@ -124,8 +155,8 @@ def get_events():
         
         events_data = []
         for event in events:
-            # Obtener número de visitantes registrados
-            registered_count = VisitorCheckIn.query.filter_by(event_id=event.id).count()
+            # Contador persistido en events (ver models.visitor, hooks de VisitorCheckIn)
+            registered_count = event.check_in_row_count
             
             events_data.append({
                 "id": event.id,
@@ -146,13 +177,14 @@ def get_events():
         return jsonify({"error": str(e)}), 500
 
 @app.route("/api/v1/events/<int:event_id>", methods=["GET"])
+@cached(timeout=None, tags=['event:{event_id}'])
 def get_event_by_id(event_id):
     """Obtener un evento específico"""
     try:
         event = Event.query.get_or_404(event_id)
         
         # Obtener número de visitantes registrados
-        registered_count = VisitorCheckIn.query.filter_by(event_id=event_id).count()
+        registered_count = event.check_in_row_count
         
         return jsonify({
             "id": event.id,
@@ -164,7 +196,7 @@ def get_event_by_id(event_id):
             "image_url": event.image_url,
             "is_active": event.is_active,
             "is_ongoing": event.is_ongoing,
-            "visitors_count": len(event.visitors),
+            "visitors_count": EventService.get_visitors_count(event_id),
             "registered_count": registered_count,
             "checked_in_count": registered_count  # Por ahora, todos los registrados se consideran con check-in
         })
@@ -283,8 +315,11 @@ def delete_event(event_id):
     try:
         event = Event.query.get_or_404(event_id)
         
-        # Eliminar registros relacionados primero
+        # Eliminar registros relacionados primero. El DELETE masivo no pasa por
+        # los hooks del ORM y SQLite no aplica el ON DELETE CASCADE, así que
+        # los agregados del evento se eliminan aquí
         VisitorCheckIn.query.filter_by(event_id=event_id).delete()
+        CheckInRollup.query.filter_by(event_id=event_id).delete()
         
         # Eliminar el evento
         db.session.delete(event)
@@ -299,93 +334,170 @@ def delete_event(event_id):
 # ========================
 # ENDPOINTS DE VISITANTES
 # ========================
+def _visitor_filters(search, event_id):
+    """
+    Construye los filtros comunes del listado de visitantes
+    
+    Los filtros se aplican sobre la tabla de visitantes; el de evento se
+    expresa como subconsulta para no multiplicar filas con el join.
+    
+    Args:
+        search (str): Término de búsqueda
+        event_id (int): ID del evento para filtrar
+        
+    Returns:
+        list: Lista de condiciones SQLAlchemy
+    """
+    filters = []
+    if search:
+        filters.append(SearchService.visitor_search(search)[0])
+    if event_id:
+        filters.append(Visitor.id.in_(
+            db.session.query(VisitorCheckIn.visitor_id).filter(VisitorCheckIn.event_id == event_id)
+        ))
+    return filters
+
 @app.route("/api/v1/visitors", methods=["GET"])
 def get_visitors():
-    """Obtener lista de visitantes con paginación"""
+    """
+    Obtener lista de visitantes con paginación
+    
+    La paginación se hace sobre visitantes, ordenados por (created_at, id)
+    con el índice ix_visitors_created_at_id, y después se cargan los
+    check-ins de los visitantes de la página: cada visitante aparece una vez
+    por check-in (o una vez sin evento si no tiene), siempre en la misma
+    página, así que `limit` (máximo 100) cuenta visitantes, no elementos.
+    
+    Por defecto se usa LIMIT/OFFSET con `page` y `limit` más un COUNT
+    separado. Si se envían `after_created_at` y `after_id` (cursor devuelto en
+    `next_cursor`) se usa paginación por clave (keyset), cuyo coste no depende
+    de la profundidad de la página y no ejecuta el COUNT.
+    
+    Con `search` los resultados se ordenan primero por relevancia
+    (coincidencia exacta de código o email) y el cursor incluye `after_rank`.
+    """
     try:
-        page = request.args.get('page', 1, type=int)
-        limit = request.args.get('limit', 10, type=int)
+        page = max(request.args.get('page', 1, type=int), 1)
+        limit = min(max(request.args.get('limit', 10, type=int), 1), 100)
         search = request.args.get('search', '', type=str)
         event_id = request.args.get('event_id', type=int)
+        after_id = request.args.get('after_id', type=int)
+        after_created_at = request.args.get('after_created_at', type=str)
+        after_rank = request.args.get('after_rank', 0, type=int)
         
-        # Query base con join a VisitorCheckIn y Event
-        query = db.session.query(
-            Visitor,
-            VisitorCheckIn,
-            Event
-        ).join(
-            VisitorCheckIn, 
-            Visitor.id == VisitorCheckIn.visitor_id,
-            isouter=True
-        ).join(
-            Event,
-            VisitorCheckIn.event_id == Event.id,
-            isouter=True
-        )
-        
-        # Filtrar por búsqueda
-        if search:
-            query = query.filter(
-                db.or_(
-                    Visitor.name.contains(search),
-                    Visitor.email.contains(search),
-                    Visitor.phone.contains(search),
-                    Visitor.registration_code.contains(search)
-                )
-            )
+        cursor_mode = after_id is not None and bool(after_created_at)
+        if cursor_mode:
+            try:
+                after_created_at = datetime.fromisoformat(after_created_at.replace('Z', '+00:00'))
+            except ValueError:
+                return jsonify({"error": "Formato de after_created_at inválido"}), 400
         
-        # Filtrar por evento
-        if event_id:
-            query = query.filter(VisitorCheckIn.event_id == event_id)
+        filters = _visitor_filters(search, event_id)
+        # Sin búsqueda la relevancia es constante y no altera el orden
+        rank = SearchService.visitor_search(search)[1] if search else db.literal(0)
         
-        # Obtener resultados únicos
-        results = query.distinct().all()
+        # Página de visitantes, sin joins
+        query = db.session.query(Visitor, rank).filter(*filters).order_by(
+            rank.desc(),
+            Visitor.created_at.desc(),
+            Visitor.id.desc()
+        )
         
-        # Paginar manualmente los resultados
-        start = (page - 1) * limit
-        end = start + limit
-        total = len(results)
-        paginated_results = results[start:end]
+        total = None
+        if cursor_mode:
+            if search:
+                query = query.filter(
+                    db.tuple_(rank, Visitor.created_at, Visitor.id) <
+                    db.tuple_(after_rank, after_created_at, after_id)
+                )
+            else:
+                query = query.filter(
+                    db.tuple_(Visitor.created_at, Visitor.id) <
+                    db.tuple_(after_created_at, after_id)
+                )
+        else:
+            # Conteo separado sin cargar filas
+            total = db.session.query(db.func.count(Visitor.id)).filter(*filters).scalar()
+            query = query.offset((page - 1) * limit)
+        
+        page_visitors = query.limit(limit).all()
+        visitor_ids = [visitor.id for visitor, _ in page_visitors]
+        
+        # Check-ins (con su evento) y total de check-ins de los visitantes de esta página
+        check_ins = {}
+        check_ins_counts = {}
+        if visitor_ids:
+            checkin_query = db.session.query(VisitorCheckIn, Event).outerjoin(
+                Event,
+                VisitorCheckIn.event_id == Event.id
+            ).filter(VisitorCheckIn.visitor_id.in_(visitor_ids))
+            if event_id:
+                checkin_query = checkin_query.filter(VisitorCheckIn.event_id == event_id)
+            for checkin, event in checkin_query.order_by(VisitorCheckIn.id.desc()):
+                check_ins.setdefault(checkin.visitor_id, []).append((checkin, event))
+            
+            check_ins_counts = dict(db.session.query(
+                VisitorCheckIn.visitor_id,
+                db.func.count(VisitorCheckIn.id)
+            ).filter(
+                VisitorCheckIn.visitor_id.in_(visitor_ids)
+            ).group_by(VisitorCheckIn.visitor_id).all())
         
         visitors_data = []
-        for visitor, checkin, event in paginated_results:
-            visitor_info = {
-                "id": visitor.id,
-                "name": visitor.name,
-                "email": visitor.email,
-                "phone": visitor.phone,
-                "registration_code": visitor.registration_code,
-                "created_at": visitor.created_at.isoformat() if visitor.created_at else None,
-                "check_ins_count": len(visitor.check_ins),
-                "event": None,
-                "event_title": None,
-                "checked_in": False,
-                "check_in_time": None
-            }
-            
-            # Agregar información del evento si existe
-            if event:
-                visitor_info["event"] = {
-                    "id": event.id,
-                    "title": event.title,
-                    "start_date": event.start_date.isoformat() if event.start_date else None,
-                    "end_date": event.end_date.isoformat() if event.end_date else None,
-                    "location": event.location
+        for visitor, _ in page_visitors:
+            for checkin, event in check_ins.get(visitor.id, [(None, None)]):
+                visitor_info = {
+                    "id": visitor.id,
+                    "name": visitor.name,
+                    "email": visitor.email,
+                    "phone": visitor.phone,
+                    "registration_code": visitor.registration_code,
+                    "created_at": visitor.created_at.isoformat() if visitor.created_at else None,
+                    "check_ins_count": check_ins_counts.get(visitor.id, 0),
+                    "event": None,
+                    "event_title": None,
+                    "checked_in": False,
+                    "check_in_time": None
                 }
-                visitor_info["event_title"] = event.title
-                visitor_info["checked_in"] = checkin is not None
-                visitor_info["check_in_time"] = checkin.check_in_time.isoformat() if checkin and checkin.check_in_time else None
-            
-            visitors_data.append(visitor_info)
+                
+                # Agregar información del evento si existe
+                if event:
+                    visitor_info["event"] = {
+                        "id": event.id,
+                        "title": event.title,
+                        "start_date": event.start_date.isoformat() if event.start_date else None,
+                        "end_date": event.end_date.isoformat() if event.end_date else None,
+                        "location": event.location
+                    }
+                    visitor_info["event_title"] = event.title
+                    visitor_info["checked_in"] = checkin is not None
+                    visitor_info["check_in_time"] = checkin.check_in_time.isoformat() if checkin and checkin.check_in_time else None
+                
+                visitors_data.append(visitor_info)
+        
+        # Cursor para la siguiente página (solo si la página está completa)
+        next_cursor = None
+        if len(page_visitors) == limit:
+            last_visitor, last_rank = page_visitors[-1]
+            if last_visitor.created_at:
+                next_cursor = {
+                    "after_created_at": last_visitor.created_at.isoformat(),
+                    "after_id": last_visitor.id
+                }
+                if search:
+                    next_cursor["after_rank"] = last_rank
+        
+        pagination = {
+            "page": None if cursor_mode else page,
+            "limit": limit,
+            "total": total,
+            "pages": (total + limit - 1) // limit if total is not None else None,  # División entera redondeada hacia arriba
+            "next_cursor": next_cursor
+        }
         
         return jsonify({
             "items": visitors_data,
-            "pagination": {
-                "page": page,
-                "limit": limit,
-                "total": total,
-                "pages": (total + limit - 1) // limit  # División entera redondeada hacia arriba
-            }
+            "pagination": pagination
         })
     except Exception as e:
         import traceback
@@ -429,6 +541,16 @@ def register_visitor():
                 "error": "El visitante ya está registrado para este evento"
             }), 400
         
+        # Reservar cupo con un UPDATE condicional: dos registros concurrentes
+        # no pueden superar la capacidad del evento
+        event = db.session.get(Event, data['event_id'])
+        if not event:
+            db.session.rollback()
+            return jsonify({"error": "Evento no encontrado"}), 404
+        if not event.register_visitor(visitor):
+            db.session.rollback()
+            return jsonify({"error": "El evento no tiene capacidad disponible"}), 409
+        
         # Crear registro de check-in
         checkin = VisitorCheckIn(
             visitor_id=visitor.id,
@@ -437,6 +559,7 @@ def register_visitor():
         )
         db.session.add(checkin)
         db.session.commit()
+        publish_check_in('registration', checkin.event_id, visitor.id)
         
         print(f"Registro completado - Código: '{visitor.registration_code}'")
         
@@ -456,6 +579,7 @@ def register_visitor():
         return jsonify({"error": str(e)}), 500
 
 @app.route("/api/v1/visitors/statistics", methods=["GET"])
+@cached(timeout=None, tags=['visitors'])
 def get_visitor_statistics():
     """Obtener estadísticas de visitantes"""
     try:
@@ -527,33 +651,8 @@ def verify_visitor_code():
         
         print(f"Verificando código: '{code}' (longitud: {len(code)})")
         
-        # Buscar visitante por código, email, teléfono o ID
-        visitor = None
-        
-        # Primero intentar buscar por código de registro (exacto)
-        visitor = Visitor.query.filter_by(registration_code=code).first()
-        print(f"Búsqueda por código exacto: {'Encontrado' if visitor else 'No encontrado'}")
-        
-        if not visitor:
-            # Intentar buscar por código en mayúsculas
-            visitor = Visitor.query.filter_by(registration_code=code.upper()).first()
-            print(f"Búsqueda por código en mayúsculas: {'Encontrado' if visitor else 'No encontrado'}")
-        
-        if not visitor:
-            # Intentar buscar por ID numérico
-            try:
-                visitor_id = int(code)
-                visitor = Visitor.query.get(visitor_id)
-                print(f"Búsqueda por ID {visitor_id}: {'Encontrado' if visitor else 'No encontrado'}")
-            except ValueError:
-                # Si no es un número, buscar por email o teléfono
-                visitor = Visitor.query.filter(
-                    db.or_(
-                        Visitor.email == code,
-                        Visitor.phone == code
-                    )
-                ).first()
-                print(f"Búsqueda por email/teléfono: {'Encontrado' if visitor else 'No encontrado'}")
+        # Buscar visitante por código, ID, email o teléfono junto con sus registros (una consulta)
+        visitor, registrations = VisitorService.resolve_verification_code(code)
         
         if not visitor:
             # Log para debug
@@ -570,29 +669,17 @@ def verify_visitor_code():
         print(f"Visitante encontrado: {visitor.name} (ID: {visitor.id})")
         
         # Obtener eventos activos del visitante
-        now = datetime.utcnow()
-        active_registrations = db.session.query(
-            VisitorCheckIn,
-            Event
-        ).join(
-            Event, 
-            VisitorCheckIn.event_id == Event.id
-        ).filter(
-            VisitorCheckIn.visitor_id == visitor.id,
-            Event.is_active == True
-        ).all()
+        active_registrations = [
+            (registration, event) for registration, event in registrations
+            if event is not None and event.is_active
+        ]
         
-        # Si no hay filtro por fechas, mostrar todos los eventos del visitante
+        # Si no hay eventos activos, mostrar todos los eventos del visitante
         if not active_registrations:
-            active_registrations = db.session.query(
-                VisitorCheckIn,
-                Event
-            ).join(
-                Event, 
-                VisitorCheckIn.event_id == Event.id
-            ).filter(
-                VisitorCheckIn.visitor_id == visitor.id
-            ).all()
+            active_registrations = [
+                (registration, event) for registration, event in registrations
+                if event is not None
+            ]
         
         events_data = []
         for registration, event in active_registrations:
@@ -627,6 +714,7 @@ def verify_visitor_code():
 # ENDPOINTS ADICIONALES DE VISITANTES EN EVENTOS
 # ========================
 @app.route("/api/v1/visitors/event/<int:event_id>", methods=["GET"])
+@cached(timeout=None, tags=['event:{event_id}'])
 def get_event_visitors(event_id):
     """Obtener visitantes registrados para un evento específico"""
     try:
@@ -675,7 +763,16 @@ def checkin_visitor(event_id, visitor_id):
         
         # Actualizar tiempo de check-in
         checkin.check_in_time = datetime.utcnow()
+        
+        # Marcar el registro del evento (ajusta checked_in_count)
+        registration = EventVisitor.query.filter_by(
+            visitor_id=visitor_id,
+            event_id=event_id
+        ).first()
+        if registration and not registration.is_checked_in:
+            registration.check_in()
         db.session.commit()
+        publish_check_in('check_in', event_id, visitor_id)
         
         return jsonify({
             "success": True,
@@ -7,13 +7,19 @@ from flask import Flask, jsonify, request
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
 from models.database import db, init_app
-from models.visitor import Visitor, VisitorCheckIn
+from models.visitor import Visitor, VisitorCheckIn, EventVisitor
 from models.event import Event
 from models.user import User
 from models.kiosk import Kiosk
+from models.analytics import CheckInRollup
 from config.database_config import config
+from services.event_service import EventService
+from services.visitor_service import VisitorService
 from dotenv import load_dotenv
 from api.visitors_api import visitors_bp
+from cache import init_cache
+from services.registration_code_index import init_registration_code_index
+from tasks import celery, init_celery  # Worker: celery -A app_production:celery worker (y beat para las tareas periódicas)
 
 # Cargar variables de entorno
 load_dotenv()
@@ -34,10 +40,15 @@ def create_app(config_name=None):
     # Inicializar extensiones
     CORS(app)
     init_app(app)
+    init_cache(app)
+    init_celery(app)
     
     # Registrar blueprints
     app.register_blueprint(visitors_bp)
     
+    # Precargar el índice de códigos de registro para el kiosco
+    init_registration_code_index(app)
+    
     return app
 
 app = create_app()
@@ -100,10 +111,12 @@ def get_events():
     try:
         events = Event.query.all()
         
+        # Número de visitantes registrados de todos los eventos en una sola consulta
+        checkin_counts = EventService.get_check_in_counts()
+        
         events_data = []
         for event in events:
-            # Obtener número de visitantes registrados
-            registered_count = VisitorCheckIn.query.filter_by(event_id=event.id).count()
+            registered_count = checkin_counts.get(event.id, 0)
             
             events_data.append({
                 "id": event.id,
@@ -142,7 +155,7 @@ def get_event_by_id(event_id):
             "image_url": event.image_url,
             "is_active": event.is_active,
             "is_ongoing": event.is_ongoing,
-            "visitors_count": len(event.visitors),
+            "visitors_count": EventService.get_visitors_count(event_id),
             "registered_count": registered_count,
             "checked_in_count": registered_count  # Por ahora, todos los registrados se consideran con check-in
         })
@@ -236,8 +249,11 @@ def delete_event(event_id):
     try:
         event = Event.query.get_or_404(event_id)
         
-        # Eliminar registros relacionados primero
+        # Eliminar registros relacionados primero. El DELETE masivo no pasa por
+        # los hooks del ORM y SQLite no aplica el ON DELETE CASCADE, así que
+        # los agregados del evento se eliminan aquí
         VisitorCheckIn.query.filter_by(event_id=event_id).delete()
+        CheckInRollup.query.filter_by(event_id=event_id).delete()
         
         # Eliminar el evento
         db.session.delete(event)
@@ -337,6 +353,16 @@ def register_visitor():
                 "error": "El visitante ya está registrado para este evento"
             }), 400
         
+        # Reservar cupo con un UPDATE condicional: dos registros concurrentes
+        # no pueden superar la capacidad del evento
+        event = db.session.get(Event, data['event_id'])
+        if not event:
+            db.session.rollback()
+            return jsonify({"error": "Evento no encontrado"}), 404
+        if not event.register_visitor(visitor):
+            db.session.rollback()
+            return jsonify({"error": "El evento no tiene capacidad disponible"}), 409
+        
         # Crear registro de check-in
         checkin = VisitorCheckIn(
             visitor_id=visitor.id,
@@ -425,43 +451,20 @@ def verify_visitor_code():
         if not code:
             return jsonify({"error": "Código es requerido"}), 400
         
-        # Buscar visitante por código, email, teléfono o ID
-        visitor = None
-        
-        # Primero intentar buscar por código de registro
-        visitor = Visitor.query.filter_by(registration_code=code.upper()).first()
-        
-        if not visitor:
-            # Intentar buscar por ID numérico
-            try:
-                visitor_id = int(code)
-                visitor = Visitor.query.get(visitor_id)
-            except ValueError:
-                # Si no es un número, buscar por email o teléfono
-                visitor = Visitor.query.filter(
-                    db.or_(
-                        Visitor.email == code,
-                        Visitor.phone == code
-                    )
-                ).first()
+        # Buscar visitante por código, ID, email o teléfono junto con sus registros (una consulta)
+        visitor, registrations = VisitorService.resolve_verification_code(code)
         
         if not visitor:
             return jsonify({"error": "Código no válido"}), 404
         
         # Obtener eventos activos del visitante
         now = datetime.utcnow()
-        active_registrations = db.session.query(
-            VisitorCheckIn,
-            Event
-        ).join(
-            Event, 
-            VisitorCheckIn.event_id == Event.id
-        ).filter(
-            VisitorCheckIn.visitor_id == visitor.id,
-            Event.is_active == True,
-            Event.start_date <= now,
-            Event.end_date >= now
-        ).all()
+        active_registrations = [
+            (registration, event) for registration, event in registrations
+            if event is not None and event.is_active
+            and event.start_date and event.start_date <= now
+            and event.end_date and event.end_date >= now
+        ]
         
         events_data = []
         for registration, event in active_registrations:
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Benchmark del coste de los decoradores de autorización
+
+Compara el role_required anterior (consulta del usuario y trazas DEBUG por
+petición) con el actual, que autoriza con las claims del token y el estado
+del usuario cacheado por worker (services.user_state_cache). Mide solo el
+decorador sobre una vista vacía dentro de un contexto de petición, con una
+base de datos SQLite en memoria.
+
+Uso:
+    python benchmark_authorization.py [--requests 5000]
+"""
+import argparse
+import contextlib
+import io
+import time
+from functools import wraps
+from flask import Flask, jsonify
+from flask_jwt_extended import JWTManager, create_access_token, get_jwt_identity, verify_jwt_in_request
+
+from services.user_state_cache import user_state_cache
+from models.database import db
+from models.permission import Role  # noqa: F401 (tabla roles para la FK de users)
+from models.user import User
+from services.auth_service import AuthService
+from utils.decorators import role_required
+
+def legacy_role_required(allowed_roles):
+    """role_required anterior: consulta al usuario en cada petición"""
+    def wrapper(fn):
+        @wraps(fn)
+        def decorator(*args, **kwargs):
+            verify_jwt_in_request()
+            user_id = get_jwt_identity()
+            print(f"DEBUG - role_required - User ID: {user_id}")
+            print(f"DEBUG - role_required - Roles permitidos: {allowed_roles}")
+            user = db.session.get(User, user_id)
+            print(f"DEBUG - role_required - User encontrado: {user is not None}")
+            if user:
+                print(f"DEBUG - role_required - Rol del usuario: {user.role}")
+            if not user or user.role not in allowed_roles:
+                print(f"DEBUG - role_required - Acceso denegado")
+                return jsonify(error="Insufficient privileges"), 403
+            print(f"DEBUG - role_required - Acceso permitido")
+            return fn(*args, **kwargs)
+        return decorator
+    return wrapper
+
+def create_benchmark_app():
+    """Crear una aplicación mínima con un usuario staff"""
+    app = Flask(__name__)
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI='sqlite://',
+        JWT_SECRET_KEY='benchmark-secret-key-with-enough-length'
+    )
+    db.init_app(app)
+    JWTManager(app)
+    with app.app_context():
+        db.create_all()
+        user = User(username='staff', email='staff@example.com', first_name='Staff', last_name='User', role='staff')
+        user.set_password('Benchmark123!')
+        db.session.add(user)
+        db.session.commit()
+        token = create_access_token(identity=str(user.id), additional_claims=AuthService.token_claims(user))
+    return app, token
+
+def run(app, token, view, requests):
+    """Microsegundos por petición autorizada"""
+    headers = {'Authorization': f'Bearer {token}'}
+    with app.test_request_context(headers=headers):
+        assert view() == 'ok'
+        start = time.perf_counter()
+        for _ in range(requests):
+            view()
+            # Cada petición real termina con su propia sesión (sin mapa de identidad compartido)
+            db.session.remove()
+        elapsed = time.perf_counter() - start
+    return elapsed / requests * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=5000, help='Peticiones por variante (por defecto: 5000)')
+    args = parser.parse_args()
+
+    app, token = create_benchmark_app()
+    view = lambda: 'ok'
+    legacy = legacy_role_required(['admin', 'staff'])(view)
+    current = role_required(['admin', 'staff'])(view)
+
+    print(f"{args.requests} peticiones por variante\n")
+    print(f"{'Decorador':<38} | {'µs/petición':>12}")
+    print('-' * 53)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        legacy_us = run(app, token, legacy, args.requests)
+    print(f"{'anterior (consulta + DEBUG)':<38} | {legacy_us:>12.1f}")
+
+    user_state_cache.ttl = 0
+    print(f"{'claims, estado sin caché':<38} | {run(app, token, current, args.requests):>12.1f}")
+
+    user_state_cache.ttl = 30
+    print(f"{'claims, estado en caché':<38} | {run(app, token, current, args.requests):>12.1f}")
+
+    def verify_only():
+        verify_jwt_in_request()
+        return 'ok'
+
+    # Solo la verificación del token, como referencia
+    print(f"{'solo verify_jwt_in_request':<38} | {run(app, token, verify_only, args.requests):>12.1f}")
+
+if __name__ == "__main__":
+    main()
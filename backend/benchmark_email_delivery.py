@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Benchmark de envío de correos de las tareas de Celery
+
+Levanta un servidor SMTP local de depuración (aiosmtpd) y compara el envío
+anterior (una conexión por mensaje) con el pool de conexiones del proceso,
+tanto mensaje a mensaje (tasks.send_email) como por lotes agrupados
+(tasks.deliver_emails -> send_email_batch). Las tareas se ejecutan en modo
+eager, en el mismo proceso.
+
+--handshake-delay simula el coste de STARTTLS + login de un servidor real
+retrasando la respuesta a EHLO en cada conexión nueva.
+
+Uso:
+    python benchmark_email_delivery.py [--messages 1000] [--handshake-delay 0.05]
+"""
+import argparse
+import asyncio
+import smtplib
+import socket
+import time
+from email.mime.text import MIMEText
+from flask import Flask
+
+from services.email_service import close_smtp_pool
+from tasks import deliver_emails, init_celery, send_email, summarize_deliveries
+
+class CountingHandler:
+    """Acepta y cuenta los mensajes; retrasa EHLO para simular el handshake"""
+
+    def __init__(self, handshake_delay):
+        self.handshake_delay = handshake_delay
+        self.messages = 0
+        self.connections = 0
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        self.connections += 1
+        session.host_name = hostname
+        if self.handshake_delay:
+            await asyncio.sleep(self.handshake_delay)
+        return responses
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages += 1
+        return '250 Message accepted for delivery'
+
+def free_port():
+    """Obtener un puerto TCP libre"""
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+def create_benchmark_app(port, pool_size, batch_size):
+    """Crear una aplicación mínima apuntando al servidor local"""
+    app = Flask(__name__)
+    app.config.update(
+        MAIL_SERVER='127.0.0.1',
+        MAIL_PORT=port,
+        MAIL_DEFAULT_SENDER='benchmark@example.com',
+        MAIL_POOL_SIZE=pool_size,
+        MAIL_BATCH_SIZE=batch_size,
+        CELERY_TASK_ALWAYS_EAGER=True
+    )
+    init_celery(app)
+    return app
+
+def build_messages(count):
+    return [
+        {'to': f'visitante{i}@example.com', 'subject': 'Recordatorio', 'body': f'Mensaje {i}', 'is_html': False}
+        for i in range(count)
+    ]
+
+def run_connection_per_message(port, messages):
+    """Método anterior: conectar, enviar y cerrar por cada mensaje"""
+    start = time.perf_counter()
+    for message in messages:
+        msg = MIMEText(message['body'])
+        msg['From'] = 'benchmark@example.com'
+        msg['To'] = message['to']
+        msg['Subject'] = message['subject']
+        server = smtplib.SMTP('127.0.0.1', port)
+        server.send_message(msg)
+        server.quit()
+    return time.perf_counter() - start
+
+def run_pooled_send_email(messages):
+    """tasks.send_email reutilizando las conexiones del pool"""
+    start = time.perf_counter()
+    for message in messages:
+        send_email(message['to'], message['subject'], message['body'])
+    return time.perf_counter() - start
+
+def run_grouped_batches(messages):
+    """tasks.deliver_emails: group de send_email_batch"""
+    start = time.perf_counter()
+    reports = deliver_emails(messages).get(disable_sync_subtasks=False)
+    elapsed = time.perf_counter() - start
+    return elapsed, summarize_deliveries(reports, elapsed)
+
+def main():
+    from aiosmtpd.controller import Controller
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--messages', type=int, default=1000, help='Correos por método (por defecto: 1000)')
+    parser.add_argument('--handshake-delay', type=float, default=0.05, help='Segundos de handshake por conexión')
+    parser.add_argument('--pool-size', type=int, default=4, help='Conexiones del pool')
+    parser.add_argument('--batch-size', type=int, default=200, help='Correos por tarea send_email_batch')
+    args = parser.parse_args()
+
+    port = free_port()
+    handler = CountingHandler(args.handshake_delay)
+    controller = Controller(handler, hostname='127.0.0.1', port=port)
+    controller.start()
+    app = create_benchmark_app(port, args.pool_size, args.batch_size)
+    messages = build_messages(args.messages)
+
+    print(f"{args.messages} correos, handshake simulado de {args.handshake_delay * 1000:.0f} ms, "
+          f"pool de {args.pool_size} conexiones\n")
+    print(f"{'Método':<30} | {'Mensajes/s':>10} | {'Conexiones':>10}")
+    print('-' * 57)
+
+    try:
+        with app.app_context():
+            def report(name, elapsed, before):
+                print(f"{name:<30} | {len(messages) / elapsed:>10,.1f} | {handler.connections - before:>10}")
+
+            before = handler.connections
+            report('conexión por mensaje', run_connection_per_message(port, messages), before)
+
+            close_smtp_pool()
+            before = handler.connections
+            report('send_email con pool', run_pooled_send_email(messages), before)
+
+            close_smtp_pool()
+            before = handler.connections
+            elapsed, summary = run_grouped_batches(messages)
+            report('send_email_batch (group)', elapsed, before)
+            assert summary['sent'] == len(messages), summary['errors'][:5]
+    finally:
+        close_smtp_pool()
+        controller.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Benchmark de asignación de códigos de registro
+
+Compara el método anterior (código aleatorio + SELECT por cada intento) con el
+asignador por secuencia permutada de utils.registration_codes a distintos
+niveles de ocupación del espacio de códigos.
+
+Para poder llenar el espacio al 10%, 50% y 90% se usa una longitud de código
+reducida (por defecto 3 caracteres = 46.656 códigos) sobre SQLite en memoria.
+El coste por código del asignador no depende de la longitud.
+
+Uso:
+    python benchmark_registration_codes.py [--length 3] [--allocations 2000]
+"""
+import argparse
+import random
+import secrets
+import time
+from flask import Flask
+from sqlalchemy.pool import StaticPool
+
+from models.database import db
+from models.visitor import Visitor, RegistrationCodeSequence
+from models.permission import Role  # Necesario para configurar las relaciones de User
+from utils.registration_codes import (
+    CODE_ALPHABET, RegistrationCodeAllocator, code_space, encode, permute
+)
+
+OCCUPANCY_LEVELS = [0.10, 0.50, 0.90]
+
+def create_benchmark_app():
+    """Crear una aplicación mínima con SQLite en memoria"""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {'poolclass': StaticPool}
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['SECRET_KEY'] = 'benchmark'
+    db.init_app(app)
+    return app
+
+def reset_database():
+    """Vaciar las tablas usadas por el benchmark"""
+    db.drop_all()
+    db.create_all()
+
+def fill_random(length, count):
+    """Ocupar el espacio con códigos aleatorios (como hacía el método anterior)"""
+    values = random.sample(range(code_space(length)), count)
+    db.session.execute(Visitor.__table__.insert(), [
+        {'name': 'Ocupado', 'email': 'ocupado@example.com', 'registration_code': encode(value, length)}
+        for value in values
+    ])
+    db.session.commit()
+
+def fill_sequential(length, count, key):
+    """Ocupar el espacio con códigos emitidos previamente por el asignador"""
+    db.session.execute(Visitor.__table__.insert(), [
+        {'name': 'Ocupado', 'email': 'ocupado@example.com',
+         'registration_code': encode(permute(index, key, length), length)}
+        for index in range(count)
+    ])
+    db.session.add(RegistrationCodeSequence(id=1, next_value=count))
+    db.session.commit()
+
+def legacy_generate(length, queries):
+    """Método anterior: generar al azar y consultar hasta encontrar uno libre"""
+    while True:
+        code = ''.join(secrets.choice(CODE_ALPHABET) for _ in range(length))
+        queries[0] += 1
+        if not db.session.query(Visitor.id).filter_by(registration_code=code).first():
+            return code
+
+def run_legacy(length, allocations):
+    queries = [0]
+    start = time.perf_counter()
+    for _ in range(allocations):
+        legacy_generate(length, queries)
+    return time.perf_counter() - start, queries[0]
+
+def run_allocator(length, allocations):
+    allocator = RegistrationCodeAllocator(length=length)
+    start = time.perf_counter()
+    codes = [allocator.next_code() for _ in range(allocations)]
+    elapsed = time.perf_counter() - start
+    assert len(set(codes)) == len(codes), "El asignador generó códigos repetidos"
+    return elapsed, None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--length', type=int, default=3, help='Longitud del código (por defecto: 3)')
+    parser.add_argument('--allocations', type=int, default=2000, help='Códigos a asignar por nivel')
+    args = parser.parse_args()
+
+    space = code_space(args.length)
+    allocations = min(args.allocations, int(space * (1 - max(OCCUPANCY_LEVELS))) // 2)
+    app = create_benchmark_app()
+
+    print(f"Espacio de códigos: {space:,} ({args.length} caracteres), {allocations} asignaciones por nivel\n")
+    print(f"{'Ocupación':>10} | {'Método':<22} | {'Códigos/s':>12} | {'Consultas/código':>16}")
+    print('-' * 70)
+
+    with app.app_context():
+        key = app.config['SECRET_KEY'].encode()
+        for occupancy in OCCUPANCY_LEVELS:
+            occupied = int(space * occupancy)
+
+            reset_database()
+            fill_random(args.length, occupied)
+            elapsed, queries = run_legacy(args.length, allocations)
+            print(f"{occupancy:>9.0%} | {'aleatorio + SELECT':<22} | {allocations / elapsed:>12,.0f} | {queries / allocations:>16.2f}")
+
+            reset_database()
+            fill_sequential(args.length, occupied, key)
+            elapsed, _ = run_allocator(args.length, allocations)
+            print(f"{occupancy:>9.0%} | {'secuencia permutada':<22} | {allocations / elapsed:>12,.0f} | {'~2 por bloque':>16}")
+
+if __name__ == "__main__":
+    main()
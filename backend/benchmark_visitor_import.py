@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la importación masiva de visitantes
+
+Compara la importación por lotes (services.import_service) con el alta fila a
+fila que hacía POST /api/v1/visitors/register: búsqueda del email, código
+generado por visitante y un commit por fila. Usa una base de datos SQLite en
+un archivo temporal, con los índices y triggers del modelo Visitor.
+
+Uso:
+    python benchmark_visitor_import.py [--rows 100000] [--legacy-rows 2000] [--batch-size 5000]
+"""
+import argparse
+import io
+import os
+import tempfile
+import time
+from flask import Flask
+
+from cache import cache
+from models.database import db
+from models.visitor import Visitor
+from services.import_service import VisitorImportService
+
+def create_benchmark_app(path):
+    """Crear una aplicación mínima con una base de datos SQLite vacía"""
+    app = Flask(__name__)
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI=f'sqlite:///{path}',
+        SECRET_KEY='benchmark-secret-key',
+        CACHE_TYPE='SimpleCache',
+        REGISTRATION_CODE_BLOCK_SIZE=64
+    )
+    db.init_app(app)
+    cache.init_app(app)
+    with app.app_context():
+        db.create_all()
+    return app
+
+FIRST_NAMES = ['Ana', 'José', 'María', 'Luis', 'Carmen', 'Pedro', 'Lucía', 'Miguel']
+LAST_NAMES = ['Pérez', 'Gómez', 'Núñez', 'Rodríguez', 'Martínez', 'Santana', 'Peña']
+
+def build_csv(rows, prefix):
+    """CSV en memoria con un 1% de filas inválidas y un 1% de emails repetidos"""
+    lines = ['nombre,correo,teléfono,empresa,ciudad']
+    for i in range(rows):
+        email = f'{prefix}{i}@example.com'
+        if i % 100 == 1:
+            email = 'no-es-un-email'
+        elif i % 100 == 2:
+            email = f'{prefix}{i - 2}@example.com'
+        name = f'{FIRST_NAMES[i % len(FIRST_NAMES)]} {LAST_NAMES[i % len(LAST_NAMES)]}'
+        lines.append(f'{name},{email},809-555-{i % 10000:04d},Institución {i % 50},Santo Domingo')
+    return io.BytesIO('\n'.join(lines).encode('utf-8'))
+
+def run_bulk(app, rows, batch_size):
+    """Filas por segundo de la importación por lotes"""
+    stream = build_csv(rows, 'bulk')
+    with app.app_context():
+        start = time.perf_counter()
+        report = VisitorImportService.import_visitors(
+            VisitorImportService.read_rows(stream, 'csv'), batch_size=batch_size
+        )
+        elapsed = time.perf_counter() - start
+    return rows / elapsed, report
+
+def run_legacy(app, rows):
+    """Filas por segundo del alta fila a fila"""
+    stream = build_csv(rows, 'legacy')
+    with app.app_context():
+        start = time.perf_counter()
+        for row in VisitorImportService.read_rows(stream, 'csv'):
+            if Visitor.query.filter_by(email=row['email']).first():
+                continue
+            db.session.add(Visitor(name=row['name'], email=row['email'], phone=row['phone'],
+                                   company=row['company'], city=row['city']))
+            db.session.commit()
+        elapsed = time.perf_counter() - start
+    return rows / elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100000, help='Filas de la importación por lotes (por defecto: 100000)')
+    parser.add_argument('--legacy-rows', type=int, default=2000, help='Filas del alta fila a fila (por defecto: 2000)')
+    parser.add_argument('--batch-size', type=int, default=5000, help='Filas por lote (por defecto: 5000)')
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    try:
+        app = create_benchmark_app(path)
+
+        legacy = run_legacy(app, args.legacy_rows)
+        bulk, report = run_bulk(app, args.rows, args.batch_size)
+
+        print(f"{'Variante':<32} | {'Filas':>8} | {'filas/s':>10}")
+        print('-' * 56)
+        print(f"{'fila a fila (commit por fila)':<32} | {args.legacy_rows:>8} | {legacy:>10.0f}")
+        print(f"{'importación por lotes':<32} | {args.rows:>8} | {bulk:>10.0f}")
+        print(f"\nImportadas: {report['imported']}, con errores: {report['failed']}, ya registradas: {report['skipped']}")
+    finally:
+        os.remove(path)
+
+if __name__ == "__main__":
+    main()
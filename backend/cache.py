@@ -1,14 +1,197 @@
 """
 Configuración y utilidades para el sistema de caché
+
+Las vistas decoradas con `cached` usan dos niveles: una LRU en memoria por
+worker con TTL corto (local_cache) delante del backend compartido (Redis en
+producción). Ambos guardan el cuerpo de la respuesta ya serializado. Las
+invalidaciones por etiqueta se difunden a los demás workers por Redis pub/sub
+(o dentro del mismo proceso cuando el backend es local).
 """
+from collections import OrderedDict
 from flask_caching import Cache
 from functools import wraps
+import fnmatch
+import hashlib
 import json
+import os
+import threading
+import time
 from flask import request, current_app
 
 # Instancia global de caché
 cache = Cache()
 
+class LocalResponseCache:
+    """
+    LRU acotada en memoria (por worker) para respuestas ya serializadas
+    
+    Un acierto no consulta el backend compartido ni deserializa nada. Las
+    entradas con etiquetas se descartan al recibir su invalidación; el TTL
+    corto acota lo que puede durar una entrada si se pierde un mensaje.
+    """
+    
+    def __init__(self, max_size=1024, ttl=5):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()  # clave -> (expira, etiquetas, valor)
+        self._lock = threading.Lock()
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, key):
+        """
+        Obtiene una entrada vigente y la marca como usada recientemente
+        
+        Args:
+            key (str): Clave de la vista (sin generaciones)
+            
+        Returns:
+            object: Valor guardado o None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+    
+    def set(self, key, value, tags=(), version=None):
+        """
+        Guarda una entrada, desalojando la menos usada si se supera max_size
+        
+        Args:
+            key (str): Clave de la vista
+            value (object): Valor a guardar
+            tags (iterable): Etiquetas de invalidación de la entrada
+            version (int): Valor de `version` leído antes de calcular; si hubo
+                una invalidación desde entonces, la entrada no se guarda
+        """
+        if not self.max_size or not self.ttl:
+            return
+        with self._lock:
+            if version is not None and version != self.version:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, frozenset(tags), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+    
+    def invalidate(self, tags):
+        """
+        Descarta las entradas con alguna de las etiquetas
+        
+        Args:
+            tags (iterable): Etiquetas invalidadas (None = todas las entradas)
+        """
+        with self._lock:
+            self.version += 1
+            if tags is None:
+                self._entries.clear()
+                return
+            tags = set(tags)
+            for key in [key for key, entry in self._entries.items() if entry[1] & tags]:
+                del self._entries[key]
+    
+    def __len__(self):
+        return len(self._entries)
+
+class InvalidationBus:
+    """
+    Difusión de invalidaciones de etiquetas a los workers
+    
+    Esta implementación entrega los mensajes dentro del mismo proceso y se usa
+    cuando el backend es local (SimpleCache), donde cada worker tiene su propia
+    caché. Con Redis se usa RedisInvalidationBus.
+    """
+    
+    def __init__(self):
+        self._handlers = []
+    
+    def subscribe(self, handler):
+        """Registra una función que recibe las etiquetas invalidadas"""
+        if handler not in self._handlers:
+            self._handlers.append(handler)
+    
+    def publish(self, tags):
+        """Publica una invalidación"""
+        self._dispatch(tags)
+    
+    def start(self):
+        """Inicia la escucha de mensajes (nada que hacer en el mismo proceso)"""
+    
+    def _dispatch(self, tags):
+        for handler in self._handlers:
+            handler(tags)
+
+class RedisInvalidationBus(InvalidationBus):
+    """
+    Difusión de invalidaciones entre workers con Redis pub/sub
+    
+    Cada proceso escucha el canal en un hilo propio que se inicia con el primer
+    uso (después del fork de gunicorn/celery). Si la conexión se pierde, al
+    volver a suscribirse se vacía la caché local porque pudieron perderse
+    mensajes.
+    """
+    
+    def __init__(self, client, channel):
+        super().__init__()
+        self.client = client
+        self.channel = channel
+        self._pid = None
+        self._lock = threading.Lock()
+    
+    def publish(self, tags):
+        """Aplica la invalidación en este worker y la publica a los demás"""
+        self._dispatch(tags)
+        self.client.publish(self.channel, json.dumps(sorted(tags)))
+    
+    def start(self):
+        """Inicia el hilo de escucha una vez por proceso"""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            threading.Thread(target=self._listen, name='cache-invalidation', daemon=True).start()
+    
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                self._dispatch(None)
+                for message in pubsub.listen():
+                    if message.get('type') == 'message':
+                        self._dispatch(json.loads(message['data']))
+            except Exception:
+                time.sleep(1)
+
+# Primer nivel de caché (uno por worker) y canal de invalidaciones
+local_cache = LocalResponseCache()
+invalidation_bus = InvalidationBus()
+
+def get_redis_client(app):
+    """
+    Crea un cliente Redis propio para pub/sub a partir de CACHE_REDIS_URL
+    
+    Args:
+        app: Aplicación Flask
+        
+    Returns:
+        redis.Redis: Cliente, o None si la caché no usa Redis
+    """
+    url = app.config.get('CACHE_REDIS_URL')
+    if not url or 'redis' not in str(app.config.get('CACHE_TYPE', '')).lower():
+        return None
+    import redis
+    return redis.Redis.from_url(url)
+
 def init_cache(app):
     """
     Inicializa el sistema de caché con la aplicación Flask
@@ -16,17 +199,68 @@ def init_cache(app):
     Args:
         app: Aplicación Flask
     """
+    from models.permission import permission_registry
+    from services.cache_invalidation import listen_cache_invalidation
+    from services.user_state_cache import user_state_cache
+    global invalidation_bus
+    
+    # Sin configuración explícita, Flask-Caching usaría NullCache
+    app.config.setdefault('CACHE_TYPE', 'SimpleCache')
     cache.init_app(app)
+    listen_cache_invalidation()
+    
+    local_cache.max_size = app.config.get('LOCAL_CACHE_SIZE', local_cache.max_size)
+    local_cache.ttl = app.config.get('LOCAL_CACHE_TTL', local_cache.ttl)
+    user_state_cache.ttl = app.config.get('AUTHZ_USER_CACHE_TTL', user_state_cache.ttl)
+    permission_registry.ttl = app.config.get('PERMISSION_REGISTRY_TTL', permission_registry.ttl)
+    
+    # Con Redis las invalidaciones llegan a todos los workers por pub/sub
+    client = get_redis_client(app)
+    if client is not None:
+        invalidation_bus = RedisInvalidationBus(
+            client,
+            app.config.get('CACHE_INVALIDATION_CHANNEL', 'cache-invalidation')
+        )
+    else:
+        invalidation_bus = InvalidationBus()
+    invalidation_bus.subscribe(local_cache.invalidate)
+    invalidation_bus.subscribe(user_state_cache.invalidate)
+    invalidation_bus.subscribe(permission_registry.invalidate)
+    
+    # Todos los consumidores (local_cache, user_state_cache, permission_registry,
+    # registration_code_index) dependen de la escucha, no solo las vistas
+    # cacheadas. start() es idempotente por proceso: el before_request la
+    # inicia también en los workers creados por fork después de init_cache
+    invalidation_bus.start()
+    app.before_request(start_invalidation_bus)
     return cache
 
-def cached(timeout=300, key_prefix='view/%s', unless=None):
+def start_invalidation_bus():
+    """Inicia la escucha de invalidaciones en el proceso actual si aún no lo hizo"""
+    invalidation_bus.start()
+
+def cached(timeout=300, key_prefix='view/%s', unless=None, tags=None):
     """
     Decorador para cachear respuestas de vistas
     
+    Con `tags`, la clave incluye la generación actual de cada etiqueta (ver
+    invalidate_tags), así que las entradas pueden tener un TTL largo: al
+    invalidar una etiqueta las vistas pasan a usar claves nuevas. Las
+    etiquetas pueden usar los argumentos de la vista, p. ej. 'event:{event_id}'.
+    Solo se cachean respuestas 200 que no sean streaming.
+    
+    Antes del backend se consulta local_cache, que guarda la misma respuesta
+    durante LOCAL_CACHE_TTL segundos sin ir a Redis.
+    
+    Las vistas con etiquetas responden con un ETag derivado de las generaciones
+    (ver view_etag). Si el cliente envía un If-None-Match que coincide, se
+    responde 304 antes de ejecutar la vista o leer el cuerpo cacheado.
+    
     Args:
-        timeout (int): Tiempo de expiración en segundos
+        timeout (int): Tiempo de expiración en segundos (None = VIEW_CACHE_TIMEOUT)
         key_prefix (str): Prefijo para la clave de caché
         unless (callable): Función que devuelve True si no se debe cachear
+        tags (list): Etiquetas de invalidación de la vista
         
     Returns:
         decorator: Decorador para cachear respuestas
@@ -45,55 +279,151 @@ def cached(timeout=300, key_prefix='view/%s', unless=None):
             if request.args:
                 cache_key += '?' + '&'.join([f"{k}={v}" for k, v in sorted(request.args.items()) if k != 'no_cache'])
             
-            # Verificar si hay resultado en caché
-            rv = cache.get(cache_key)
+            view_timeout = timeout if timeout is not None else current_app.config.get('VIEW_CACHE_TIMEOUT', 300)
+            
+            # Primer nivel: memoria del worker
+            view_tags = [tag.format(**kwargs) for tag in tags or []]
+            rv = local_cache.get(cache_key)
             if rv is not None:
-                # Deserializar si es necesario
-                if isinstance(rv, str):
-                    try:
-                        rv = json.loads(rv)
-                    except:
-                        pass
-                return rv
+                return _cached_response(rv)
+            local_version = local_cache.version
+            
+            try:
+                # Las generaciones se leen antes de ejecutar la vista: si se invalida
+                # mientras se calcula, el resultado queda bajo la generación anterior
+                shared_key = tagged_key(cache_key, view_tags)
+                etag = view_etag(shared_key, view_timeout) if view_tags else None
+                if etag and request.if_none_match.contains_weak(etag):
+                    return _not_modified(etag)
+                rv = cache.get(shared_key)
+            except Exception as e:
+                current_app.logger.warning(f"Caché no disponible para {request.path}: {str(e)}")
+                return f(*args, **kwargs)
+            
+            # Segundo nivel: backend compartido
+            if rv is not None:
+                local_cache.set(cache_key, rv, view_tags, local_version)
+                return _cached_response(rv)
                 
             # Ejecutar función original
-            rv = f(*args, **kwargs)
+            response = current_app.make_response(f(*args, **kwargs))
             
             # Cachear resultado si es necesario
-            if unless and unless():
-                return rv
-                
-            # Serializar si es necesario
-            cache_value = rv
-            if not isinstance(rv, (str, bytes, int, float, bool)):
-                try:
-                    cache_value = json.dumps(rv)
-                except:
-                    current_app.logger.warning(f"No se pudo serializar respuesta para caché: {rv}")
+            if response.status_code != 200 or response.is_streamed or (unless and unless()):
+                return response
             
-            # Guardar en caché
-            cache.set(cache_key, cache_value, timeout=timeout)
-            return rv
+            # Guardar en ambos niveles el cuerpo ya serializado
+            rv = {'body': response.get_data(), 'mimetype': response.mimetype, 'etag': etag}
+            cache.set(shared_key, rv, timeout=view_timeout)
+            local_cache.set(cache_key, rv, view_tags, local_version)
+            if etag:
+                _set_etag(response, etag)
+            return response
             
         return decorated_function
     return decorator
 
+def view_etag(shared_key, window):
+    """
+    Calcula el ETag de una vista a partir de su clave con generaciones
+    
+    La clave ya cambia con cada invalidación de sus etiquetas. Se añade la
+    ventana de tiempo actual (de `window` segundos) porque algunas respuestas
+    dependen de la hora (is_ongoing, eventos terminados), igual que el TTL
+    del cuerpo cacheado.
+    
+    Args:
+        shared_key (str): Clave de tagged_key
+        window (int): Segundos de validez del ETag
+        
+    Returns:
+        str: Valor del ETag (débil)
+    """
+    bucket = int(time.time() // window) if window else 0
+    return hashlib.sha1(f"{shared_key}|{bucket}".encode()).hexdigest()[:20]
+
+def _set_etag(response, etag):
+    response.set_etag(etag, weak=True)
+    # Los clientes deben revalidar siempre; el 304 no cuesta consultas
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def _not_modified(etag):
+    return _set_etag(current_app.response_class(status=304), etag)
+
+def _cached_response(rv):
+    """Respuesta desde un valor cacheado (304 si el cliente ya la tiene)"""
+    etag = rv.get('etag')
+    if etag and request.if_none_match.contains_weak(etag):
+        return _not_modified(etag)
+    response = current_app.response_class(rv['body'], mimetype=rv['mimetype'])
+    return _set_etag(response, etag) if etag else response
+
+def tagged_key(key, tags):
+    """
+    Agrega a una clave la generación actual de cada etiqueta
+    
+    Args:
+        key (str): Clave base
+        tags (list): Etiquetas de invalidación
+        
+    Returns:
+        str: Clave con las generaciones, p. ej. 'view/x#events:3,event:7:1'
+    """
+    if not tags:
+        return key
+    generations = get_generations(tags)
+    return key + '#' + ','.join(f"{tag}:{generation}" for tag, generation in zip(tags, generations))
+
+def invalidate_tags(*tags):
+    """
+    Invalida todas las entradas cacheadas con alguna de las etiquetas
+    
+    Solo incrementa un contador por etiqueta (O(1) en SimpleCache y Redis);
+    las entradas antiguas dejan de leerse y expiran por su TTL. Las copias en
+    local_cache de cada worker se descartan con invalidation_bus.
+    
+    Args:
+        *tags (str): Etiquetas, p. ej. 'events', 'event:7', 'visitors', 'dashboard'
+    """
+    tags = set(tags)
+    for tag in tags:
+        bump_generation(tag)
+    try:
+        invalidation_bus.publish(tags)
+    except Exception as e:
+        # Sin pub/sub las copias locales expiran por LOCAL_CACHE_TTL
+        current_app.logger.warning(f"No se pudo difundir la invalidación de caché: {str(e)}")
+
 def cache_clear_pattern(pattern):
     """
     Limpia todas las entradas de caché que coincidan con un patrón
     
+    Recorre las claves del backend (SCAN en Redis), así que su coste crece con
+    el tamaño de la caché. Para invalidar vistas usar invalidate_tags.
+    
     Args:
-        pattern (str): Patrón para coincidencia de claves
+        pattern (str): Patrón glob para coincidencia de claves
         
     Returns:
         int: Número de entradas eliminadas
     """
-    # Este método depende del backend de caché
-    if hasattr(cache, 'delete_memoized'):
-        cache.delete_memoized(pattern)
-        return 1
-    # Para SimpleCache, no hay forma de eliminar por patrón
-    return 0
+    backend = cache.cache
+    if hasattr(backend, '_read_client'):
+        # Redis: las claves llevan el prefijo del backend
+        prefix = backend.key_prefix or ''
+        keys = [
+            key.decode()[len(prefix):] if isinstance(key, bytes) else key[len(prefix):]
+            for key in backend._read_client.scan_iter(match=prefix + pattern)
+        ]
+    elif hasattr(backend, '_cache'):
+        keys = [key for key in list(backend._cache) if fnmatch.fnmatchcase(key, pattern)]
+    else:
+        return 0
+    
+    if keys:
+        cache.delete_many(*keys)
+    return len(keys)
 
 def cache_event_data(event_id, timeout=300):
     """
@@ -109,7 +439,7 @@ def cache_event_data(event_id, timeout=300):
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            cache_key = f"event_data/{event_id}"
+            cache_key = tagged_key(f"event_data/{event_id}", [f"event:{event_id}"])
             rv = cache.get(cache_key)
             if rv is not None:
                 return rv
@@ -133,8 +463,8 @@ def invalidate_event_cache(event_id):
     """
     try:
         cache.delete(f"event_data/{event_id}")
-        # También intentar invalidar patrones relacionados
-        cache_clear_pattern(f"view/*/events/{event_id}*")
+        # Vistas del evento y listados de eventos
+        invalidate_tags(f"event:{event_id}", 'events')
         return True
     except Exception as e:
         current_app.logger.error(f"Error al invalidar caché del evento {event_id}: {str(e)}")
@@ -152,7 +482,7 @@ def get_active_events_cached(timeout=300):
     """
     from models.event import Event
     
-    cache_key = "active_events"
+    cache_key = tagged_key("active_events", ['events', 'event-stats'])
     events = cache.get(cache_key)
     
     if events is not None:
@@ -173,4 +503,58 @@ def get_active_events_cached(timeout=300):
         # Guardar en caché
         cache.set(cache_key, json.dumps(events), timeout=timeout)
     
-    return events 
\ No newline at end of file
+    return events
+
+# ========================
+# GENERACIONES DE ETIQUETAS
+# ========================
+
+def get_generations(names):
+    """
+    Obtiene la generación actual de varios conjuntos de datos en una sola lectura
+    
+    Una generación que no existe (nueva, expirada o desalojada) se inicializa
+    con una semilla única basada en el reloj, de modo que nunca repite un valor
+    anterior y no vuelve a validar entradas viejas.
+    
+    Args:
+        names (list): Nombres de los conjuntos (etiquetas)
+        
+    Returns:
+        list: Generaciones en el mismo orden
+    """
+    keys = [f"generation/{name}" for name in names]
+    generations = list(cache.get_many(*keys))
+    for index, generation in enumerate(generations):
+        if generation is None:
+            cache.add(keys[index], time.time_ns(), timeout=0)
+            generations[index] = cache.get(keys[index]) or 0
+    return generations
+
+def get_generation(name):
+    """
+    Obtiene la generación actual de un conjunto de datos cacheados
+    
+    Args:
+        name (str): Nombre del conjunto (por ejemplo, 'dashboard')
+        
+    Returns:
+        int: Generación actual
+    """
+    return get_generations([name])[0]
+
+def bump_generation(name):
+    """
+    Incrementa la generación de un conjunto de datos, invalidando sus entradas
+    
+    Args:
+        name (str): Nombre del conjunto
+        
+    Returns:
+        int: Nueva generación
+    """
+    # Asegurar la semilla para que inc no reinicie la generación en 1
+    get_generation(name)
+    # inc (del backend) es atómico en Redis
+    return cache.cache.inc(f"generation/{name}") or 0
+
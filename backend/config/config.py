@@ -2,12 +2,42 @@
 Configuración centralizada para la aplicación
 """
 import os
+import warnings
 from datetime import timedelta
 from dotenv import load_dotenv
 
 # Cargar variables de entorno desde archivo .env
 load_dotenv()
 
+# Nombres anteriores de las variables de correo (antes de unificarlas en MAIL_*)
+LEGACY_MAIL_VARIABLES = {
+    'MAIL_SERVER': 'SMTP_SERVER',
+    'MAIL_PORT': 'SMTP_PORT',
+    'MAIL_USERNAME': 'SMTP_USERNAME',
+    'MAIL_PASSWORD': 'SMTP_PASSWORD',
+    'MAIL_USE_TLS': 'SMTP_USE_TLS',
+    'MAIL_POOL_SIZE': 'SMTP_POOL_SIZE',
+    'MAIL_DEFAULT_SENDER': 'EMAIL_FROM',
+    'MAIL_SENDER_NAME': 'EMAIL_FROM_NAME',
+}
+
+def mail_env(name, default=None):
+    """
+    Lee una variable de correo MAIL_*, o su nombre anterior si solo está ese
+    
+    Args:
+        name (str): Nombre de la variable MAIL_*
+        default: Valor si no está definida con ninguno de los dos nombres
+        
+    Returns:
+        str: Valor de la variable
+    """
+    legacy = LEGACY_MAIL_VARIABLES.get(name)
+    if legacy and name not in os.environ and legacy in os.environ:
+        warnings.warn(f"La variable {legacy} está obsoleta; renómbrala a {name}")
+        return os.environ[legacy]
+    return os.environ.get(name, default)
+
 class Config:
     """Configuración base"""
     # Configuración general
@@ -23,6 +53,14 @@ class Config:
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY', SECRET_KEY)
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)
     JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=30)
+    AUTHZ_USER_CACHE_TTL = int(os.environ.get('AUTHZ_USER_CACHE_TTL', 30))  # Segundos que un worker confía en el rol/estado de un usuario
+    PERMISSION_REGISTRY_TTL = int(os.environ.get('PERMISSION_REGISTRY_TTL', 300))  # Segundos entre recargas de los permisos por rol
+    JWT_PERMISSIONS_BITMASK = os.environ.get('JWT_PERMISSIONS_BITMASK', 'False').lower() == 'true'  # Permisos en el token como máscara de bits
+    AUDIT_LOG_BATCH_SIZE = int(os.environ.get('AUDIT_LOG_BATCH_SIZE', 200))  # Registros de auditoría por INSERT
+    AUDIT_LOG_FLUSH_INTERVAL = float(os.environ.get('AUDIT_LOG_FLUSH_INTERVAL', 1.0))  # Segundos máximos en la cola antes de insertarse
+    AUDIT_LOG_QUEUE_SIZE = int(os.environ.get('AUDIT_LOG_QUEUE_SIZE', 10000))  # Registros pendientes por worker (llena = se descartan)
+    AUDIT_LOG_RETENTION_MONTHS = int(os.environ.get('AUDIT_LOG_RETENTION_MONTHS', 12))  # Meses completos de auditoría que se conservan
+    AUDIT_LOG_PARTITIONS_AHEAD = int(os.environ.get('AUDIT_LOG_PARTITIONS_AHEAD', 2))  # Particiones mensuales creadas por adelantado (PostgreSQL)
     
     # Configuración de seguridad
     FORCE_HTTPS = os.environ.get('FORCE_HTTPS', 'False').lower() == 'true'
@@ -39,19 +77,51 @@ class Config:
     CACHE_TYPE = os.environ.get('CACHE_TYPE', 'SimpleCache')
     CACHE_REDIS_URL = os.environ.get('REDIS_URL', None)
     CACHE_DEFAULT_TIMEOUT = int(os.environ.get('CACHE_TIMEOUT', 300))  # 5 minutos por defecto
+    VIEW_CACHE_TIMEOUT = int(os.environ.get('VIEW_CACHE_TIMEOUT', 600))  # Vistas con etiquetas de invalidación (cache.cached)
+    LOCAL_CACHE_SIZE = int(os.environ.get('LOCAL_CACHE_SIZE', 1024))  # Respuestas en la LRU de cada worker (0 = desactivada)
+    LOCAL_CACHE_TTL = float(os.environ.get('LOCAL_CACHE_TTL', 5))  # Segundos en la LRU de cada worker
+    CACHE_INVALIDATION_CHANNEL = os.environ.get('CACHE_INVALIDATION_CHANNEL', 'cache-invalidation')  # Canal pub/sub de Redis
+    CHECKIN_STREAM_HEARTBEAT = int(os.environ.get('CHECKIN_STREAM_HEARTBEAT', 15))  # Segundos entre pings del stream SSE
+    CHECKIN_STREAM_QUEUE_SIZE = int(os.environ.get('CHECKIN_STREAM_QUEUE_SIZE', 100))  # Mensajes pendientes por cliente SSE
+    CHECKIN_STREAM_CHANNEL = os.environ.get('CHECKIN_STREAM_CHANNEL', 'checkin-stream')  # Canal pub/sub de Redis
     
     # Configuración de Celery
     CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', os.environ.get('REDIS_URL', 'redis://localhost:6379/0'))
     CELERY_RESULT_BACKEND = os.environ.get('CELERY_RESULT_BACKEND', os.environ.get('REDIS_URL', 'redis://localhost:6379/0'))
+    CELERY_TASK_ALWAYS_EAGER = os.environ.get('CELERY_TASK_ALWAYS_EAGER', 'False').lower() == 'true'
+    
+    # Exportaciones en segundo plano (tasks.export_event_excel)
+    EXPORTS_FOLDER = os.environ.get('EXPORTS_FOLDER', None)  # Carpeta compartida con los workers (por defecto /tmp)
+    EXPORT_JOB_RETENTION_HOURS = int(os.environ.get('EXPORT_JOB_RETENTION_HOURS', 24))
+    
+    # Envío masivo de invitaciones (tasks.send_bulk_invitations)
+    INVITATION_BATCH_SIZE = int(os.environ.get('INVITATION_BATCH_SIZE', 50))  # Mensajes por conexión SMTP
+    INVITATION_RATE_LIMIT = float(os.environ.get('INVITATION_RATE_LIMIT', 10))  # Mensajes por segundo (0 = sin límite)
+    
+    # Importación masiva de visitantes (services.import_service)
+    VISITOR_IMPORT_BATCH_SIZE = int(os.environ.get('VISITOR_IMPORT_BATCH_SIZE', 5000))  # Filas validadas e insertadas por transacción
+    VISITOR_IMPORT_MAX_ERRORS = int(os.environ.get('VISITOR_IMPORT_MAX_ERRORS', 1000))  # Errores por fila incluidos en el resultado
     
     # Configuración de correo electrónico
-    MAIL_SERVER = os.environ.get('MAIL_SERVER', 'localhost')
-    MAIL_PORT = int(os.environ.get('MAIL_PORT', 25))
-    MAIL_USE_TLS = os.environ.get('MAIL_USE_TLS', 'False').lower() == 'true'
+    # Las SMTP_* y EMAIL_FROM* anteriores se aceptan como respaldo (ver mail_env)
+    MAIL_SERVER = mail_env('MAIL_SERVER', 'localhost')
+    MAIL_PORT = int(mail_env('MAIL_PORT', 25))
+    MAIL_USE_TLS = mail_env('MAIL_USE_TLS', 'False').lower() == 'true'
     MAIL_USE_SSL = os.environ.get('MAIL_USE_SSL', 'False').lower() == 'true'
-    MAIL_USERNAME = os.environ.get('MAIL_USERNAME', None)
-    MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD', None)
-    MAIL_DEFAULT_SENDER = os.environ.get('MAIL_DEFAULT_SENDER', 'noreply@example.com')
+    MAIL_USERNAME = mail_env('MAIL_USERNAME', None)
+    MAIL_PASSWORD = mail_env('MAIL_PASSWORD', None)
+    MAIL_DEFAULT_SENDER = mail_env('MAIL_DEFAULT_SENDER', 'noreply@example.com')
+    MAIL_SENDER_NAME = mail_env('MAIL_SENDER_NAME', 'Centro Cultural Banreservas')  # Nombre del remitente de las invitaciones
+    MAIL_POOL_SIZE = int(mail_env('MAIL_POOL_SIZE', 2))  # Conexiones SMTP por proceso (services.email_service.get_smtp_pool)
+    MAIL_BATCH_SIZE = int(os.environ.get('MAIL_BATCH_SIZE', 200))  # Correos por tarea send_email_batch
+    MAIL_CONNECTION_BATCH_SIZE = int(os.environ.get('MAIL_CONNECTION_BATCH_SIZE', 50))  # Correos por conexión antes de devolverla
+    MAIL_RATE_LIMIT = float(os.environ.get('MAIL_RATE_LIMIT', 0))  # Mensajes por segundo por proceso (0 = sin límite)
+    REMINDER_BATCH_SIZE = int(os.environ.get('REMINDER_BATCH_SIZE', 500))  # Recordatorios por tarea send_email_batch
+    
+    # Códigos de registro (utils.registration_codes)
+    REGISTRATION_CODE_KEY = os.environ.get('REGISTRATION_CODE_KEY', None)  # Usa SECRET_KEY si no se define
+    REGISTRATION_CODE_BLOCK_SIZE = int(os.environ.get('REGISTRATION_CODE_BLOCK_SIZE', 64))
+    REGISTRATION_CODE_CACHE_SIZE = int(os.environ.get('REGISTRATION_CODE_CACHE_SIZE', 200000))  # Códigos en memoria por worker
     
     # Configuración de Sentry para monitoreo de errores
     SENTRY_DSN = os.environ.get('SENTRY_DSN', None)
@@ -115,7 +185,7 @@ class ProductionConfig(Config):
     CACHE_REDIS_URL = os.environ.get('REDIS_URL')
     
     # Validar configuración de correo en producción
-    if not all([os.environ.get('MAIL_SERVER'), os.environ.get('MAIL_USERNAME'), os.environ.get('MAIL_PASSWORD')]):
+    if not all([mail_env('MAIL_SERVER'), mail_env('MAIL_USERNAME'), mail_env('MAIL_PASSWORD')]):
         raise ValueError("Configuración de correo incompleta. MAIL_SERVER, MAIL_USERNAME y MAIL_PASSWORD son obligatorias en producción.")
 
 # Mapear configuraciones a nombres de entorno
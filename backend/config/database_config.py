@@ -2,11 +2,59 @@
 Configuración de base de datos para diferentes ambientes
 """
 import os
+from config.config import mail_env
 
 class Config:
     """Configuración base"""
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SECRET_KEY = os.environ.get('SECRET_KEY', 'dev-secret-key')
+    
+    # Caché compartida entre workers si hay Redis disponible
+    CACHE_TYPE = os.environ.get('CACHE_TYPE') or ('RedisCache' if os.environ.get('REDIS_URL') else 'SimpleCache')
+    CACHE_REDIS_URL = os.environ.get('REDIS_URL')
+    DASHBOARD_CACHE_TIMEOUT = int(os.environ.get('DASHBOARD_CACHE_TIMEOUT', 60))
+    DASHBOARD_CACHE_STALE_TIMEOUT = int(os.environ.get('DASHBOARD_CACHE_STALE_TIMEOUT', 600))
+    VIEW_CACHE_TIMEOUT = int(os.environ.get('VIEW_CACHE_TIMEOUT', 600))
+    LOCAL_CACHE_SIZE = int(os.environ.get('LOCAL_CACHE_SIZE', 1024))
+    LOCAL_CACHE_TTL = float(os.environ.get('LOCAL_CACHE_TTL', 5))
+    CACHE_INVALIDATION_CHANNEL = os.environ.get('CACHE_INVALIDATION_CHANNEL', 'cache-invalidation')
+    CHECKIN_STREAM_HEARTBEAT = int(os.environ.get('CHECKIN_STREAM_HEARTBEAT', 15))
+    CHECKIN_STREAM_QUEUE_SIZE = int(os.environ.get('CHECKIN_STREAM_QUEUE_SIZE', 100))
+    CHECKIN_STREAM_CHANNEL = os.environ.get('CHECKIN_STREAM_CHANNEL', 'checkin-stream')
+    AUTHZ_USER_CACHE_TTL = int(os.environ.get('AUTHZ_USER_CACHE_TTL', 30))
+    PERMISSION_REGISTRY_TTL = int(os.environ.get('PERMISSION_REGISTRY_TTL', 300))
+    JWT_PERMISSIONS_BITMASK = os.environ.get('JWT_PERMISSIONS_BITMASK', 'False').lower() == 'true'
+    AUDIT_LOG_BATCH_SIZE = int(os.environ.get('AUDIT_LOG_BATCH_SIZE', 200))
+    AUDIT_LOG_FLUSH_INTERVAL = float(os.environ.get('AUDIT_LOG_FLUSH_INTERVAL', 1.0))
+    AUDIT_LOG_QUEUE_SIZE = int(os.environ.get('AUDIT_LOG_QUEUE_SIZE', 10000))
+    AUDIT_LOG_RETENTION_MONTHS = int(os.environ.get('AUDIT_LOG_RETENTION_MONTHS', 12))
+    AUDIT_LOG_PARTITIONS_AHEAD = int(os.environ.get('AUDIT_LOG_PARTITIONS_AHEAD', 2))
+    
+    # Celery y exportaciones en segundo plano
+    CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL') or os.environ.get('REDIS_URL')
+    CELERY_RESULT_BACKEND = os.environ.get('CELERY_RESULT_BACKEND') or os.environ.get('REDIS_URL')
+    CELERY_TASK_ALWAYS_EAGER = os.environ.get('CELERY_TASK_ALWAYS_EAGER', 'False').lower() == 'true'
+    EXPORTS_FOLDER = os.environ.get('EXPORTS_FOLDER')  # Carpeta compartida con los workers (por defecto /tmp)
+    EXPORT_JOB_RETENTION_HOURS = int(os.environ.get('EXPORT_JOB_RETENTION_HOURS', 24))
+    INVITATION_BATCH_SIZE = int(os.environ.get('INVITATION_BATCH_SIZE', 50))  # Mensajes por conexión SMTP
+    INVITATION_RATE_LIMIT = float(os.environ.get('INVITATION_RATE_LIMIT', 10))  # Mensajes por segundo (0 = sin límite)
+    VISITOR_IMPORT_BATCH_SIZE = int(os.environ.get('VISITOR_IMPORT_BATCH_SIZE', 5000))
+    VISITOR_IMPORT_MAX_ERRORS = int(os.environ.get('VISITOR_IMPORT_MAX_ERRORS', 1000))
+    
+    # Correo (un pool de conexiones SMTP por proceso)
+    MAIL_SERVER = mail_env('MAIL_SERVER')
+    MAIL_PORT = int(mail_env('MAIL_PORT', 25))
+    MAIL_USE_TLS = mail_env('MAIL_USE_TLS', 'False').lower() == 'true'
+    MAIL_USE_SSL = os.environ.get('MAIL_USE_SSL', 'False').lower() == 'true'
+    MAIL_USERNAME = mail_env('MAIL_USERNAME')
+    MAIL_PASSWORD = mail_env('MAIL_PASSWORD')
+    MAIL_DEFAULT_SENDER = mail_env('MAIL_DEFAULT_SENDER', 'noreply@example.com')
+    MAIL_SENDER_NAME = mail_env('MAIL_SENDER_NAME', 'Centro Cultural Banreservas')
+    MAIL_POOL_SIZE = int(mail_env('MAIL_POOL_SIZE', 2))
+    MAIL_BATCH_SIZE = int(os.environ.get('MAIL_BATCH_SIZE', 200))
+    MAIL_CONNECTION_BATCH_SIZE = int(os.environ.get('MAIL_CONNECTION_BATCH_SIZE', 50))
+    MAIL_RATE_LIMIT = float(os.environ.get('MAIL_RATE_LIMIT', 0))
+    REMINDER_BATCH_SIZE = int(os.environ.get('REMINDER_BATCH_SIZE', 500))
 
 class DevelopmentConfig(Config):
     """Configuración para desarrollo"""
@@ -1,14 +1,18 @@
 """
 Configuración de Gunicorn para desarrollo
+
+La imagen Docker la usa también, sin recarga (GUNICORN_RELOAD=0) y con bind
+y número de workers propios en la línea de comandos.
 """
 import multiprocessing
+import os
 
 # Configuración del servidor
 bind = "0.0.0.0:8080"
 workers = 2  # Para desarrollo 2 es suficiente
 
-# Configuración de recarga automática para desarrollo
-reload = True
+# Configuración de recarga automática para desarrollo (GUNICORN_RELOAD=0 en la imagen Docker)
+reload = os.environ.get("GUNICORN_RELOAD", "1") == "1"
 reload_engine = "auto"
 
 # Configuración de logs
@@ -21,5 +25,29 @@ timeout = 120     # 2 minutos
 graceful_timeout = 10
 
 # Configuración de trabajadores
-worker_class = "sync"
-threads = 2
+# gevent: el stream SSE (/api/v1/stream/checkins) mantiene cada conexión abierta
+# y con workers sync bloquearía un worker por cliente
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gevent")
+worker_connections = int(os.environ.get("GUNICORN_WORKER_CONNECTIONS", 1000))
+threads = 2  # Solo aplica a workers gthread
+
+def post_fork(server, worker):
+    """
+    Con workers gevent, psycopg2 espera a PostgreSQL cediendo el control al
+    resto de greenlets; sin este parche una consulta lenta bloquea todas las
+    conexiones del worker, incluidos los streams SSE abiertos
+    """
+    if "gevent" not in server.cfg.worker_class_str:
+        return
+    try:
+        import psycopg2  # noqa: F401
+    except ImportError:
+        return  # SQLite: no hay esperas de red que parchear
+    from psycogreen.gevent import patch_psycopg
+    patch_psycopg()
+    server.log.info("psycopg2 parcheado para gevent (worker %s)", worker.pid)
+
+def worker_exit(server, worker):
+    """Inserta los registros de auditoría pendientes antes de que termine el worker"""
+    from services.audit_service import audit_log_writer
+    audit_log_writer.close()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Importa visitantes en bloque desde un archivo CSV o XLSX
+
+Usa el mismo servicio que POST /api/v1/visitors/import
+(services.import_service) contra la base de datos configurada en la
+aplicación. Los errores por fila se pueden guardar en un CSV para
+corregirlos y volver a importar solo esas filas.
+
+Uso:
+    python import_visitors.py visitantes.csv [--format xlsx] [--batch-size 5000] [--errors errores.csv]
+"""
+import argparse
+import csv
+import sys
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('path', help='Archivo CSV o XLSX con cabecera')
+    parser.add_argument('--format', choices=['csv', 'xlsx'], help='Formato del archivo (por defecto: según la extensión)')
+    parser.add_argument('--batch-size', type=int, help='Filas por transacción (por defecto: VISITOR_IMPORT_BATCH_SIZE)')
+    parser.add_argument('--errors', help='Guardar los errores por fila en este CSV')
+    args = parser.parse_args()
+
+    from app import app
+    from services.import_service import VisitorImportService
+
+    file_format = args.format or args.path.rsplit('.', 1)[-1].lower()
+
+    with app.app_context(), open(args.path, 'rb') as stream:
+        try:
+            rows = VisitorImportService.read_rows(stream, file_format)
+            report = VisitorImportService.import_visitors(rows, batch_size=args.batch_size)
+        except ValueError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+
+    print(f"Filas leídas:      {report['total']}")
+    print(f"Importadas:        {report['imported']}")
+    print(f"Ya registradas:    {report['skipped']}")
+    print(f"Con errores:       {report['failed']}")
+    print(f"Tiempo:            {report['seconds']:.2f} s ({report['rows_per_second']} filas/s)")
+
+    if args.errors and report['errors']:
+        with open(args.errors, 'w', newline='', encoding='utf-8') as output:
+            writer = csv.DictWriter(output, fieldnames=['row', 'field', 'error'])
+            writer.writeheader()
+            writer.writerows(report['errors'])
+        suffix = ' (truncados, ver VISITOR_IMPORT_MAX_ERRORS)' if report['errors_truncated'] else ''
+        print(f"Errores guardados en {args.errors}{suffix}")
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
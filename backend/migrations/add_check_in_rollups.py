@@ -0,0 +1,45 @@
+"""
+Script de migración para crear la tabla check_in_rollups y llenarla con el
+historial de visitor_check_ins
+
+También sirve para reconstruir los agregados completos en cualquier momento.
+Elimina la columna location de versiones anteriores: la ubicación se lee de
+events al consultar.
+"""
+import os
+import sys
+from sqlalchemy import inspect, text
+
+# Añadir el directorio actual al path para importar los modelos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.database import db
+from models.analytics import CheckInRollup
+from services.analytics_service import AnalyticsService
+from app import app
+
+def migrate_database():
+    """Crear la tabla de agregados si no existe y reconstruirla"""
+    with app.app_context():
+        try:
+            inspector = inspect(db.engine)
+            if inspector.has_table(CheckInRollup.__tablename__):
+                print("La tabla check_in_rollups ya existe")
+                columns = {column['name'] for column in inspector.get_columns(CheckInRollup.__tablename__)}
+                if 'location' in columns:
+                    print("Eliminando la columna location...")
+                    with db.engine.begin() as connection:
+                        connection.execute(text("DROP INDEX IF EXISTS ix_check_in_rollups_location"))
+                        connection.execute(text("ALTER TABLE check_in_rollups DROP COLUMN location"))
+            else:
+                print("Creando tabla check_in_rollups...")
+                CheckInRollup.__table__.create(db.engine)
+            
+            buckets = AnalyticsService.rebuild_check_in_rollups()
+            print(f"Agregados reconstruidos: {buckets} buckets")
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error durante la migración: {str(e)}")
+
+if __name__ == "__main__":
+    migrate_database()
@@ -0,0 +1,54 @@
+"""
+Script de migración para añadir los contadores registration_count,
+checked_in_count y check_in_row_count a la tabla events
+
+En bases donde ya existía, la columna check_in_count se renombra a
+check_in_row_count.
+
+También sirve como comando de reconciliación: puede ejecutarse en cualquier
+momento para recalcular los contadores desde event_visitors y visitor_check_ins.
+"""
+import os
+import sys
+from sqlalchemy import inspect, text
+
+# Añadir el directorio actual al path para importar los modelos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.database import db
+from services.event_service import EventService
+from app import app
+
+COUNTER_COLUMNS = ['registration_count', 'checked_in_count', 'check_in_row_count']
+RENAMED_COLUMNS = {'check_in_count': 'check_in_row_count'}
+
+def migrate_database():
+    """Añadir las columnas de contadores si no existen y recalcularlas"""
+    with app.app_context():
+        try:
+            existing = {column['name'] for column in inspect(db.engine).get_columns('events')}
+            
+            for old_name, new_name in RENAMED_COLUMNS.items():
+                if old_name in existing and new_name not in existing:
+                    print(f"Renombrando columna '{old_name}' a '{new_name}'...")
+                    db.session.execute(text(f"ALTER TABLE events RENAME COLUMN {old_name} TO {new_name}"))
+                    existing = (existing - {old_name}) | {new_name}
+            
+            for column in COUNTER_COLUMNS:
+                if column in existing:
+                    print(f"La columna '{column}' ya existe en la tabla events")
+                    continue
+                print(f"Añadiendo columna '{column}' a la tabla events...")
+                db.session.execute(text(
+                    f"ALTER TABLE events ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0"
+                ))
+            db.session.commit()
+            
+            updated = EventService.reconcile_counters()
+            print(f"Contadores recalculados para {updated} eventos")
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error durante la migración: {str(e)}")
+
+if __name__ == "__main__":
+    migrate_database()
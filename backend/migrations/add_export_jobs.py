@@ -0,0 +1,30 @@
+"""
+Script de migración para crear la tabla export_jobs de las exportaciones
+en segundo plano
+"""
+import os
+import sys
+from sqlalchemy import inspect
+
+# Añadir el directorio actual al path para importar los modelos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.database import db
+from models.export_job import ExportJob
+from app import app
+
+def migrate_database():
+    """Crear la tabla de trabajos de exportación si no existe"""
+    with app.app_context():
+        try:
+            if inspect(db.engine).has_table(ExportJob.__tablename__):
+                print("La tabla export_jobs ya existe")
+            else:
+                print("Creando tabla export_jobs...")
+                ExportJob.__table__.create(db.engine)
+                print("Tabla export_jobs creada")
+        except Exception as e:
+            print(f"Error durante la migración: {str(e)}")
+
+if __name__ == "__main__":
+    migrate_database()
@@ -0,0 +1,31 @@
+"""
+Script de migración para crear las tablas invitation_jobs e invitation_results
+de los envíos masivos de invitaciones
+"""
+import os
+import sys
+from sqlalchemy import inspect
+
+# Añadir el directorio actual al path para importar los modelos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.database import db
+from models.invitation_job import InvitationJob, InvitationResult
+from app import app
+
+def migrate_database():
+    """Crear las tablas de envíos de invitaciones si no existen"""
+    with app.app_context():
+        try:
+            inspector = inspect(db.engine)
+            for model in (InvitationJob, InvitationResult):
+                if inspector.has_table(model.__tablename__):
+                    print(f"La tabla {model.__tablename__} ya existe")
+                else:
+                    print(f"Creando tabla {model.__tablename__}...")
+                    model.__table__.create(db.engine)
+        except Exception as e:
+            print(f"Error durante la migración: {str(e)}")
+
+if __name__ == "__main__":
+    migrate_database()
@@ -0,0 +1,36 @@
+"""
+Script de migración para crear la secuencia de códigos de registro
+
+En PostgreSQL crea la secuencia registration_code_seq; en el resto de motores
+crea la tabla registration_code_sequence. Ambas son usadas por
+utils.registration_codes para asignar códigos sin colisiones.
+"""
+import os
+import sys
+from sqlalchemy import inspect
+
+# Añadir el directorio actual al path para importar los modelos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.database import db
+from models.visitor import RegistrationCodeSequence, registration_code_seq
+from app import app
+
+def migrate_database():
+    """Crear la secuencia o la tabla de contador si no existen"""
+    with app.app_context():
+        try:
+            if db.engine.dialect.supports_sequences:
+                print("Creando secuencia 'registration_code_seq' si no existe...")
+                registration_code_seq.create(db.engine, checkfirst=True)
+            elif inspect(db.engine).has_table(RegistrationCodeSequence.__tablename__):
+                print("La tabla registration_code_sequence ya existe")
+            else:
+                print("Creando tabla registration_code_sequence...")
+                RegistrationCodeSequence.__table__.create(db.engine)
+            print("Migración completada")
+        except Exception as e:
+            print(f"Error durante la migración: {str(e)}")
+
+if __name__ == "__main__":
+    migrate_database()
@@ -0,0 +1,38 @@
+"""
+Script de migración para añadir la columna reminder_watermark a la tabla events
+
+La columna guarda el último registro (event_visitors.id) al que ya se le
+programó el recordatorio del evento.
+"""
+import os
+import sys
+from sqlalchemy import inspect, text
+
+# Añadir el directorio actual al path para importar los modelos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.database import db
+from app import app
+
+def migrate_database():
+    """Añadir la columna reminder_watermark si no existe"""
+    with app.app_context():
+        try:
+            existing = {column['name'] for column in inspect(db.engine).get_columns('events')}
+            
+            if 'reminder_watermark' in existing:
+                print("La columna 'reminder_watermark' ya existe en la tabla events")
+                return
+            
+            print("Añadiendo columna 'reminder_watermark' a la tabla events...")
+            db.session.execute(text(
+                "ALTER TABLE events ADD COLUMN reminder_watermark INTEGER NOT NULL DEFAULT 0"
+            ))
+            db.session.commit()
+            print("Migración completada")
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error durante la migración: {str(e)}")
+
+if __name__ == "__main__":
+    migrate_database()
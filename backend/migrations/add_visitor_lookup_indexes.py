@@ -0,0 +1,38 @@
+"""
+Script de migración para añadir los índices usados por la verificación de
+códigos en el kiosco
+
+Crea un índice funcional sobre lower(email), un índice sobre phone y un índice
+compuesto (visitor_id, event_id) en visitor_check_ins. También crea el índice
+(created_at, id) de visitors que usa la paginación del listado de visitantes.
+"""
+import os
+import sys
+from sqlalchemy import inspect
+
+# Añadir el directorio actual al path para importar los modelos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.database import db
+from models.visitor import Visitor, VisitorCheckIn
+from app import app
+
+def migrate_database():
+    """Crear los índices de búsqueda si no existen"""
+    with app.app_context():
+        try:
+            inspector = inspect(db.engine)
+            for model in (Visitor, VisitorCheckIn):
+                existing = {index['name'] for index in inspector.get_indexes(model.__tablename__)}
+                for index in model.__table__.indexes:
+                    if index.name in existing:
+                        print(f"El índice '{index.name}' ya existe")
+                        continue
+                    print(f"Creando índice '{index.name}'...")
+                    index.create(db.engine)
+            print("Migración completada")
+        except Exception as e:
+            print(f"Error durante la migración: {str(e)}")
+
+if __name__ == "__main__":
+    migrate_database()
@@ -0,0 +1,42 @@
+"""
+Script de migración para crear el índice de búsqueda de visitantes
+
+En PostgreSQL habilita pg_trgm y crea índices GIN de trigramas sobre name,
+email, phone y registration_code. En SQLite crea la tabla FTS5 visitors_fts,
+sus triggers de sincronización y la llena con los visitantes existentes.
+"""
+import os
+import sys
+from sqlalchemy import text
+
+# Añadir el directorio actual al path para importar los modelos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.database import db
+from models.visitor import VISITOR_SEARCH_POSTGRESQL_DDL, VISITOR_SEARCH_SQLITE_DDL
+from app import app
+
+def migrate_database():
+    """Crear el índice de búsqueda según el motor de base de datos"""
+    with app.app_context():
+        dialect = db.engine.dialect.name
+        if dialect == 'postgresql':
+            statements = VISITOR_SEARCH_POSTGRESQL_DDL
+        elif dialect == 'sqlite':
+            statements = VISITOR_SEARCH_SQLITE_DDL
+        else:
+            print(f"Motor '{dialect}' sin índice de búsqueda dedicado; se usará LIKE")
+            return
+        
+        try:
+            for statement in statements:
+                print(f"Ejecutando: {statement[:70]}...")
+                db.session.execute(text(statement))
+            db.session.commit()
+            print("Índice de búsqueda de visitantes creado")
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error durante la migración: {str(e)}")
+
+if __name__ == "__main__":
+    migrate_database()
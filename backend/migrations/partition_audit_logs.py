@@ -0,0 +1,113 @@
+"""
+Script de migración para el almacenamiento de audit_logs
+
+En PostgreSQL convierte audit_logs en una tabla particionada por mes sobre
+created_at (clave primaria (id, created_at)), crea las particiones desde el
+registro más antiguo hasta AUDIT_LOG_PARTITIONS_AHEAD meses en el futuro más
+una partición DEFAULT de respaldo, y copia el historial conservando los ids y
+la secuencia. En otras bases de datos solo crea los índices compuestos.
+
+Puede ejecutarse de nuevo: si la tabla ya está particionada solo crea las
+particiones que falten, moviendo a cada una las filas de su mes que hubieran
+caído en la partición DEFAULT.
+"""
+import os
+import sys
+from datetime import datetime
+from sqlalchemy import inspect, text
+
+# Añadir el directorio actual al path para importar los modelos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.database import db
+from models.permission import AuditLog
+from services.audit_service import DEFAULT_PARTITION, AuditLogService, month_start
+from app import app
+
+def create_indexes():
+    """Crear los índices compuestos de audit_logs si no existen"""
+    existing = {index['name'] for index in inspect(db.engine).get_indexes(AuditLog.__tablename__)}
+    for index in AuditLog.__table__.indexes:
+        if index.name in existing:
+            print(f"El índice '{index.name}' ya existe")
+            continue
+        print(f"Creando índice '{index.name}'...")
+        index.create(db.engine)
+
+def partition_postgresql():
+    """Reemplazar audit_logs por una tabla particionada con el mismo contenido"""
+    if AuditLogService.is_partitioned():
+        print("La tabla audit_logs ya está particionada")
+        oldest = db.session.execute(text(f"SELECT min(created_at) FROM {DEFAULT_PARTITION}")).scalar()
+        now = datetime.utcnow()
+        created = AuditLogService.create_partitions(
+            month_start(oldest or now),
+            month_start(now, app.config.get('AUDIT_LOG_PARTITIONS_AHEAD', 2))
+        )
+        print(f"Particiones creadas: {len(created)}")
+        return
+    
+    print("Renombrando audit_logs a audit_logs_legacy...")
+    db.session.execute(text("ALTER TABLE audit_logs RENAME TO audit_logs_legacy"))
+    db.session.execute(text("ALTER TABLE audit_logs_legacy RENAME CONSTRAINT audit_logs_pkey TO audit_logs_legacy_pkey"))
+    for index in AuditLog.__table__.indexes:
+        db.session.execute(text(f"DROP INDEX IF EXISTS {index.name}"))
+    
+    print("Creando tabla particionada audit_logs...")
+    db.session.execute(text("""
+        CREATE TABLE audit_logs (
+            id INTEGER NOT NULL DEFAULT nextval('audit_logs_id_seq'),
+            user_id INTEGER REFERENCES users (id),
+            action VARCHAR(100) NOT NULL,
+            entity_type VARCHAR(50) NOT NULL,
+            entity_id INTEGER,
+            ip_address VARCHAR(45),
+            user_agent VARCHAR(255),
+            details TEXT,
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT (now() AT TIME ZONE 'utc'),
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """))
+    db.session.execute(text(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF audit_logs DEFAULT"))
+    for index in AuditLog.__table__.indexes:
+        index.create(db.session.connection())
+    
+    oldest = db.session.execute(text("SELECT min(created_at) FROM audit_logs_legacy")).scalar()
+    now = datetime.utcnow()
+    created = AuditLogService.create_partitions(
+        month_start(oldest or now),
+        month_start(now, app.config.get('AUDIT_LOG_PARTITIONS_AHEAD', 2))
+    )
+    print(f"Particiones creadas: {len(created)}")
+    
+    print("Copiando el historial...")
+    copied = db.session.execute(text("""
+        INSERT INTO audit_logs (id, user_id, action, entity_type, entity_id, ip_address, user_agent, details, created_at)
+        SELECT id, user_id, action, entity_type, entity_id, ip_address, user_agent, details,
+               COALESCE(created_at, now() AT TIME ZONE 'utc')
+        FROM audit_logs_legacy
+    """)).rowcount
+    db.session.execute(text("ALTER SEQUENCE audit_logs_id_seq OWNED BY audit_logs.id"))
+    db.session.execute(text("DROP TABLE audit_logs_legacy"))
+    db.session.commit()
+    print(f"Registros copiados: {copied}")
+
+def migrate_database():
+    """Particionar audit_logs (PostgreSQL) o crear sus índices"""
+    with app.app_context():
+        try:
+            if not inspect(db.engine).has_table(AuditLog.__tablename__):
+                print("Creando tabla audit_logs...")
+                AuditLog.__table__.create(db.engine)
+            
+            if db.engine.dialect.name == 'postgresql':
+                partition_postgresql()
+            else:
+                create_indexes()
+            print("Migración completada")
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error durante la migración: {str(e)}")
+
+if __name__ == "__main__":
+    migrate_database()
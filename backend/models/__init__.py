@@ -6,5 +6,8 @@ from .visitor import Visitor, VisitorCheckIn
 from .event import Event
 from .user import User
 from .kiosk import Kiosk
+from .analytics import CheckInRollup
+from .export_job import ExportJob
+from .invitation_job import InvitationJob, InvitationResult
 
-__all__ = ['db', 'init_app', 'Visitor', 'VisitorCheckIn', 'Event', 'User', 'Kiosk']
+__all__ = ['db', 'init_app', 'Visitor', 'VisitorCheckIn', 'Event', 'User', 'Kiosk', 'CheckInRollup', 'ExportJob', 'InvitationJob', 'InvitationResult']
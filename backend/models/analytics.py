@@ -0,0 +1,132 @@
+"""
+Modelos de agregados para analíticas del dashboard
+"""
+from collections import Counter
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from .database import db
+
+class CheckInRollup(db.Model):
+    """
+    Conteo de check-ins agrupado por (día, hora, evento)
+
+    Se actualiza de forma incremental al guardar VisitorCheckIn y puede
+    reconstruirse con AnalyticsService.rebuild_check_in_rollups(). La
+    ubicación no se copia aquí: se lee de events al consultar, así que
+    cambiar Event.location no deja agregados desactualizados.
+    """
+    __tablename__ = 'check_in_rollups'
+    __table_args__ = (
+        db.UniqueConstraint('bucket_date', 'bucket_hour', 'event_id', name='uq_check_in_rollups_bucket'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    bucket_date = db.Column(db.Date, nullable=False)
+    bucket_hour = db.Column(db.Integer, nullable=False)
+    event_id = db.Column(db.Integer, db.ForeignKey('events.id', ondelete='CASCADE'), nullable=False)
+    check_in_count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<CheckInRollup {self.bucket_date} {self.bucket_hour}h event_id={self.event_id}: {self.check_in_count}>'
+
+    @staticmethod
+    def apply_deltas(connection, deltas):
+        """
+        Suma los deltas a los buckets correspondientes con un upsert
+
+        Args:
+            connection: Conexión de la transacción actual
+            deltas (dict): {(bucket_date, bucket_hour, event_id): delta}
+        """
+        deltas = {key: delta for key, delta in deltas.items() if delta}
+        if not deltas:
+            return
+
+        rows = [
+            {'bucket_date': bucket_date, 'bucket_hour': bucket_hour, 'event_id': event_id,
+             'check_in_count': delta}
+            for (bucket_date, bucket_hour, event_id), delta in deltas.items()
+        ]
+
+        dialect = connection.dialect.name
+        if dialect in ('postgresql', 'sqlite'):
+            if dialect == 'postgresql':
+                from sqlalchemy.dialects.postgresql import insert
+            else:
+                from sqlalchemy.dialects.sqlite import insert
+            statement = insert(CheckInRollup.__table__)
+            statement = statement.on_conflict_do_update(
+                index_elements=['bucket_date', 'bucket_hour', 'event_id'],
+                set_={'check_in_count': CheckInRollup.__table__.c.check_in_count + statement.excluded.check_in_count}
+            )
+            connection.execute(statement, rows)
+            return
+
+        # Otros motores: actualizar y crear el bucket si no existe
+        table = CheckInRollup.__table__
+        for row in rows:
+            result = connection.execute(
+                table.update().where(
+                    table.c.bucket_date == row['bucket_date'],
+                    table.c.bucket_hour == row['bucket_hour'],
+                    table.c.event_id == row['event_id']
+                ).values(check_in_count=table.c.check_in_count + row['check_in_count'])
+            )
+            if result.rowcount == 0:
+                connection.execute(table.insert().values(**row))
+
+def _bucket(check_in_time, event_id):
+    """Obtiene la clave del bucket para un check-in"""
+    if check_in_time is None or event_id is None:
+        return None
+    return (check_in_time.date(), check_in_time.hour, event_id)
+
+def _previous_value(state, attribute):
+    """Valor de un atributo antes de los cambios pendientes del flush"""
+    history = state.attrs[attribute].history
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(state.object, attribute)
+
+def _apply_check_in_rollups(session, flush_context):
+    """
+    Aplica a check_in_rollups los check-ins creados, modificados o eliminados
+
+    Se calcula y aplica en after_flush, donde new/dirty/deleted y el historial
+    de atributos aún reflejan el estado previo al flush; así un flush fallido
+    no deja deltas pendientes para la siguiente transacción.
+    """
+    from .visitor import VisitorCheckIn
+
+    deltas = Counter()
+    for obj in session.new:
+        if isinstance(obj, VisitorCheckIn):
+            key = _bucket(obj.check_in_time, obj.event_id)
+            if key:
+                deltas[key] += 1
+
+    for obj in session.dirty:
+        if not isinstance(obj, VisitorCheckIn):
+            continue
+        state = inspect(obj)
+        if not (state.attrs.check_in_time.history.has_changes() or state.attrs.event_id.history.has_changes()):
+            continue
+        old_key = _bucket(_previous_value(state, 'check_in_time'), _previous_value(state, 'event_id'))
+        new_key = _bucket(obj.check_in_time, obj.event_id)
+        if old_key:
+            deltas[old_key] -= 1
+        if new_key:
+            deltas[new_key] += 1
+
+    for obj in session.deleted:
+        if isinstance(obj, VisitorCheckIn):
+            state = inspect(obj)
+            key = _bucket(_previous_value(state, 'check_in_time'), _previous_value(state, 'event_id'))
+            if key:
+                deltas[key] -= 1
+
+    if deltas:
+        CheckInRollup.apply_deltas(session.connection(), deltas)
+
+# Mantener los agregados en la misma transacción que el check-in
+event.listen(Session, 'after_flush', _apply_check_in_rollups)
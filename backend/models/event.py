@@ -23,6 +23,17 @@ class Event(db.Model):
     event_type = db.Column(db.String(50), nullable=True)
     image_url = db.Column(db.String(255), nullable=True)
     
+    # Registros de event_visitors no cancelados y en estado CHECKED_IN
+    # (mantenidos por register_visitor y los cambios de estado de EventVisitor)
+    registration_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    checked_in_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Filas de visitor_check_ins del evento, que el kiosco y el listado usan
+    # como registro (mantenido por los hooks de models.visitor)
+    check_in_row_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    
+    # Último EventVisitor.id al que ya se le programó el recordatorio (ver schedule_event_reminders)
+    reminder_watermark = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    
     # Relaciones
     visitors = db.relationship('Visitor', secondary='event_visitors', back_populates='events')
     registrations = db.relationship('EventVisitor', back_populates='event')
@@ -54,27 +65,82 @@ class Event(db.Model):
         return self.end_date < datetime.utcnow()
     
     @property
-    def registration_count(self):
+    def available_capacity(self):
         """
-        Obtiene el número total de registros (excluyendo cancelados)
+        Obtiene la capacidad disponible restante
         """
-        return len([r for r in self.registrations if r.status != 'CANCELED'])
+        if not self.capacity or self.capacity <= 0:  # Capacidad ilimitada
+            return float('inf')
+        return max(0, self.capacity - (self.registration_count or 0))
     
-    @property
-    def checked_in_count(self):
+    @staticmethod
+    def adjust_counters(event_id, registrations=0, checked_in=0):
         """
-        Obtiene el número de visitantes que han hecho check-in
+        Ajusta los contadores de un evento con un UPDATE atómico en la base de datos
+        
+        El cambio forma parte de la transacción en curso, por lo que se confirma
+        o se revierte junto con el cambio de estado que lo originó.
+        
+        Args:
+            event_id (int): ID del evento
+            registrations (int): Variación del número de registros
+            checked_in (int): Variación del número de check-ins
         """
-        return len([r for r in self.registrations if r.status == 'CHECKED_IN'])
+        values = {}
+        if registrations:
+            values['registration_count'] = Event.registration_count + registrations
+        if checked_in:
+            values['checked_in_count'] = Event.checked_in_count + checked_in
+        if not values:
+            return
+        
+        db.session.execute(
+            db.update(Event).where(Event.id == event_id).values(**values)
+        )
     
-    @property
-    def available_capacity(self):
+    def register_visitor(self, visitor, registered_by=None, notes=None):
         """
-        Obtiene la capacidad disponible restante
+        Registra un visitante en el evento verificando la capacidad de forma atómica
+        
+        El incremento del contador solo se aplica si queda capacidad, de modo que
+        dos registros concurrentes no pueden superar el límite del evento.
+        
+        Args:
+            visitor (Visitor): Visitante a registrar
+            registered_by (int, optional): ID del usuario que realiza el registro
+            notes (str, optional): Notas del registro
+            
+        Returns:
+            EventVisitor: Registro creado, o None si el evento no tiene capacidad
         """
-        if self.capacity <= 0:  # Capacidad ilimitada
-            return float('inf')
-        return max(0, self.capacity - self.registration_count)
+        from .visitor import EventVisitor
+        
+        if visitor.id is None:
+            db.session.flush()
+        
+        result = db.session.execute(
+            db.update(Event).where(
+                Event.id == self.id,
+                db.or_(
+                    Event.capacity.is_(None),
+                    Event.capacity <= 0,
+                    Event.registration_count < Event.capacity
+                )
+            ).values(registration_count=Event.registration_count + 1)
+        )
+        if result.rowcount == 0:
+            return None
+        
+        registration = EventVisitor(
+            visitor_id=visitor.id,
+            event_id=self.id,
+            registration_code=visitor.registration_code,
+            registered_by=registered_by,
+            status='REGISTERED',
+            notes=notes
+        )
+        db.session.add(registration)
+        return registration
     
     def to_dict(self):
         """
@@ -95,6 +161,7 @@ class Event(db.Model):
             'image_url': self.image_url,
             'registration_count': self.registration_count,
             'checked_in_count': self.checked_in_count,
+            'check_in_row_count': self.check_in_row_count,
             'available_capacity': self.available_capacity if self.available_capacity != float('inf') else None,
             'is_upcoming': self.is_upcoming,
             'is_ongoing': self.is_ongoing,
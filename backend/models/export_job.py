@@ -0,0 +1,67 @@
+"""
+Modelo de datos para trabajos de exportación en segundo plano
+"""
+import json
+import uuid
+from datetime import datetime
+from models.database import db
+
+class ExportJob(db.Model):
+    """
+    Trabajo de exportación generado por una tarea de Celery
+
+    El archivo se escribe en disco por el worker y se descarga después con el
+    endpoint de descarga; el ID es un UUID para que no se pueda adivinar.
+    """
+    __tablename__ = 'export_jobs'
+
+    STATUS_PENDING = 'PENDING'
+    STATUS_RUNNING = 'RUNNING'
+    STATUS_COMPLETED = 'COMPLETED'
+    STATUS_FAILED = 'FAILED'
+
+    id = db.Column(db.String(32), primary_key=True, default=lambda: uuid.uuid4().hex)
+    event_id = db.Column(db.Integer, db.ForeignKey('events.id', ondelete='CASCADE'), nullable=False)
+    format = db.Column(db.String(10), nullable=False, default='excel')
+    params = db.Column(db.Text, nullable=True)  # Filtros de la exportación en JSON
+    status = db.Column(db.String(20), nullable=False, default=STATUS_PENDING)
+    file_path = db.Column(db.String(500), nullable=True)
+    filename = db.Column(db.String(255), nullable=True)
+    row_count = db.Column(db.Integer, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    created_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    started_at = db.Column(db.DateTime, nullable=True)
+    completed_at = db.Column(db.DateTime, nullable=True)
+
+    def __repr__(self):
+        return f'<ExportJob {self.id} - {self.status}>'
+
+    @property
+    def filters(self):
+        """
+        Filtros de la exportación como diccionario
+        """
+        return json.loads(self.params) if self.params else {}
+
+    @filters.setter
+    def filters(self, value):
+        self.params = json.dumps(value or {})
+
+    def to_dict(self):
+        """
+        Convierte el trabajo a un diccionario
+        """
+        return {
+            'id': self.id,
+            'event_id': self.event_id,
+            'format': self.format,
+            'filters': self.filters,
+            'status': self.status,
+            'filename': self.filename,
+            'row_count': self.row_count,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None
+        }
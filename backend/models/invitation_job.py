@@ -0,0 +1,104 @@
+"""
+Modelos de datos para envíos masivos de invitaciones
+"""
+import json
+import uuid
+from datetime import datetime
+from models.database import db
+
+class InvitationJob(db.Model):
+    """
+    Envío masivo de invitaciones a un evento procesado por una tarea de Celery
+    """
+    __tablename__ = 'invitation_jobs'
+
+    STATUS_PENDING = 'PENDING'
+    STATUS_RUNNING = 'RUNNING'
+    STATUS_COMPLETED = 'COMPLETED'
+    STATUS_FAILED = 'FAILED'
+
+    id = db.Column(db.String(32), primary_key=True, default=lambda: uuid.uuid4().hex)
+    event_id = db.Column(db.Integer, db.ForeignKey('events.id', ondelete='CASCADE'), nullable=False)
+    visitor_ids = db.Column(db.Text, nullable=False)  # IDs de visitantes en JSON
+    status = db.Column(db.String(20), nullable=False, default=STATUS_PENDING)
+    total = db.Column(db.Integer, nullable=False, default=0)
+    sent = db.Column(db.Integer, nullable=False, default=0)
+    skipped = db.Column(db.Integer, nullable=False, default=0)
+    failed = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    started_at = db.Column(db.DateTime, nullable=True)
+    completed_at = db.Column(db.DateTime, nullable=True)
+
+    results = db.relationship('InvitationResult', backref='job', lazy='dynamic',
+                              cascade='all, delete-orphan', passive_deletes=True)
+
+    def __repr__(self):
+        return f'<InvitationJob {self.id} - {self.status}>'
+
+    @property
+    def recipients(self):
+        """
+        IDs de los visitantes a invitar
+        """
+        return json.loads(self.visitor_ids) if self.visitor_ids else []
+
+    @recipients.setter
+    def recipients(self, value):
+        self.visitor_ids = json.dumps(list(value or []))
+        self.total = len(value or [])
+
+    def to_dict(self):
+        """
+        Convierte el envío a un diccionario
+        """
+        return {
+            'id': self.id,
+            'event_id': self.event_id,
+            'status': self.status,
+            'total': self.total,
+            'sent': self.sent,
+            'skipped': self.skipped,
+            'failed': self.failed,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None
+        }
+
+class InvitationResult(db.Model):
+    """
+    Resultado del envío de una invitación a un visitante
+    """
+    __tablename__ = 'invitation_results'
+    __table_args__ = (
+        db.Index('ix_invitation_results_job_status', 'job_id', 'status'),
+    )
+
+    STATUS_SENT = 'SENT'
+    STATUS_SKIPPED = 'SKIPPED'
+    STATUS_FAILED = 'FAILED'
+
+    id = db.Column(db.Integer, primary_key=True)
+    job_id = db.Column(db.String(32), db.ForeignKey('invitation_jobs.id', ondelete='CASCADE'), nullable=False)
+    visitor_id = db.Column(db.Integer, nullable=False)
+    email = db.Column(db.String(120), nullable=True)
+    status = db.Column(db.String(20), nullable=False)
+    message = db.Column(db.String(500), nullable=True)
+    processed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<InvitationResult {self.job_id} - {self.visitor_id}: {self.status}>'
+
+    def to_dict(self):
+        """
+        Convierte el resultado a un diccionario
+        """
+        return {
+            'visitor_id': self.visitor_id,
+            'email': self.email,
+            'status': self.status,
+            'success': self.status == self.STATUS_SENT,
+            'message': self.message,
+            'processed_at': self.processed_at.isoformat() if self.processed_at else None
+        }
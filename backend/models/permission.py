@@ -2,6 +2,9 @@
 Modelo para permisos de sistema
 """
 from datetime import datetime
+import hashlib
+import threading
+import time
 from .database import db
 
 # Tabla intermedia para relación muchos a muchos entre roles y permisos
@@ -69,12 +72,145 @@ class Permission(db.Model):
             'created_at': self.created_at.isoformat()
         }
 
+class PermissionRegistry:
+    """
+    Permisos de cada rol precompilados como frozenset (uno por worker)
+    
+    Se carga con una sola consulta y se recarga cuando cambian roles o
+    permisos (etiqueta 'permissions' del canal de invalidaciones de cache.py)
+    o al cumplirse el TTL. Así User.has_permission no carga relaciones del ORM.
+    
+    Las máscaras pueden viajar en el token en lugar de la lista de nombres
+    (JWT_PERMISSIONS_BITMASK). Los bits se asignan de forma densa por orden de
+    nombre, no por Permission.id (que crece y en SQLite se reutiliza tras un
+    borrado); como crear o borrar un permiso desplaza los bits, el token lleva
+    también mask_version() y las máscaras de otra versión se rechazan.
+    """
+    
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self._state = None  # (expira, {role_id: frozenset}, {nombre: bit}, {bit: nombre}, versión)
+        self._lock = threading.Lock()
+        self.version = 0
+    
+    def permissions_for(self, role_id):
+        """
+        Obtiene los nombres de permisos de un rol
+        
+        Args:
+            role_id (int): ID del rol (None = sin rol)
+            
+        Returns:
+            frozenset: Nombres de los permisos del rol
+        """
+        if role_id is None:
+            return frozenset()
+        return self._get()[1].get(role_id, frozenset())
+    
+    def mask_for(self, permission_names):
+        """
+        Convierte nombres de permisos a una máscara de bits
+        
+        Args:
+            permission_names (iterable): Nombres de permisos
+            
+        Returns:
+            int: Máscara, o None si algún permiso no existe
+        """
+        bits = self._get()[2]
+        mask = 0
+        for name in permission_names:
+            if name not in bits:
+                return None
+            mask |= 1 << bits[name]
+        return mask
+    
+    def names_for(self, mask):
+        """
+        Convierte una máscara de bits a nombres de permisos
+        
+        Args:
+            mask (int): Máscara de permisos
+            
+        Returns:
+            frozenset: Nombres de los permisos presentes en la máscara
+        """
+        return frozenset(name for bit, name in self._get()[3].items() if mask >> bit & 1)
+    
+    def mask_version(self):
+        """
+        Obtiene la versión de la asignación de bits actual
+        
+        Returns:
+            str: Huella de los nombres de permisos (cambia al crear o borrar uno)
+        """
+        return self._get()[4]
+    
+    def invalidate(self, tags=None):
+        """
+        Descarta los permisos compilados si cambiaron roles o permisos
+        
+        Args:
+            tags (iterable): Etiquetas invalidadas (None = recargar siempre)
+        """
+        if tags is None or 'permissions' in tags:
+            with self._lock:
+                self.version += 1
+                self._state = None
+    
+    def _get(self):
+        state = self._state
+        if state is not None and state[0] > time.monotonic():
+            return state
+        
+        version = self.version
+        state = self._load()
+        with self._lock:
+            # Una invalidación durante la carga deja el resultado obsoleto
+            if version == self.version:
+                self._state = state
+        return state
+    
+    def _load(self):
+        rows = db.session.execute(
+            db.select(Permission.id, Permission.name, role_permissions.c.role_id)
+            .outerjoin(role_permissions, role_permissions.c.permission_id == Permission.id)
+        ).all()
+        
+        roles = {}
+        names = set()
+        for permission_id, name, role_id in rows:
+            names.add(name)
+            if role_id is not None:
+                roles.setdefault(role_id, set()).add(name)
+        
+        names = sorted(names)
+        return (
+            time.monotonic() + self.ttl,
+            {role_id: frozenset(role_names) for role_id, role_names in roles.items()},
+            {name: bit for bit, name in enumerate(names)},
+            dict(enumerate(names)),
+            hashlib.sha1('\n'.join(names).encode('utf-8')).hexdigest()[:8]
+        )
+
+# Permisos compilados por rol (uno por worker)
+permission_registry = PermissionRegistry()
+
 class AuditLog(db.Model):
     """
     Modelo para registrar acciones de auditoría en el sistema
     """
     __tablename__ = 'audit_logs'
+    __table_args__ = (
+        # "¿Quién tocó la entidad X?" y "¿qué hizo el usuario Y en un rango?",
+        # con id al final para el orden exacto de la paginación por keyset
+        db.Index('ix_audit_logs_entity_created', 'entity_type', 'entity_id', 'created_at', 'id'),
+        db.Index('ix_audit_logs_user_created', 'user_id', 'created_at', 'id'),
+        db.Index('ix_audit_logs_created_at', 'created_at', 'id'),
+    )
     
+    # En PostgreSQL la tabla está particionada por mes sobre created_at
+    # (ver migrations/partition_audit_logs.py y AuditLogService)
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
     action = db.Column(db.String(100), nullable=False)
@@ -83,7 +219,7 @@ class AuditLog(db.Model):
     ip_address = db.Column(db.String(45), nullable=True)
     user_agent = db.Column(db.String(255), nullable=True)
     details = db.Column(db.Text, nullable=True) # Detalles en formato JSON
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     
     # Relaciones
     user = db.relationship('User', backref=db.backref('audit_logs', lazy=True))
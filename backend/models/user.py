@@ -4,6 +4,7 @@ Modelo para usuarios del sistema
 from datetime import datetime, timedelta
 from werkzeug.security import generate_password_hash, check_password_hash
 from .database import db
+from .permission import permission_registry
 import secrets
 from flask import current_app
 
@@ -132,14 +133,8 @@ class User(db.Model):
         # Los administradores tienen todos los permisos
         if self.is_admin:
             return True
-            
-        # Si el usuario tiene rol_obj, verificar permisos
-        if self.role_obj:
-            for permission in self.role_obj.permissions:
-                if permission.name == permission_name:
-                    return True
         
-        return False
+        return permission_name in permission_registry.permissions_for(self.role_id)
     
     def has_permissions(self, permission_names):
         """
@@ -154,20 +149,15 @@ class User(db.Model):
         # Los administradores tienen todos los permisos
         if self.is_admin:
             return True
-            
-        # Si no hay rol_obj, no tiene permisos
-        if not self.role_obj:
-            return False
-            
-        # Convertir los permisos a un conjunto para búsqueda rápida
-        user_permissions = {p.name for p in self.role_obj.permissions}
         
-        # Verificar que todos los permisos requeridos estén en el conjunto
-        for permission in permission_names:
-            if permission not in user_permissions:
-                return False
-                
-        return True
+        return permission_registry.permissions_for(self.role_id).issuperset(permission_names)
+    
+    @property
+    def permission_names(self):
+        """
+        Nombres de los permisos del rol del usuario (sin cargar role_obj)
+        """
+        return permission_registry.permissions_for(self.role_id)
     
     def to_dict(self):
         """
@@ -185,8 +175,8 @@ class User(db.Model):
             'created_at': self.created_at.isoformat()
         }
         
-        # Agregar permisos si hay role_obj
-        if self.role_obj:
-            user_dict['permissions'] = [p.name for p in self.role_obj.permissions]
+        # Agregar permisos si tiene un rol asignado
+        if self.role_id:
+            user_dict['permissions'] = sorted(self.permission_names)
         
         return user_dict 
\ No newline at end of file
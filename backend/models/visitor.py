@@ -1,10 +1,11 @@
 """
 Modelo para visitantes del sistema
 """
+from collections import Counter
 from datetime import datetime
-import secrets
-import string
 import json
+from sqlalchemy import DDL, event, inspect
+from sqlalchemy.orm import Session
 from .database import db
 
 class Visitor(db.Model):
@@ -12,6 +13,13 @@ class Visitor(db.Model):
     Modelo para visitantes
     """
     __tablename__ = 'visitors'
+    __table_args__ = (
+        # Búsquedas del kiosco por email (sin distinguir mayúsculas) y teléfono
+        db.Index('ix_visitors_email_lower', db.func.lower(db.text('email'))),
+        db.Index('ix_visitors_phone', 'phone'),
+        # Orden y cursor del listado paginado de visitantes
+        db.Index('ix_visitors_created_at_id', 'created_at', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
@@ -42,13 +50,15 @@ class Visitor(db.Model):
     
     @staticmethod
     def generate_unique_code():
-        """Genera un código único de 6 caracteres alfanuméricos"""
-        characters = string.ascii_uppercase + string.digits
-        while True:
-            code = ''.join(secrets.choice(characters) for _ in range(6))
-            # Verificar que el código no exista
-            if not Visitor.query.filter_by(registration_code=code).first():
-                return code
+        """
+        Genera un código único de 6 caracteres alfanuméricos
+        
+        Los códigos provienen de utils.registration_codes, que los deriva de una
+        secuencia de la base de datos, por lo que no requiere consultar la tabla
+        de visitantes por cada candidato.
+        """
+        from utils.registration_codes import code_allocator
+        return code_allocator.next_code()
     
     def __repr__(self):
         return f'<Visitor {self.name}>'
@@ -75,6 +85,43 @@ class Visitor(db.Model):
             'interests': self.interests.split(',') if self.interests else []
         }
 
+# Índices de búsqueda de texto sobre visitantes (ver services/search_service.py)
+VISITOR_SEARCH_COLUMNS = ['name', 'email', 'phone', 'registration_code']
+
+# PostgreSQL: índices GIN con trigramas, usados por ILIKE '%término%'
+VISITOR_SEARCH_POSTGRESQL_DDL = ['CREATE EXTENSION IF NOT EXISTS pg_trgm'] + [
+    f'CREATE INDEX IF NOT EXISTS ix_visitors_{column}_trgm ON visitors USING gin ({column} gin_trgm_ops)'
+    for column in VISITOR_SEARCH_COLUMNS
+]
+
+# SQLite: tabla FTS5 (tokenizador de trigramas) sincronizada con triggers
+VISITOR_FTS_INSERT_TRIGGER = (
+    "CREATE TRIGGER IF NOT EXISTS visitors_fts_insert AFTER INSERT ON visitors BEGIN "
+    "INSERT INTO visitors_fts(rowid, name, email, phone, registration_code) "
+    "VALUES (new.id, new.name, new.email, new.phone, new.registration_code); END"
+)
+VISITOR_SEARCH_SQLITE_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS visitors_fts USING fts5("
+    "name, email, phone, registration_code, "
+    "content='visitors', content_rowid='id', tokenize='trigram')",
+    VISITOR_FTS_INSERT_TRIGGER,
+    "CREATE TRIGGER IF NOT EXISTS visitors_fts_delete AFTER DELETE ON visitors BEGIN "
+    "INSERT INTO visitors_fts(visitors_fts, rowid, name, email, phone, registration_code) "
+    "VALUES ('delete', old.id, old.name, old.email, old.phone, old.registration_code); END",
+    "CREATE TRIGGER IF NOT EXISTS visitors_fts_update AFTER UPDATE ON visitors BEGIN "
+    "INSERT INTO visitors_fts(visitors_fts, rowid, name, email, phone, registration_code) "
+    "VALUES ('delete', old.id, old.name, old.email, old.phone, old.registration_code); "
+    "INSERT INTO visitors_fts(rowid, name, email, phone, registration_code) "
+    "VALUES (new.id, new.name, new.email, new.phone, new.registration_code); END",
+    "INSERT INTO visitors_fts(visitors_fts) VALUES ('rebuild')",
+]
+
+for statement in VISITOR_SEARCH_POSTGRESQL_DDL:
+    event.listen(Visitor.__table__, 'after_create', DDL(statement).execute_if(dialect='postgresql'))
+for statement in VISITOR_SEARCH_SQLITE_DDL:
+    event.listen(Visitor.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+event.listen(Visitor.__table__, 'after_drop', DDL('DROP TABLE IF EXISTS visitors_fts').execute_if(dialect='sqlite'))
+
 class EventVisitor(db.Model):
     """
     Modelo para la relación entre visitantes y eventos
@@ -148,12 +195,29 @@ class EventVisitor(db.Model):
         """
         return self.status == 'CANCELED'
         
+    def _set_status(self, status):
+        """
+        Cambia el estado del registro y ajusta los contadores del evento
+        
+        Args:
+            status (str): Nuevo estado
+        """
+        from .event import Event
+        
+        previous = self.status or 'REGISTERED'
+        self.status = status
+        
+        registrations = int(status != 'CANCELED') - int(previous != 'CANCELED')
+        checked_in = int(status == 'CHECKED_IN') - int(previous == 'CHECKED_IN')
+        if self.event_id is not None:
+            Event.adjust_counters(self.event_id, registrations, checked_in)
+        
     def check_in(self, checked_in_by=None):
         """
         Registra el check-in del visitante
         """
         self.check_in_time = datetime.utcnow()
-        self.status = 'CHECKED_IN'
+        self._set_status('CHECKED_IN')
         self.checked_in_by = checked_in_by
         return True
         
@@ -161,30 +225,92 @@ class EventVisitor(db.Model):
         """
         Marca al visitante como no presentado
         """
-        self.status = 'NO_SHOW'
+        self._set_status('NO_SHOW')
         return True
         
     def cancel_registration(self, note=None):
         """
         Cancela el registro del visitante
         """
-        self.status = 'CANCELED'
+        self._set_status('CANCELED')
         if note:
             self.notes = note if not self.notes else f"{self.notes}\n{note}"
         return True
 
+class RegistrationCodeSequence(db.Model):
+    """
+    Contador para reservar números de secuencia de códigos de registro
+    
+    Solo se usa en motores sin secuencias nativas (SQLite); en PostgreSQL se
+    usa la secuencia registration_code_seq.
+    """
+    __tablename__ = 'registration_code_sequence'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    next_value = db.Column(db.BigInteger, nullable=False, default=0)
+
+# Secuencia nativa para motores que la soportan (ignorada en SQLite)
+registration_code_seq = db.Sequence('registration_code_seq', metadata=db.metadata)
+
 class VisitorCheckIn(db.Model):
     """
     Modelo para registrar asistencia de visitantes a eventos
     """
     __tablename__ = 'visitor_check_ins'
+    __table_args__ = (
+        db.Index('ix_visitor_check_ins_visitor_event', 'visitor_id', 'event_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     visitor_id = db.Column(db.Integer, db.ForeignKey('visitors.id'), nullable=False)
-    event_id = db.Column(db.Integer, db.ForeignKey('events.id'), nullable=False)
+    # active_history conserva el valor anterior para ajustar check_in_rollups
+    event_id = db.column_property(db.Column(db.Integer, db.ForeignKey('events.id'), nullable=False), active_history=True)
     kiosk_id = db.Column(db.Integer, db.ForeignKey('kiosks.id'), nullable=False)
-    check_in_time = db.Column(db.DateTime, default=datetime.utcnow)
+    check_in_time = db.column_property(db.Column(db.DateTime, default=datetime.utcnow), active_history=True)
     
     def __repr__(self):
         return f'<VisitorCheckIn visitor_id={self.visitor_id} event_id={self.event_id}>'
 
+def _apply_check_in_counts(session, flush_context):
+    """
+    Aplica a events.check_in_row_count los check-ins creados, eliminados o movidos
+
+    Se calcula y aplica en after_flush, donde new/dirty/deleted y el historial
+    de atributos aún reflejan el estado previo al flush; así un flush fallido
+    no deja deltas pendientes para la siguiente transacción.
+    """
+    from .event import Event
+
+    deltas = Counter()
+    for obj in session.new:
+        if isinstance(obj, VisitorCheckIn):
+            deltas[obj.event_id] += 1
+
+    for obj in session.deleted:
+        if isinstance(obj, VisitorCheckIn):
+            history = inspect(obj).attrs.event_id.history
+            deltas[history.deleted[0] if history.deleted else obj.event_id] -= 1
+
+    for obj in session.dirty:
+        if isinstance(obj, VisitorCheckIn):
+            history = inspect(obj).attrs.event_id.history
+            if history.has_changes():
+                if history.deleted and history.deleted[0] is not None:
+                    deltas[history.deleted[0]] -= 1
+                deltas[obj.event_id] += 1
+
+    connection = None
+    for event_id, delta in deltas.items():
+        if event_id is None or not delta:
+            continue
+        connection = connection or session.connection()
+        connection.execute(
+            db.update(Event.__table__).where(Event.__table__.c.id == event_id)
+            .values(check_in_row_count=Event.__table__.c.check_in_row_count + delta)
+        )
+
+# Mantener events.check_in_row_count en la misma transacción que el check-in.
+# Los DELETE/UPDATE masivos (query.delete()) no pasan por aquí; usar
+# EventService.reconcile_counters después de ellos.
+event.listen(Session, 'after_flush', _apply_check_in_counts)
+
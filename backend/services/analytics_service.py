@@ -0,0 +1,166 @@
+"""
+Servicio para las analíticas del dashboard
+"""
+from datetime import date, datetime
+from sqlalchemy import delete, extract, func
+from models.analytics import CheckInRollup
+from models.event import Event
+from models.visitor import VisitorCheckIn
+from models.database import db
+
+class AnalyticsService:
+    """
+    Clase de servicio para los agregados de check-ins
+    """
+
+    @staticmethod
+    def rebuild_check_in_rollups(since=None):
+        """
+        Recalcula check_in_rollups desde visitor_check_ins
+
+        Corrige cualquier desviación de la actualización incremental (por
+        ejemplo, borrados masivos que no pasan por el ORM).
+
+        Args:
+            since (date): Primer día a recalcular (None = todo el historial)
+
+        Returns:
+            int: Número de buckets escritos
+        """
+        if isinstance(since, datetime):
+            since = since.date()
+
+        bucket_date = func.date(VisitorCheckIn.check_in_time)
+        bucket_hour = extract('hour', VisitorCheckIn.check_in_time)
+        query = db.session.query(
+            bucket_date.label('bucket_date'),
+            bucket_hour.label('bucket_hour'),
+            VisitorCheckIn.event_id,
+            func.count(VisitorCheckIn.id).label('check_in_count')
+        ).join(
+            Event, Event.id == VisitorCheckIn.event_id
+        ).filter(
+            VisitorCheckIn.check_in_time.isnot(None)
+        ).group_by(
+            bucket_date, bucket_hour, VisitorCheckIn.event_id
+        )
+
+        cleanup = delete(CheckInRollup)
+        if since:
+            query = query.filter(VisitorCheckIn.check_in_time >= datetime.combine(since, datetime.min.time()))
+            cleanup = cleanup.where(CheckInRollup.bucket_date >= since)
+
+        rows = [
+            {
+                'bucket_date': AnalyticsService._as_date(row.bucket_date),
+                'bucket_hour': int(row.bucket_hour),
+                'event_id': row.event_id,
+                'check_in_count': row.check_in_count
+            }
+            for row in query.all()
+        ]
+
+        db.session.execute(cleanup)
+        if rows:
+            db.session.execute(CheckInRollup.__table__.insert(), rows)
+        db.session.commit()
+        return len(rows)
+
+    @staticmethod
+    def _as_date(value):
+        """SQLite devuelve DATE() como texto; PostgreSQL como date"""
+        if isinstance(value, str):
+            return date.fromisoformat(value)
+        return value
+
+    @staticmethod
+    def get_daily_counts(start_date, end_date=None):
+        """
+        Obtiene el total de check-ins por día en un rango
+
+        Args:
+            start_date (date): Primer día (inclusive)
+            end_date (date): Último día (inclusive, opcional)
+
+        Returns:
+            dict: {date: total}
+        """
+        query = db.session.query(
+            CheckInRollup.bucket_date,
+            func.sum(CheckInRollup.check_in_count)
+        ).filter(CheckInRollup.bucket_date >= start_date)
+        if end_date:
+            query = query.filter(CheckInRollup.bucket_date <= end_date)
+        return {bucket_date: int(total) for bucket_date, total in query.group_by(CheckInRollup.bucket_date)}
+
+    @staticmethod
+    def get_daily_hourly_counts(start_date):
+        """
+        Obtiene el total de check-ins por (día, hora) desde una fecha
+
+        Returns:
+            list: Tuplas (date, hour, total)
+        """
+        return [
+            (bucket_date, bucket_hour, int(total))
+            for bucket_date, bucket_hour, total in db.session.query(
+                CheckInRollup.bucket_date,
+                CheckInRollup.bucket_hour,
+                func.sum(CheckInRollup.check_in_count)
+            ).filter(
+                CheckInRollup.bucket_date >= start_date
+            ).group_by(
+                CheckInRollup.bucket_date, CheckInRollup.bucket_hour
+            ).having(func.sum(CheckInRollup.check_in_count) > 0)
+        ]
+
+    @staticmethod
+    def get_event_counts():
+        """
+        Obtiene el total de check-ins por evento
+
+        Returns:
+            dict: {event_id: total}
+        """
+        return {
+            event_id: int(total)
+            for event_id, total in db.session.query(
+                CheckInRollup.event_id,
+                func.sum(CheckInRollup.check_in_count)
+            ).group_by(CheckInRollup.event_id)
+        }
+
+    @staticmethod
+    def get_location_counts():
+        """
+        Obtiene el total de check-ins por ubicación
+
+        La ubicación se toma del evento al consultar (pocas filas por evento
+        en los agregados), así que refleja los cambios de Event.location.
+
+        Returns:
+            dict: {location: total}
+        """
+        return {
+            location: int(total)
+            for location, total in db.session.query(
+                Event.location,
+                func.sum(CheckInRollup.check_in_count)
+            ).join(Event, Event.id == CheckInRollup.event_id).group_by(Event.location)
+        }
+
+    @staticmethod
+    def get_hour_counts(limit=None):
+        """
+        Obtiene el total de check-ins por hora del día, de mayor a menor
+
+        Returns:
+            list: Tuplas (hour, total)
+        """
+        total = func.sum(CheckInRollup.check_in_count)
+        query = db.session.query(
+            CheckInRollup.bucket_hour, total
+        ).group_by(CheckInRollup.bucket_hour).having(total > 0).order_by(total.desc(), CheckInRollup.bucket_hour)
+        if limit:
+            query = query.limit(limit)
+        return [(hour, int(count)) for hour, count in query]
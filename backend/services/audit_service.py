@@ -0,0 +1,486 @@
+"""
+Escritura de los registros de auditoría en segundo plano
+
+Las peticiones solo encolan el registro en una cola acotada en memoria; un
+hilo por proceso lo inserta en bloque (INSERT con executemany) cada
+AUDIT_LOG_FLUSH_INTERVAL segundos o al juntar AUDIT_LOG_BATCH_SIZE registros,
+con su propia sesión. Así la auditoría no añade un commit a la petición ni
+confirma cambios pendientes de su sesión.
+
+Al terminar el proceso (atexit, worker_exit de gunicorn y
+worker_process_shutdown de Celery) close() inserta lo que quede en la cola.
+
+AuditLogService gestiona el almacenamiento: particiones mensuales en
+PostgreSQL (la retención elimina particiones completas), borrado por lotes
+como alternativa en SQLite y consultas paginadas por keyset.
+"""
+import atexit
+import base64
+import os
+import re
+import threading
+import time
+from datetime import datetime
+from queue import Empty, Full, Queue
+
+# Marca de fin para el hilo de escritura
+_STOP = object()
+
+class AuditLogWriter:
+    """
+    Cola acotada de registros de auditoría con inserción por lotes
+    """
+
+    def __init__(self, batch_size=200, flush_interval=1.0, queue_size=10000):
+        """
+        Args:
+            batch_size (int): Registros máximos por INSERT
+            flush_interval (float): Segundos máximos que espera un registro en la cola
+            queue_size (int): Registros pendientes antes de descartar nuevos
+        """
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue_size = queue_size
+        self.app = None
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def init_app(self, app):
+        """
+        Configura el escritor con la aplicación cuyas conexiones usará el hilo
+
+        Args:
+            app: Aplicación Flask
+        """
+        self.app = app
+        self.batch_size = app.config.get('AUDIT_LOG_BATCH_SIZE', self.batch_size)
+        self.flush_interval = app.config.get('AUDIT_LOG_FLUSH_INTERVAL', self.flush_interval)
+        self.queue_size = app.config.get('AUDIT_LOG_QUEUE_SIZE', self.queue_size)
+        atexit.unregister(self.close)
+        atexit.register(self.close)
+
+    def write(self, **fields):
+        """
+        Encola un registro de auditoría sin bloquear
+
+        Si la cola está llena el registro se descarta y se cuenta en `dropped`.
+
+        Args:
+            **fields: Columnas de AuditLog (user_id, action, entity_type, ...)
+        """
+        fields.setdefault('created_at', datetime.utcnow())
+        queue = self._start()
+        try:
+            queue.put_nowait(fields)
+        except Full:
+            self.dropped += 1
+            if self.app is not None:
+                self.app.logger.warning(f"Cola de auditoría llena: registro {fields.get('action')} descartado")
+
+    def flush(self, timeout=10):
+        """
+        Espera a que se inserten los registros encolados hasta ahora
+
+        Args:
+            timeout (float): Segundos máximos de espera
+
+        Returns:
+            bool: True si se insertaron antes del timeout
+        """
+        if self._pid != os.getpid() or not self._thread.is_alive():
+            return True
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except Full:
+            return False
+        return done.wait(timeout)
+
+    def close(self, timeout=10):
+        """
+        Detiene el hilo e inserta los registros pendientes
+
+        Args:
+            timeout (float): Segundos máximos de espera al hilo
+        """
+        with self._lock:
+            if self._pid != os.getpid():
+                return
+            self._pid = None
+            queue, thread = self._queue, self._thread
+
+        if thread.is_alive():
+            try:
+                queue.put(_STOP, timeout=timeout)
+                thread.join(timeout)
+            except Full:
+                pass
+
+        # Si el hilo no terminó a tiempo, lo que quede se inserta aquí
+        pending = []
+        while True:
+            try:
+                item = queue.get_nowait()
+            except Empty:
+                break
+            if isinstance(item, dict):
+                pending.append(item)
+        for start in range(0, len(pending), self.batch_size):
+            self._insert(pending[start:start + self.batch_size])
+
+    def _start(self):
+        """Crea la cola y el hilo una vez por proceso (después del fork)"""
+        if self._pid == os.getpid():
+            return self._queue
+        with self._lock:
+            if self._pid != os.getpid():
+                self._queue = Queue(maxsize=self.queue_size)
+                self._thread = threading.Thread(
+                    target=self._run, args=(self._queue,), name='audit-log-writer', daemon=True
+                )
+                self._thread.start()
+                self._pid = os.getpid()
+        return self._queue
+
+    def _run(self, queue):
+        while True:
+            batch, markers, stop = self._collect(queue)
+            if batch:
+                self._insert(batch)
+            for marker in markers:
+                marker.set()
+            if stop:
+                return
+
+    def _collect(self, queue):
+        """
+        Junta registros hasta batch_size o hasta flush_interval desde el primero
+
+        Returns:
+            tuple: (registros, marcas de flush, si se pidió detener el hilo)
+        """
+        batch, markers = [], []
+        item = queue.get()
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            if item is _STOP:
+                return batch, markers, True
+            if isinstance(item, threading.Event):
+                # Todo lo encolado antes de la marca ya está en el lote
+                markers.append(item)
+                return batch, markers, False
+            batch.append(item)
+
+            remaining = deadline - time.monotonic()
+            if len(batch) >= self.batch_size or remaining <= 0:
+                return batch, markers, False
+            try:
+                item = queue.get(timeout=remaining)
+            except Empty:
+                return batch, markers, False
+
+    def _insert(self, batch):
+        """Inserta un lote; si falla, reintenta registro a registro"""
+        from models.database import db
+        from models.permission import AuditLog
+
+        with self.app.app_context():
+            try:
+                db.session.execute(db.insert(AuditLog), batch)
+                db.session.commit()
+                self.written += len(batch)
+                return
+            except Exception as e:
+                db.session.rollback()
+                self.app.logger.error(f"Error al insertar {len(batch)} registros de auditoría: {str(e)}")
+
+            for row in batch:
+                try:
+                    db.session.execute(db.insert(AuditLog), [row])
+                    db.session.commit()
+                    self.written += 1
+                except Exception:
+                    db.session.rollback()
+                    self.failed += 1
+
+# Escritor de auditoría del proceso
+audit_log_writer = AuditLogWriter()
+
+def init_audit_log(app):
+    """
+    Inicializa el escritor de auditoría con la aplicación Flask
+
+    Args:
+        app: Aplicación Flask
+
+    Returns:
+        AuditLogWriter: Escritor configurado
+    """
+    audit_log_writer.init_app(app)
+    return audit_log_writer
+
+# Particiones mensuales de audit_logs en PostgreSQL: audit_logs_AAAA_MM
+PARTITION_PATTERN = re.compile(r'^audit_logs_(\d{4})_(\d{2})$')
+# Partición de respaldo para las filas sin partición mensual
+DEFAULT_PARTITION = 'audit_logs_default'
+
+def month_start(value, offset=0):
+    """
+    Primer día del mes de una fecha, desplazado `offset` meses
+
+    Args:
+        value (datetime): Fecha de referencia
+        offset (int): Meses a sumar (negativo para restar)
+
+    Returns:
+        datetime: Inicio del mes resultante
+    """
+    months = value.year * 12 + value.month - 1 + offset
+    return datetime(months // 12, months % 12 + 1, 1)
+
+class AuditLogService:
+    """
+    Almacenamiento, retención y consulta de los registros de auditoría
+    """
+
+    @staticmethod
+    def is_partitioned():
+        """
+        Verifica si audit_logs es una tabla particionada (solo PostgreSQL)
+
+        Returns:
+            bool: True si la tabla está particionada por rango
+        """
+        from models.database import db
+
+        if db.engine.dialect.name != 'postgresql':
+            return False
+        return db.session.execute(db.text(
+            "SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid "
+            "WHERE c.relname = 'audit_logs'"
+        )).first() is not None
+
+    @staticmethod
+    def partition_name(month):
+        """Nombre de la partición de un mes"""
+        return f"audit_logs_{month:%Y_%m}"
+
+    @staticmethod
+    def create_partitions(first_month, last_month):
+        """
+        Crea las particiones mensuales que falten entre dos meses (incluidos)
+
+        Si la partición DEFAULT ya tiene filas de un mes, PostgreSQL no permite
+        crear su partición: se crea como tabla suelta, se mueven allí esas filas
+        y se adjunta, todo en la misma transacción.
+
+        Args:
+            first_month (datetime): Primer mes
+            last_month (datetime): Último mes
+
+        Returns:
+            list: Nombres de las particiones creadas
+        """
+        from flask import current_app
+        from models.database import db
+
+        children = AuditLogService._child_tables()
+        has_default = DEFAULT_PARTITION in children
+        created = []
+        month = month_start(first_month)
+        while month <= last_month:
+            name = AuditLogService.partition_name(month)
+            next_month = month_start(month, 1)
+            bounds = f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{next_month:%Y-%m-%d}')"
+            if name not in children:
+                in_default = has_default and db.session.execute(db.text(
+                    f"SELECT 1 FROM {DEFAULT_PARTITION} WHERE created_at >= :start AND created_at < :end LIMIT 1"
+                ), {'start': month, 'end': next_month}).first() is not None
+                if in_default:
+                    db.session.execute(db.text(
+                        f"CREATE TABLE {name} (LIKE audit_logs INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+                    ))
+                    moved = db.session.execute(db.text(
+                        f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+                        f"WHERE created_at >= :start AND created_at < :end RETURNING *) "
+                        f"INSERT INTO {name} SELECT * FROM moved"
+                    ), {'start': month, 'end': next_month}).rowcount
+                    db.session.execute(db.text(f"ALTER TABLE audit_logs ATTACH PARTITION {name} {bounds}"))
+                    current_app.logger.info(f"{moved} registros movidos de {DEFAULT_PARTITION} a {name}")
+                else:
+                    db.session.execute(db.text(f"CREATE TABLE {name} PARTITION OF audit_logs {bounds}"))
+                created.append(name)
+            month = next_month
+        db.session.commit()
+        return created
+
+    @staticmethod
+    def ensure_partitions(months_ahead=None, now=None):
+        """
+        Crea las particiones del mes actual y de los siguientes
+
+        Las inserciones nunca esperan a un DDL: la partición de cada mes existe
+        antes de que llegue. Sin particionado (SQLite) no hace nada.
+
+        Args:
+            months_ahead (int): Meses futuros (por defecto AUDIT_LOG_PARTITIONS_AHEAD)
+            now (datetime): Fecha de referencia (por defecto ahora)
+
+        Returns:
+            list: Nombres de las particiones creadas
+        """
+        from flask import current_app
+
+        if not AuditLogService.is_partitioned():
+            return []
+        if months_ahead is None:
+            months_ahead = current_app.config.get('AUDIT_LOG_PARTITIONS_AHEAD', 2)
+        now = now or datetime.utcnow()
+        return AuditLogService.create_partitions(month_start(now), month_start(now, months_ahead))
+
+    @staticmethod
+    def partitions():
+        """
+        Nombres de las particiones mensuales existentes (vacío sin particionado)
+
+        Returns:
+            list: Nombres ordenados por mes
+        """
+        return sorted(name for name in AuditLogService._child_tables() if PARTITION_PATTERN.match(name))
+
+    @staticmethod
+    def _child_tables():
+        """Nombres de todas las particiones de audit_logs, incluida la DEFAULT"""
+        from models.database import db
+
+        if db.engine.dialect.name != 'postgresql':
+            return set()
+        return set(db.session.execute(db.text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = 'audit_logs'"
+        )).scalars())
+
+    @staticmethod
+    def apply_retention(retention_months=None, now=None, batch_size=5000):
+        """
+        Elimina los registros de los meses fuera del periodo de retención
+
+        En PostgreSQL elimina las particiones completas (DROP TABLE, sin recorrer
+        filas) y borra las filas antiguas que hayan quedado en la partición
+        DEFAULT; sin particionado borra por lotes usando el índice de created_at.
+
+        Args:
+            retention_months (int): Meses completos a conservar además del actual
+                (por defecto AUDIT_LOG_RETENTION_MONTHS)
+            now (datetime): Fecha de referencia (por defecto ahora)
+            batch_size (int): Filas por DELETE sin particionado
+
+        Returns:
+            dict: {'cutoff': fecha de corte, 'partitions': eliminadas, 'rows': filas borradas}
+        """
+        from flask import current_app
+        from models.database import db
+        from models.permission import AuditLog
+
+        if retention_months is None:
+            retention_months = current_app.config.get('AUDIT_LOG_RETENTION_MONTHS', 12)
+        cutoff = month_start(now or datetime.utcnow(), -retention_months)
+        result = {'cutoff': cutoff, 'partitions': [], 'rows': 0}
+
+        if AuditLogService.is_partitioned():
+            children = AuditLogService._child_tables()
+            for name in sorted(name for name in children if PARTITION_PATTERN.match(name)):
+                year, month = PARTITION_PATTERN.match(name).groups()
+                if datetime(int(year), int(month), 1) < cutoff:
+                    db.session.execute(db.text(f"DROP TABLE {name}"))
+                    result['partitions'].append(name)
+            if DEFAULT_PARTITION in children:
+                result['rows'] = db.session.execute(db.text(
+                    f"DELETE FROM {DEFAULT_PARTITION} WHERE created_at < :cutoff"
+                ), {'cutoff': cutoff}).rowcount
+            db.session.commit()
+            return result
+
+        while True:
+            ids = db.select(AuditLog.id).where(AuditLog.created_at < cutoff).limit(batch_size)
+            deleted = db.session.execute(db.delete(AuditLog).where(AuditLog.id.in_(ids))).rowcount
+            db.session.commit()
+            result['rows'] += deleted
+            if deleted < batch_size:
+                return result
+
+    @staticmethod
+    def encode_cursor(log):
+        """Cursor opaco con la posición (created_at, id) de un registro"""
+        raw = f"{log.created_at.isoformat()}|{log.id}"
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor):
+        """
+        Decodifica un cursor de encode_cursor
+
+        Raises:
+            ValueError: Si el cursor no es válido
+        """
+        try:
+            created_at, log_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+            return datetime.fromisoformat(created_at), int(log_id)
+        except Exception:
+            raise ValueError('Cursor inválido')
+
+    @staticmethod
+    def query(user_id=None, entity_type=None, entity_id=None, action=None,
+              start=None, end=None, cursor=None, limit=100):
+        """
+        Consulta registros de auditoría del más reciente al más antiguo
+
+        La paginación es por keyset sobre (created_at, id): cada página es un
+        recorrido de índice acotado, sin OFFSET, aunque la tabla tenga decenas
+        de millones de filas. En PostgreSQL un rango de fechas solo lee las
+        particiones de esos meses.
+
+        Args:
+            user_id (int, optional): Acciones de un usuario
+            entity_type (str, optional): Tipo de entidad
+            entity_id (int, optional): ID de la entidad (junto con entity_type)
+            action (str, optional): Acción exacta
+            start (datetime, optional): Desde (incluido)
+            end (datetime, optional): Hasta (excluido)
+            cursor (str, optional): next_cursor de la página anterior
+            limit (int): Registros por página
+
+        Returns:
+            tuple: (lista de AuditLog, next_cursor o None)
+
+        Raises:
+            ValueError: Si el cursor no es válido
+        """
+        from models.database import db
+        from models.permission import AuditLog
+
+        query = AuditLog.query.options(db.selectinload(AuditLog.user))
+        if user_id is not None:
+            query = query.filter(AuditLog.user_id == user_id)
+        if entity_type is not None:
+            query = query.filter(AuditLog.entity_type == entity_type)
+        if entity_id is not None:
+            query = query.filter(AuditLog.entity_id == entity_id)
+        if action is not None:
+            query = query.filter(AuditLog.action == action)
+        if start is not None:
+            query = query.filter(AuditLog.created_at >= start)
+        if end is not None:
+            query = query.filter(AuditLog.created_at < end)
+        if cursor:
+            query = query.filter(db.tuple_(AuditLog.created_at, AuditLog.id) < AuditLogService.decode_cursor(cursor))
+
+        logs = query.order_by(AuditLog.created_at.desc(), AuditLog.id.desc()).limit(limit + 1).all()
+        next_cursor = AuditLogService.encode_cursor(logs[limit - 1]) if len(logs) > limit else None
+        return logs[:limit], next_cursor
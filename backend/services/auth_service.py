@@ -1,12 +1,41 @@
 """
 Servicio de autenticación
 """
+from flask import current_app
 from flask_jwt_extended import create_access_token, create_refresh_token
 from models.user import User
+from models.permission import permission_registry
 from models.database import db
 from datetime import datetime, timedelta
 
 class AuthService:
+    @staticmethod
+    def token_claims(user):
+        """
+        Claims de autorización que se firman en los tokens del usuario
+        
+        utils/decorators.py autoriza con estas claims sin consultar la base de
+        datos; los cambios de permisos de un rol se aplican al renovar el token.
+        Con JWT_PERMISSIONS_BITMASK los permisos viajan como máscara de bits
+        ('perm_mask', en hexadecimal, con su versión en 'perm_ver') en lugar
+        de la lista de nombres.
+        
+        Args:
+            user (User): Usuario autenticado
+            
+        Returns:
+            dict: Rol, email y permisos del usuario
+        """
+        claims = {'role': user.role, 'email': user.email}
+        
+        if current_app.config.get('JWT_PERMISSIONS_BITMASK'):
+            claims['perm_mask'] = format(permission_registry.mask_for(user.permission_names), 'x')
+            claims['perm_ver'] = permission_registry.mask_version()
+        else:
+            claims['permissions'] = sorted(user.permission_names)
+        
+        return claims
+    
     @staticmethod
     def authenticate(email, password):
         """
@@ -22,18 +51,12 @@ class AuthService:
             # Crear tokens
             access_token = create_access_token(
                 identity=str(user.id),
-                additional_claims={
-                    'role': user.role,
-                    'email': user.email
-                }
+                additional_claims=AuthService.token_claims(user)
             )
             
             refresh_token = create_refresh_token(
                 identity=str(user.id),
-                additional_claims={
-                    'role': user.role,
-                    'email': user.email
-                }
+                additional_claims=AuthService.token_claims(user)
             )
             
             return {
@@ -76,10 +99,7 @@ class AuthService:
         if user and user.is_active:
             access_token = create_access_token(
                 identity=str(user.id),
-                additional_claims={
-                    'role': user.role,
-                    'email': user.email
-                }
+                additional_claims=AuthService.token_claims(user)
             )
             
             return {
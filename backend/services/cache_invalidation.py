@@ -0,0 +1,76 @@
+"""
+Hooks de sesión que traducen los cambios de los modelos a etiquetas de caché
+
+Cada flush anota las etiquetas afectadas (eventos, visitantes, kioscos,
+permisos, usuarios) y al confirmar la transacción se invalidan con
+cache.invalidate_tags. init_cache registra los hooks.
+"""
+from flask import current_app, has_app_context
+from cache import invalidate_tags
+
+def _track_cache_tags(session, flush_context):
+    """Anota las etiquetas de caché afectadas por los cambios de la transacción"""
+    from models.event import Event
+    from models.kiosk import Kiosk, KioskConfig
+    from models.permission import Permission, Role
+    from models.user import User
+    from models.visitor import EventVisitor, Visitor, VisitorCheckIn
+    
+    tags = session.info.setdefault('cache_tags', set())
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, (VisitorCheckIn, EventVisitor)):
+            # Los registros cambian los contadores, no los datos de los eventos
+            tags.update(('visitors', 'event-stats', f"event:{obj.event_id}"))
+        elif isinstance(obj, Event):
+            tags.update(('events', f"event:{obj.id}"))
+            if obj in session.deleted:
+                # Los registros del evento se eliminan con él
+                tags.add('visitors')
+        elif isinstance(obj, Visitor):
+            tags.add('visitors')
+        elif isinstance(obj, Kiosk):
+            # El heartbeat no cambia lo que muestra el kiosco
+            if obj in session.dirty and _changed_attributes(obj) <= {'last_heartbeat'}:
+                continue
+            tags.add(f"kiosk:{obj.id}")
+        elif isinstance(obj, KioskConfig):
+            tags.add(f"kiosk:{obj.kiosk_id}")
+        elif isinstance(obj, (Role, Permission)):
+            # Recompila los permisos por rol (PermissionRegistry)
+            tags.add('permissions')
+        elif isinstance(obj, User) and obj not in session.new:
+            # Solo el rol y el estado afectan a la autorización (UserStateCache)
+            if obj in session.deleted or _changed_attributes(obj) & {'role', 'is_active'}:
+                tags.add(f"user:{obj.id}")
+    
+    # El dashboard solo depende de los check-ins nuevos
+    if any(isinstance(obj, VisitorCheckIn) for obj in session.new):
+        tags.add('dashboard')
+
+def _changed_attributes(obj):
+    """Atributos modificados de un objeto en el flush actual"""
+    from sqlalchemy import inspect
+    
+    return {attr.key for attr in inspect(obj).attrs if attr.history.has_changes()}
+
+def _invalidate_cache_tags(session):
+    """Invalida las etiquetas de caché cuando se confirma la transacción"""
+    tags = session.info.pop('cache_tags', None)
+    if tags and has_app_context():
+        try:
+            invalidate_tags(*tags)
+        except Exception as e:
+            current_app.logger.warning(f"No se pudo invalidar la caché ({', '.join(sorted(tags))}): {str(e)}")
+
+def _forget_cache_tags(session, previous_transaction):
+    session.info.pop('cache_tags', None)
+
+def listen_cache_invalidation():
+    """Registra los hooks de sesión que invalidan las etiquetas de caché"""
+    from sqlalchemy import event
+    from sqlalchemy.orm import Session
+    
+    if not event.contains(Session, 'after_flush', _track_cache_tags):
+        event.listen(Session, 'after_flush', _track_cache_tags)
+        event.listen(Session, 'after_commit', _invalidate_cache_tags)
+        event.listen(Session, 'after_soft_rollback', _forget_cache_tags)
@@ -0,0 +1,247 @@
+"""
+Difusión en tiempo real de registros y check-ins para el stream SSE
+
+Las rutas de registro y check-in publican un mensaje por cambio con el
+total actualizado de check-ins del evento; cada cliente conectado a
+/api/v1/stream/checkins tiene una cola acotada en el worker que atiende su
+conexión. Con Redis como backend de caché los mensajes se difunden a todos
+los workers por pub/sub; si no, solo llegan a los clientes del mismo proceso.
+
+El stream mantiene la conexión abierta, así que requiere un worker asíncrono
+(gunicorn con worker_class gevent, ver gunicorn.conf.py).
+"""
+import json
+import os
+import socket
+import threading
+import time
+from datetime import datetime
+from itertools import count
+from queue import Empty, Full, Queue
+from flask import current_app
+
+class CheckInBroadcaster:
+    """
+    Reparte los mensajes de check-in a los clientes conectados a este worker
+    """
+    
+    def __init__(self, queue_size=100):
+        self.queue_size = queue_size
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._sequence = count(1)
+    
+    def subscribe(self):
+        """
+        Registra un cliente
+        
+        Returns:
+            Queue: Cola donde el cliente recibe los mensajes
+        """
+        queue = Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers.add(queue)
+        return queue
+    
+    def unsubscribe(self, queue):
+        """Elimina un cliente"""
+        with self._lock:
+            self._subscribers.discard(queue)
+    
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+    
+    @property
+    def has_listeners(self):
+        """Indica si algún cliente puede recibir lo que se publique"""
+        return bool(self._subscribers)
+    
+    def publish(self, message):
+        """
+        Publica un mensaje a todos los clientes
+        
+        Args:
+            message (dict): Mensaje serializable a JSON
+        """
+        self._deliver(message)
+    
+    def start(self):
+        """Inicia la recepción de mensajes de otros workers (nada que hacer en el mismo proceso)"""
+    
+    def _deliver(self, message):
+        message = dict(message, id=next(self._sequence))
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for queue in subscribers:
+            try:
+                queue.put_nowait(message)
+            except Full:
+                # Cliente lento: se descarta su mensaje más antiguo
+                try:
+                    queue.get_nowait()
+                    queue.put_nowait(message)
+                except (Empty, Full):
+                    pass
+
+class RedisCheckInBroadcaster(CheckInBroadcaster):
+    """
+    Difusión entre workers con Redis pub/sub
+    
+    Cada proceso escucha el canal en un hilo propio (greenlet con gevent) que
+    se inicia con el primer cliente, después del fork de gunicorn. Los workers
+    con clientes conectados se anotan en el conjunto ordenado
+    "<canal>:listeners" con una caducidad que el hilo de escucha renueva, de
+    modo que publicar sin nadie escuchando en ningún worker no cuesta nada.
+    """
+    
+    def __init__(self, client, channel, queue_size=100, presence_ttl=60):
+        super().__init__(queue_size)
+        self.client = client
+        self.channel = channel
+        self.presence_ttl = presence_ttl
+        self._pid = None
+        self._start_lock = threading.Lock()
+        self._next_refresh = 0
+        self._remote_checked_at = 0
+        self._remote_listeners = False
+    
+    @property
+    def presence_key(self):
+        return f'{self.channel}:listeners'
+    
+    @property
+    def has_listeners(self):
+        """
+        Indica si algún worker tiene clientes conectados
+        
+        La consulta a Redis se reutiliza durante un segundo; si Redis no
+        responde se asume que sí para que el error se registre al publicar.
+        """
+        if self._subscribers:
+            return True
+        now = time.time()
+        if now - self._remote_checked_at >= 1:
+            try:
+                self._remote_listeners = self.client.zcount(self.presence_key, now, '+inf') > 0
+            except Exception:
+                self._remote_listeners = True
+            self._remote_checked_at = now
+        return self._remote_listeners
+    
+    def subscribe(self):
+        queue = super().subscribe()
+        self._refresh_presence(force=True)
+        return queue
+    
+    def unsubscribe(self, queue):
+        super().unsubscribe(queue)
+        if not self._subscribers:
+            self._refresh_presence(force=True)
+    
+    def publish(self, message):
+        """Publica el mensaje en el canal; el hilo de escucha de cada worker lo entrega"""
+        self.client.publish(self.channel, json.dumps(message))
+    
+    def start(self):
+        """Inicia el hilo de escucha una vez por proceso"""
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            threading.Thread(target=self._listen, name='checkin-stream', daemon=True).start()
+    
+    def _refresh_presence(self, force=False):
+        """Anota o retira este worker del conjunto de workers con clientes"""
+        now = time.time()
+        if not force and now < self._next_refresh:
+            return
+        self._next_refresh = now + self.presence_ttl / 3
+        member = f'{socket.gethostname()}:{os.getpid()}'
+        try:
+            if self._subscribers:
+                self.client.zadd(self.presence_key, {member: now + self.presence_ttl})
+            else:
+                self.client.zrem(self.presence_key, member)
+            # Entradas de workers que terminaron sin retirarse
+            self.client.zremrangebyscore(self.presence_key, '-inf', now)
+        except Exception:
+            pass
+    
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                while True:
+                    self._refresh_presence()
+                    message = pubsub.get_message(timeout=self.presence_ttl / 3)
+                    if message and message.get('type') == 'message':
+                        self._deliver(json.loads(message['data']))
+            except Exception:
+                time.sleep(1)
+
+# Difusor del proceso (se reemplaza en init_checkin_stream)
+checkin_broadcaster = CheckInBroadcaster()
+
+def init_checkin_stream(app):
+    """
+    Configura el difusor de check-ins según el backend de caché
+    
+    Args:
+        app: Aplicación Flask (con init_cache ya aplicado)
+        
+    Returns:
+        CheckInBroadcaster: Difusor configurado
+    """
+    from cache import get_redis_client
+    global checkin_broadcaster
+    
+    queue_size = app.config.get('CHECKIN_STREAM_QUEUE_SIZE', 100)
+    client = get_redis_client(app)
+    if client is not None:
+        checkin_broadcaster = RedisCheckInBroadcaster(
+            client,
+            app.config.get('CHECKIN_STREAM_CHANNEL', 'checkin-stream'),
+            queue_size,
+            presence_ttl=4 * app.config.get('CHECKIN_STREAM_HEARTBEAT', 15)
+        )
+    else:
+        checkin_broadcaster = CheckInBroadcaster(queue_size)
+    return checkin_broadcaster
+
+def publish_check_in(kind, event_id, visitor_id):
+    """
+    Publica un registro o check-in ya confirmado con el total de check-ins del evento
+    
+    Un registro suma uno al total (delta 1); un check-in solo marca la hora
+    de un registro existente (delta 0). El total se lee del contador
+    events.check_in_row_count por clave primaria. Sin clientes que puedan
+    recibirlo no se consulta nada ni se publica. Los errores se registran sin
+    afectar a la petición que originó el cambio.
+    
+    Args:
+        kind (str): 'registration' o 'check_in'
+        event_id (int): ID del evento
+        visitor_id (int): ID del visitante
+    """
+    from models.database import db
+    from models.event import Event
+    
+    if not checkin_broadcaster.has_listeners:
+        return
+    
+    try:
+        check_ins = db.session.query(Event.check_in_row_count).filter(Event.id == event_id).scalar() or 0
+        checkin_broadcaster.publish({
+            'type': kind,
+            'event_id': event_id,
+            'visitor_id': visitor_id,
+            'delta': 1 if kind == 'registration' else 0,
+            'check_ins': check_ins,
+            'timestamp': datetime.utcnow().isoformat()
+        })
+    except Exception as e:
+        current_app.logger.warning(f"No se pudo publicar el {kind} del evento {event_id}: {str(e)}")
@@ -2,25 +2,111 @@
 Servicio para el envío de correos electrónicos
 """
 import os
-import smtplib
+import threading
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from dotenv import load_dotenv
+from flask import current_app
+from services.smtp_pool import SMTPConnectionPool
 
 # Cargar variables de entorno
 load_dotenv()
 
+_smtp_pool = None
+_smtp_pool_lock = threading.Lock()
+
 def get_smtp_config():
-    """Obtener configuración de SMTP desde variables de entorno"""
+    """
+    Obtener la configuración de SMTP de la aplicación (claves MAIL_*)
+    
+    Es la única fuente de configuración de correo: la usan el pool del proceso,
+    los envíos masivos de invitaciones y las tareas de Celery.
+    """
+    config = current_app.config
     return {
-        'server': os.environ.get('SMTP_SERVER', 'smtp.gmail.com'),
-        'port': int(os.environ.get('SMTP_PORT', 587)),
-        'username': os.environ.get('SMTP_USERNAME', ''),
-        'password': os.environ.get('SMTP_PASSWORD', ''),
-        'from_email': os.environ.get('EMAIL_FROM', 'noreply@ccb.do'),
-        'from_name': os.environ.get('EMAIL_FROM_NAME', 'Centro Cultural Banreservas')
+        'server': config.get('MAIL_SERVER'),
+        'port': config.get('MAIL_PORT', 25),
+        'username': config.get('MAIL_USERNAME'),
+        'password': config.get('MAIL_PASSWORD'),
+        'use_tls': config.get('MAIL_USE_TLS', False),
+        'use_ssl': config.get('MAIL_USE_SSL', False),
+        'pool_size': config.get('MAIL_POOL_SIZE', 2),
+        'from_email': config.get('MAIL_DEFAULT_SENDER'),
+        'from_name': config.get('MAIL_SENDER_NAME', 'Centro Cultural Banreservas')
     }
 
+def is_simulated(config):
+    """
+    Indica si los correos deben simularse en lugar de enviarse
+    
+    Se simula en desarrollo, con MAIL_SUPPRESS_SEND y cuando no hay MAIL_SERVER.
+    """
+    if os.environ.get('FLASK_ENV') == 'development' or current_app.config.get('MAIL_SUPPRESS_SEND'):
+        return True
+    return not config['server']
+
+def get_smtp_pool():
+    """
+    Obtener el pool de conexiones SMTP del proceso (se crea al primer uso)
+    
+    En los workers de Celery cada proceso hijo crea el suyo (ver
+    reset_smtp_pool) y lo cierra al terminar (ver close_smtp_pool).
+    """
+    global _smtp_pool
+    with _smtp_pool_lock:
+        if _smtp_pool is None:
+            config = get_smtp_config()
+            _smtp_pool = SMTPConnectionPool(
+                config['server'],
+                config['port'],
+                username=config['username'],
+                password=config['password'],
+                use_tls=config['use_tls'],
+                use_ssl=config['use_ssl'],
+                size=config['pool_size']
+            )
+        return _smtp_pool
+
+def reset_smtp_pool():
+    """
+    Olvidar el pool heredado del proceso padre sin cerrar sus conexiones
+    
+    Tras un fork los sockets son compartidos: cerrarlos desde el hijo
+    terminaría también las sesiones del padre.
+    """
+    global _smtp_pool
+    with _smtp_pool_lock:
+        _smtp_pool = None
+
+def close_smtp_pool():
+    """Cerrar las conexiones del pool del proceso (se vuelve a crear al siguiente uso)"""
+    global _smtp_pool
+    with _smtp_pool_lock:
+        pool, _smtp_pool = _smtp_pool, None
+    if pool is not None:
+        pool.close()
+
+def build_message(to_email, subject, html_content, text_content=None, config=None):
+    """
+    Construir el mensaje MIME de un correo
+    
+    Returns:
+        MIMEMultipart: Mensaje listo para enviar
+    """
+    config = config or get_smtp_config()
+    
+    msg = MIMEMultipart('alternative')
+    msg['Subject'] = subject
+    msg['From'] = f"{config['from_name']} <{config['from_email']}>"
+    msg['To'] = to_email
+    
+    # Añadir contenido
+    if text_content:
+        msg.attach(MIMEText(text_content, 'plain'))
+    
+    msg.attach(MIMEText(html_content, 'html'))
+    return msg
+
 def send_email(to_email, subject, html_content, text_content=None):
     """
     Enviar un correo electrónico
@@ -34,8 +120,11 @@ def send_email(to_email, subject, html_content, text_content=None):
     Returns:
         bool: True si se envió correctamente, False si hubo un error
     """
-    # Simular envío para desarrollo
-    if os.environ.get('FLASK_ENV') == 'development':
+    # Obtener configuración
+    config = get_smtp_config()
+    
+    # Simular envío para desarrollo o sin configuración de SMTP
+    if is_simulated(config):
         print(f"\n===== CORREO SIMULADO =====")
         print(f"Para: {to_email}")
         print(f"Asunto: {subject}")
@@ -45,50 +134,20 @@ def send_email(to_email, subject, html_content, text_content=None):
         print("=============================\n")
         return True
     
-    # Obtener configuración
-    config = get_smtp_config()
-    
-    # Si no hay configuración de SMTP, simular el envío
-    if not config['username'] or not config['password']:
-        print(f"Simulando envío de correo a {to_email}: {subject}")
-        return True
-    
-    # Crear mensaje
-    msg = MIMEMultipart('alternative')
-    msg['Subject'] = subject
-    msg['From'] = f"{config['from_name']} <{config['from_email']}>"
-    msg['To'] = to_email
-    
-    # Añadir contenido
-    if text_content:
-        msg.attach(MIMEText(text_content, 'plain'))
-    
-    msg.attach(MIMEText(html_content, 'html'))
-    
-    # Enviar correo
+    # Enviar correo reutilizando una conexión del pool
     try:
-        with smtplib.SMTP(config['server'], config['port']) as server:
-            server.starttls()
-            server.login(config['username'], config['password'])
-            server.send_message(msg)
+        get_smtp_pool().send(build_message(to_email, subject, html_content, text_content, config))
         return True
     except Exception as e:
         print(f"Error al enviar correo: {str(e)}")
         return False
 
-def send_invitation_email(to_email, name, event_type, event_name, registration_code):
+def invitation_content(name, event_type, event_name, registration_code):
     """
-    Enviar correo de invitación a un evento
-    
-    Args:
-        to_email (str): Correo del visitante
-        name (str): Nombre del visitante
-        event_type (str): Tipo de evento (cine, exposición, etc.)
-        event_name (str): Nombre del evento
-        registration_code (str): Código de registro del visitante
+    Generar asunto y contenido de un correo de invitación
     
     Returns:
-        bool: True si se envió correctamente
+        tuple: (asunto, contenido HTML, contenido texto plano)
     """
     subject = f"Invitación a {event_name} - Centro Cultural Banreservas"
     
@@ -146,4 +205,20 @@ def send_invitation_email(to_email, name, event_type, event_name, registration_c
     Este es un correo automático. Por favor no responda a este mensaje.
     """
     
-    return send_email(to_email, subject, html_content, text_content)
+    return subject, html_content, text_content
+
+def send_invitation_email(to_email, name, event_type, event_name, registration_code):
+    """
+    Enviar correo de invitación a un evento
+    
+    Args:
+        to_email (str): Correo del visitante
+        name (str): Nombre del visitante
+        event_type (str): Tipo de evento (cine, exposición, etc.)
+        event_name (str): Nombre del evento
+        registration_code (str): Código de registro del visitante
+    
+    Returns:
+        bool: True si se envió correctamente
+    """
+    return send_email(to_email, *invitation_content(name, event_type, event_name, registration_code))
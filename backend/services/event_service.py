@@ -2,9 +2,10 @@
 Servicio para la gestión de eventos
 """
 from models.event import Event
+from models.visitor import EventVisitor, VisitorCheckIn
 from models.database import db
 from datetime import datetime
-from sqlalchemy import and_
+from sqlalchemy import and_, func, or_, select, update
 
 class EventService:
     """
@@ -44,6 +45,76 @@ class EventService:
         """
         return Event.query.get(event_id)
     
+    @staticmethod
+    def get_check_in_counts(event_ids=None):
+        """
+        Obtener el número de check-ins por evento en una sola consulta agregada
+        
+        Args:
+            event_ids (list, optional): IDs de eventos a considerar (None = todos)
+            
+        Returns:
+            dict: Diccionario {event_id: cantidad}; los eventos sin check-ins no aparecen
+        """
+        query = db.session.query(
+            VisitorCheckIn.event_id,
+            func.count(VisitorCheckIn.id)
+        )
+        
+        if event_ids is not None:
+            if not event_ids:
+                return {}
+            query = query.filter(VisitorCheckIn.event_id.in_(event_ids))
+        
+        return dict(query.group_by(VisitorCheckIn.event_id).all())
+    
+    @staticmethod
+    def get_visitors_count(event_id):
+        """
+        Obtener el número de visitantes asociados a un evento sin cargar la relación
+        """
+        return db.session.query(func.count(EventVisitor.id)).filter(
+            EventVisitor.event_id == event_id
+        ).scalar()
+    
+    @staticmethod
+    def reconcile_counters(event_ids=None):
+        """
+        Recalcula los contadores desnormalizados de los eventos desde
+        event_visitors y visitor_check_ins
+        
+        Args:
+            event_ids (list, optional): IDs de eventos a recalcular (None = todos)
+            
+        Returns:
+            int: Número de eventos actualizados
+        """
+        registrations = select(func.count(EventVisitor.id)).where(
+            EventVisitor.event_id == Event.id,
+            or_(EventVisitor.status.is_(None), EventVisitor.status != 'CANCELED')
+        ).scalar_subquery()
+        
+        checked_in = select(func.count(EventVisitor.id)).where(
+            EventVisitor.event_id == Event.id,
+            EventVisitor.status == 'CHECKED_IN'
+        ).scalar_subquery()
+        
+        check_ins = select(func.count(VisitorCheckIn.id)).where(
+            VisitorCheckIn.event_id == Event.id
+        ).scalar_subquery()
+        
+        stmt = update(Event).values(
+            registration_count=registrations,
+            checked_in_count=checked_in,
+            check_in_row_count=check_ins
+        )
+        if event_ids is not None:
+            stmt = stmt.where(Event.id.in_(event_ids))
+        
+        result = db.session.execute(stmt, execution_options={'synchronize_session': False})
+        db.session.commit()
+        return result.rowcount
+    
     @staticmethod
     def create_event(event_data):
         """
@@ -0,0 +1,481 @@
+"""
+Servicio para exportar visitantes
+
+Las exportaciones CSV se envían a medida que se leen las filas: la consulta usa
+yield_per (cursor de servidor en PostgreSQL) y el CSV se escribe en bloques
+pequeños, de modo que la memoria no depende del número de visitantes y el
+cliente recibe los primeros bytes de inmediato. Los archivos Excel se generan
+en segundo plano (tasks.export_event_excel) con xlsxwriter en modo constant_memory.
+Los reportes de eventos (tasks.generate_event_report) se escriben igual, fila a
+fila, en JSON o CSV y opcionalmente comprimidos con gzip.
+"""
+import csv
+import gzip
+import io
+import json
+import os
+import tempfile
+from datetime import datetime
+from itertools import groupby
+import xlsxwriter
+from flask import Response, current_app, stream_with_context
+from sqlalchemy import func
+from models.database import db
+from models.event import Event
+from models.visitor import EventVisitor, Visitor, VisitorCheckIn
+from services.search_service import SearchService
+
+# Filas leídas de la base de datos por lote
+EXPORT_YIELD_PER = 1000
+# Filas CSV escritas antes de enviar un bloque al cliente
+EXPORT_CHUNK_ROWS = 500
+
+# Filtros aceptados por la exportación de un evento
+EVENT_EXPORT_FILTERS = ('start_date', 'end_date', 'checked_in', 'search', 'sort_by', 'sort_order')
+EVENT_EXPORT_SORT_FIELDS = ('name', 'email', 'created_at', 'registration_code')
+
+EVENT_EXPORT_HEADERS = ['ID', 'Código de Registro', 'Nombre', 'Email', 'Teléfono',
+                        'Fecha de Registro', 'Check-In', 'Fecha Check-In', 'Kiosco']
+VISITOR_EXPORT_HEADERS = ['ID', 'Nombre', 'Email', 'Teléfono', 'Fecha de Registro', 'Check-ins']
+EVENT_REPORT_HEADERS = ['ID', 'Visitante', 'Email', 'Código', 'Fecha de Registro', 'Check-in', 'Estado']
+
+# Formatos de tasks.generate_event_report
+EVENT_REPORT_FORMATS = ('json', 'csv')
+
+class ExportService:
+    """
+    Clase de servicio para las exportaciones de visitantes
+    """
+
+    @staticmethod
+    def event_registrations_query(event_id):
+        """
+        Consulta de los registros de un evento (visitante + check-in) en un solo JOIN
+
+        Args:
+            event_id (int): ID del evento
+
+        Returns:
+            Query: Filas con los datos del visitante y de su check-in
+        """
+        return db.session.query(
+            Visitor.id,
+            Visitor.registration_code,
+            Visitor.name,
+            Visitor.email,
+            Visitor.phone,
+            Visitor.created_at,
+            VisitorCheckIn.check_in_time,
+            VisitorCheckIn.kiosk_id
+        ).join(
+            VisitorCheckIn, VisitorCheckIn.visitor_id == Visitor.id
+        ).filter(
+            VisitorCheckIn.event_id == event_id
+        )
+
+    @staticmethod
+    def filtered_event_registrations(event_id, filters):
+        """
+        Aplica los filtros de exportación a los registros de un evento
+
+        Args:
+            event_id (int): ID del evento
+            filters (dict): start_date, end_date (YYYY-MM-DD), checked_in ('true'/'false'),
+                search, sort_by y sort_order
+
+        Returns:
+            Query: Consulta de event_registrations_query filtrada y ordenada
+
+        Raises:
+            ValueError: Si alguna fecha no tiene el formato YYYY-MM-DD
+        """
+        query = ExportService.event_registrations_query(event_id)
+
+        if filters.get('start_date'):
+            date = datetime.strptime(filters['start_date'], '%Y-%m-%d')
+            query = query.filter(Visitor.created_at >= date)
+
+        if filters.get('end_date'):
+            date = datetime.strptime(filters['end_date'], '%Y-%m-%d').replace(hour=23, minute=59, second=59)
+            query = query.filter(Visitor.created_at <= date)
+
+        if filters.get('checked_in') is not None:
+            if str(filters['checked_in']).lower() == 'true':
+                query = query.filter(VisitorCheckIn.check_in_time.isnot(None))
+            else:
+                query = query.filter(VisitorCheckIn.check_in_time.is_(None))
+
+        if filters.get('search'):
+            query = query.filter(SearchService.visitor_search(filters['search'])[0])
+
+        sort_by = filters.get('sort_by') or 'created_at'
+        if sort_by in EVENT_EXPORT_SORT_FIELDS:
+            if filters.get('sort_order') == 'asc':
+                query = query.order_by(getattr(Visitor, sort_by))
+            else:
+                query = query.order_by(getattr(Visitor, sort_by).desc())
+
+        return query
+
+    @staticmethod
+    def registration_stats(query):
+        """
+        Calcula total de registros y de check-ins con una sola consulta agregada
+
+        Args:
+            query (Query): Consulta de event_registrations_query con los filtros aplicados
+
+        Returns:
+            tuple: (total, con check-in)
+        """
+        total, checked_in = query.order_by(None).with_entities(
+            func.count(VisitorCheckIn.id),
+            func.count(VisitorCheckIn.check_in_time)
+        ).one()
+        return total, checked_in or 0
+
+    @staticmethod
+    def registration_rows(query):
+        """
+        Genera las filas de exportación de event_registrations_query por lotes
+
+        Args:
+            query (Query): Consulta de event_registrations_query con los filtros aplicados
+
+        Yields:
+            list: Columnas de EVENT_EXPORT_HEADERS
+        """
+        for row in query.yield_per(EXPORT_YIELD_PER):
+            yield [
+                row.id,
+                row.registration_code,
+                row.name,
+                row.email,
+                row.phone,
+                row.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+                'Sí' if row.check_in_time else 'No',
+                row.check_in_time.strftime('%Y-%m-%d %H:%M:%S') if row.check_in_time else '',
+                f'Kiosco {row.kiosk_id}' if row.check_in_time else ''
+            ]
+
+    @staticmethod
+    def visitor_check_in_rows(visitor_query):
+        """
+        Genera una fila por visitante con sus check-ins, sin consultas por visitante
+
+        Los check-ins y los títulos de eventos se obtienen con un LEFT JOIN
+        ordenado por visitante y se agrupan mientras se recorren las filas.
+
+        Args:
+            visitor_query (Query): Consulta de Visitor con los filtros aplicados
+
+        Yields:
+            list: Columnas de VISITOR_EXPORT_HEADERS
+        """
+        rows = visitor_query.outerjoin(
+            VisitorCheckIn, VisitorCheckIn.visitor_id == Visitor.id
+        ).outerjoin(
+            Event, Event.id == VisitorCheckIn.event_id
+        ).with_entities(
+            Visitor.id,
+            Visitor.name,
+            Visitor.email,
+            Visitor.phone,
+            Visitor.created_at,
+            VisitorCheckIn.id.label('check_in_id'),
+            VisitorCheckIn.check_in_time,
+            Event.title
+        ).order_by(
+            None
+        ).order_by(
+            Visitor.created_at.desc(), Visitor.id.desc(), VisitorCheckIn.check_in_time
+        ).yield_per(EXPORT_YIELD_PER)
+
+        for _, visitor_rows in groupby(rows, key=lambda row: row.id):
+            first = next(visitor_rows)
+            check_in_info = [
+                f"{row.title or 'Evento desconocido'} "
+                f"({row.check_in_time.strftime('%Y-%m-%d %H:%M') if row.check_in_time else ''})"
+                for row in (first, *visitor_rows) if row.check_in_id is not None
+            ]
+            yield [
+                first.id,
+                first.name,
+                first.email or '',
+                first.phone or '',
+                first.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+                '; '.join(check_in_info) if check_in_info else 'Ninguno'
+            ]
+
+    @staticmethod
+    def export_folder():
+        """
+        Carpeta donde los workers dejan los archivos de exportación
+
+        Debe ser compartida entre los workers de Celery y los de la API
+        (EXPORTS_FOLDER); por defecto se usa el directorio temporal del sistema.
+        """
+        folder = current_app.config.get('EXPORTS_FOLDER') or os.path.join(tempfile.gettempdir(), 'visitor-exports')
+        os.makedirs(folder, exist_ok=True)
+        return folder
+
+    @staticmethod
+    def write_event_workbook(event, query, path):
+        """
+        Escribe la exportación Excel de un evento en un archivo
+
+        Usa el modo constant_memory de xlsxwriter: cada fila se vuelca a disco
+        al pasar a la siguiente, por lo que la memoria no depende del número
+        de registros. Las filas deben escribirse en orden.
+
+        Args:
+            event (Event): Evento exportado
+            query (Query): Consulta de filtered_event_registrations
+            path (str): Ruta del archivo .xlsx
+
+        Returns:
+            int: Número de registros escritos
+        """
+        total_visitors, checked_in_count = ExportService.registration_stats(query)
+        attendance_rate = (checked_in_count / total_visitors * 100) if total_visitors > 0 else 0
+
+        workbook = xlsxwriter.Workbook(path, {'constant_memory': True})
+        try:
+            # Formatos
+            header_format = workbook.add_format({
+                'bold': True,
+                'bg_color': '#F99D2A',  # Color CCB
+                'font_color': 'white',
+                'align': 'center',
+                'valign': 'vcenter',
+                'border': 1
+            })
+
+            info_format = workbook.add_format({
+                'bold': True,
+                'bg_color': '#00BDF2',  # Color CCB secundario
+                'font_color': 'white',
+                'align': 'left',
+                'valign': 'vcenter'
+            })
+
+            cell_format = workbook.add_format({
+                'align': 'left',
+                'valign': 'vcenter',
+                'border': 1
+            })
+
+            # Hoja de resumen
+            summary_sheet = workbook.add_worksheet('Resumen')
+            summary_sheet.set_column('A:A', 20)
+            summary_sheet.set_column('B:D', 30)
+
+            # Información del evento
+            summary_sheet.merge_range('A1:D1', 'INFORMACIÓN DEL EVENTO', info_format)
+            summary_sheet.write('A2', 'Evento:', header_format)
+            summary_sheet.merge_range('B2:D2', event.title, cell_format)
+            summary_sheet.write('A3', 'Descripción:', header_format)
+            summary_sheet.merge_range('B3:D3', event.description, cell_format)
+            summary_sheet.write('A4', 'Fecha:', header_format)
+            summary_sheet.merge_range('B4:D4', f"{event.start_date.strftime('%Y-%m-%d')} - {event.end_date.strftime('%Y-%m-%d')}", cell_format)
+            summary_sheet.write('A5', 'Ubicación:', header_format)
+            summary_sheet.merge_range('B5:D5', event.location, cell_format)
+
+            # Estadísticas
+            summary_sheet.merge_range('A7:D7', 'ESTADÍSTICAS', info_format)
+            summary_sheet.write('A8', 'Total Registrados:', header_format)
+            summary_sheet.write('B8', total_visitors, cell_format)
+            summary_sheet.write('A9', 'Total Check-ins:', header_format)
+            summary_sheet.write('B9', checked_in_count, cell_format)
+            summary_sheet.write('A10', 'Tasa de Asistencia:', header_format)
+            summary_sheet.write('B10', f'{attendance_rate:.1f}%', cell_format)
+
+            # Hoja de visitantes
+            visitors_sheet = workbook.add_worksheet('Visitantes')
+            column_widths = [5, 15, 25, 30, 15, 20, 10, 20, 10]
+            for col, width in enumerate(column_widths):
+                visitors_sheet.set_column(col, col, width)
+
+            visitors_sheet.write_row(0, 0, EVENT_EXPORT_HEADERS, header_format)
+
+            row = 0
+            for row, values in enumerate(ExportService.registration_rows(query), start=1):
+                visitors_sheet.write_row(row, 0, values, cell_format)
+
+            # Crear filtros
+            visitors_sheet.autofilter(0, 0, row, len(EVENT_EXPORT_HEADERS) - 1)
+        finally:
+            workbook.close()
+
+        return row
+
+    @staticmethod
+    def event_report_statistics(event_id):
+        """
+        Calcula las estadísticas del reporte de un evento con un solo GROUP BY por estado
+
+        Args:
+            event_id (int): ID del evento
+
+        Returns:
+            dict: total_registrations, checked_in, no_show, canceled y attendance_rate
+        """
+        counts = dict(db.session.query(
+            EventVisitor.status, func.count(EventVisitor.id)
+        ).filter(
+            EventVisitor.event_id == event_id
+        ).group_by(EventVisitor.status).all())
+
+        canceled = counts.get('CANCELED', 0)
+        checked_in = counts.get('CHECKED_IN', 0)
+        total = sum(counts.values()) - canceled
+        return {
+            'total_registrations': total,
+            'checked_in': checked_in,
+            'no_show': counts.get('NO_SHOW', 0),
+            'canceled': canceled,
+            'attendance_rate': round(checked_in / max(1, total) * 100, 2)
+        }
+
+    @staticmethod
+    def event_report_rows(event_id):
+        """
+        Genera los registros de un evento con los datos del visitante en el mismo JOIN
+
+        Args:
+            event_id (int): ID del evento
+
+        Yields:
+            dict: Registro del reporte
+        """
+        rows = db.session.query(
+            EventVisitor.id,
+            Visitor.name,
+            Visitor.email,
+            EventVisitor.registration_code,
+            EventVisitor.registration_date,
+            EventVisitor.check_in_time,
+            EventVisitor.status
+        ).outerjoin(
+            Visitor, Visitor.id == EventVisitor.visitor_id
+        ).filter(
+            EventVisitor.event_id == event_id
+        ).order_by(EventVisitor.id).yield_per(EXPORT_YIELD_PER)
+
+        for row in rows:
+            yield {
+                'id': row.id,
+                'visitor_name': row.name if row.name is not None else 'N/A',
+                'visitor_email': row.email if row.email is not None else 'N/A',
+                'registration_code': row.registration_code,
+                'registration_date': row.registration_date.isoformat() if row.registration_date else None,
+                'check_in_time': row.check_in_time.isoformat() if row.check_in_time else None,
+                'status': row.status
+            }
+
+    @staticmethod
+    def write_event_report(event, path, format='json', compress=False):
+        """
+        Escribe el reporte de un evento registro a registro
+
+        Las estadísticas se calculan antes de recorrer los registros, así que el
+        JSON se puede escribir de forma incremental sin guardar la lista en memoria.
+
+        Args:
+            event (Event): Evento del reporte
+            path (str): Ruta del archivo de salida
+            format (str): 'json' o 'csv'
+            compress (bool): Comprimir el archivo con gzip
+
+        Returns:
+            int: Número de registros escritos
+        """
+        if format not in EVENT_REPORT_FORMATS:
+            raise ValueError(f"Formato no soportado: {format}")
+
+        statistics = ExportService.event_report_statistics(event.id)
+        rows = ExportService.event_report_rows(event.id)
+        written = 0
+
+        opener = gzip.open if compress else open
+        with opener(path, 'wt', encoding='utf-8', newline='') as f:
+            if format == 'json':
+                f.write('{\n  "event": ')
+                f.write(json.dumps(event.to_dict()))
+                f.write(',\n  "statistics": ')
+                f.write(json.dumps(statistics))
+                f.write(',\n  "registrations": [')
+                for row in rows:
+                    f.write(',\n    ' if written else '\n    ')
+                    f.write(json.dumps(row))
+                    written += 1
+                f.write('\n  ]\n}\n' if written else ']\n}\n')
+            else:
+                writer = csv.writer(f)
+                writer.writerow(EVENT_REPORT_HEADERS)
+                for row in rows:
+                    writer.writerow([
+                        row['id'],
+                        row['visitor_name'],
+                        row['visitor_email'],
+                        row['registration_code'],
+                        row['registration_date'],
+                        row['check_in_time'] or 'N/A',
+                        row['status']
+                    ])
+                    written += 1
+
+        return written
+
+    @staticmethod
+    def iter_csv(rows, chunk_rows=EXPORT_CHUNK_ROWS):
+        """
+        Escribe filas CSV y las entrega en bloques de texto
+
+        Args:
+            rows (iterable): Filas a escribir (listas de valores)
+            chunk_rows (int): Filas por bloque
+
+        Yields:
+            str: Fragmento del archivo CSV
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        pending = 0
+
+        for row in rows:
+            writer.writerow(row)
+            pending += 1
+            if pending >= chunk_rows:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate(0)
+                pending = 0
+
+        if buffer.tell():
+            yield buffer.getvalue()
+
+    @staticmethod
+    def csv_response(header_rows, rows, filename):
+        """
+        Crea una respuesta CSV que se transmite a medida que se generan las filas
+
+        Args:
+            header_rows (list): Filas que se envían de inmediato (cabeceras, resumen)
+            rows (iterable): Filas de datos, normalmente un generador sobre la consulta
+            filename (str): Nombre del archivo descargado
+
+        Returns:
+            Response: Respuesta con el CSV por streaming
+        """
+        def generate():
+            # Las cabeceras salen en un bloque propio antes de leer datos
+            yield from ExportService.iter_csv(header_rows, chunk_rows=len(header_rows) or 1)
+            yield from ExportService.iter_csv(rows)
+
+        response = Response(stream_with_context(generate()), mimetype='text/csv')
+        response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+        response.headers['Content-type'] = 'text/csv; charset=utf-8'
+        # Evitar que proxies como nginx acumulen la respuesta completa
+        response.headers['X-Accel-Buffering'] = 'no'
+        return response
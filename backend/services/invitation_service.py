@@ -0,0 +1,148 @@
+"""
+Servicio para el envío masivo de invitaciones a eventos
+"""
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import exists, insert
+from models.database import db
+from models.event import Event
+from models.invitation_job import InvitationJob, InvitationResult
+from models.visitor import Visitor, VisitorCheckIn
+from services.email_service import build_message, get_smtp_config, get_smtp_pool, invitation_content, is_simulated
+
+# Visitantes leídos por consulta (registros existentes incluidos)
+INVITATION_PREFETCH_SIZE = 1000
+
+class InvitationService:
+    """
+    Clase de servicio para los envíos masivos de invitaciones
+    """
+
+    @staticmethod
+    def create_job(event_id, visitor_ids):
+        """
+        Registra un envío masivo pendiente
+
+        Args:
+            event_id (int): ID del evento
+            visitor_ids (list): IDs de los visitantes a invitar
+
+        Returns:
+            InvitationJob: Envío creado
+        """
+        job = InvitationJob(event_id=event_id)
+        job.recipients = list(dict.fromkeys(int(visitor_id) for visitor_id in visitor_ids))
+        db.session.add(job)
+        db.session.commit()
+        return job
+
+    @staticmethod
+    def process_job(job_id, pool=None):
+        """
+        Envía las invitaciones de un envío masivo
+
+        Por cada bloque de visitantes se hace una sola consulta que incluye si
+        ya están registrados en el evento; los correos se envían por lotes
+        sobre el pool de conexiones SMTP y cada resultado queda registrado.
+
+        Args:
+            job_id (str): ID del envío
+            pool (SMTPConnectionPool): Pool a usar (por defecto el del proceso)
+
+        Returns:
+            InvitationJob: Envío actualizado
+        """
+        job = db.session.get(InvitationJob, job_id)
+        if not job:
+            raise ValueError(f"No se encontró el envío de invitaciones {job_id}")
+
+        event = db.session.get(Event, job.event_id)
+        if not event:
+            raise ValueError(f"No se encontró el evento con ID {job.event_id}")
+
+        job.status = InvitationJob.STATUS_RUNNING
+        job.started_at = datetime.utcnow()
+        db.session.commit()
+
+        config = get_smtp_config()
+        simulated = pool is None and is_simulated(config)
+        pool = pool or get_smtp_pool()
+        batch_size = current_app.config.get('INVITATION_BATCH_SIZE', 50)
+        rate_limit = current_app.config.get('INVITATION_RATE_LIMIT')
+
+        recipients = job.recipients
+        for start in range(0, len(recipients), INVITATION_PREFETCH_SIZE):
+            chunk = recipients[start:start + INVITATION_PREFETCH_SIZE]
+            results = InvitationService._send_chunk(job, event, chunk, pool, config, simulated, batch_size, rate_limit)
+
+            db.session.execute(insert(InvitationResult), results)
+            for result in results:
+                if result['status'] == InvitationResult.STATUS_SENT:
+                    job.sent += 1
+                elif result['status'] == InvitationResult.STATUS_SKIPPED:
+                    job.skipped += 1
+                else:
+                    job.failed += 1
+            db.session.commit()
+
+        job.status = InvitationJob.STATUS_COMPLETED
+        job.completed_at = datetime.utcnow()
+        db.session.commit()
+        return job
+
+    @staticmethod
+    def _send_chunk(job, event, visitor_ids, pool, config, simulated, batch_size, rate_limit):
+        """
+        Envía las invitaciones de un bloque de visitantes
+
+        Returns:
+            list: Filas para invitation_results
+        """
+        registered = exists().where(
+            VisitorCheckIn.visitor_id == Visitor.id,
+            VisitorCheckIn.event_id == event.id
+        )
+        visitors = db.session.query(
+            Visitor.id, Visitor.name, Visitor.email, Visitor.registration_code, registered.label('registered')
+        ).filter(Visitor.id.in_(visitor_ids)).all()
+
+        now = datetime.utcnow()
+        results = {}
+        emails = {}
+        messages = []
+
+        def record(visitor_id, status, message):
+            results[visitor_id] = {
+                'job_id': job.id,
+                'visitor_id': visitor_id,
+                'email': emails.get(visitor_id),
+                'status': status,
+                'message': message[:500] if message else None,
+                'processed_at': now
+            }
+
+        for visitor in visitors:
+            emails[visitor.id] = visitor.email
+            if visitor.registered:
+                record(visitor.id, InvitationResult.STATUS_SKIPPED, "El visitante ya está registrado para este evento")
+            elif not visitor.email:
+                record(visitor.id, InvitationResult.STATUS_FAILED, "El visitante no tiene correo electrónico")
+            else:
+                content = invitation_content(visitor.name, event.event_type, event.title, visitor.registration_code)
+                messages.append((visitor.id, build_message(visitor.email, *content, config=config)))
+
+        if simulated:
+            for visitor_id, _ in messages:
+                record(visitor_id, InvitationResult.STATUS_SENT, "Invitación simulada (SMTP no configurado)")
+        else:
+            for visitor_id, sent, error in pool.send_many(messages, batch_size=batch_size, rate_limit=rate_limit):
+                if sent:
+                    record(visitor_id, InvitationResult.STATUS_SENT, "Invitación enviada exitosamente")
+                else:
+                    record(visitor_id, InvitationResult.STATUS_FAILED, f"Error al enviar invitación: {error}")
+
+        for visitor_id in visitor_ids:
+            if visitor_id not in results:
+                record(visitor_id, InvitationResult.STATUS_FAILED, "No se encontró el visitante")
+
+        return [results[visitor_id] for visitor_id in visitor_ids]
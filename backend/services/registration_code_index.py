@@ -0,0 +1,137 @@
+"""
+Índice en memoria de códigos de registro para la verificación del kiosco
+
+Lo consulta services.visitor_service.VisitorService.verify_code; se configura
+y precarga con init_registration_code_index al crear la aplicación.
+"""
+
+class RegistrationCodeIndex:
+    """
+    Índice en memoria (por proceso) de código de registro -> ID de visitante
+    
+    Evita la búsqueda por código en la base de datos durante las ráfagas de
+    escaneos del kiosco. Solo guarda el ID: los registros y su estado de
+    check-in se leen siempre de la base de datos, por clave primaria. Se
+    precarga con los visitantes registrados en eventos activos y se mantiene
+    al día con los hooks de sesión de SQLAlchemy al confirmar altas y bajas
+    de visitantes. Las entradas obsoletas se descartan cuando la consulta por
+    ID no las confirma.
+    """
+    
+    def __init__(self, max_size=200000):
+        self.max_size = max_size
+        self._codes = {}
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, code):
+        """
+        Obtiene el ID de visitante asociado a un código
+        
+        Args:
+            code (str): Código de registro normalizado
+            
+        Returns:
+            int: ID del visitante o None si no está en el índice
+        """
+        visitor_id = self._codes.get(code)
+        if visitor_id is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return visitor_id
+    
+    def add(self, code, visitor_id):
+        """Agrega o actualiza un código en el índice"""
+        if code and (code in self._codes or len(self._codes) < self.max_size):
+            self._codes[code] = visitor_id
+    
+    def discard(self, code):
+        """Elimina un código del índice si existe"""
+        self._codes.pop(code, None)
+    
+    def clear(self):
+        """Vacía el índice"""
+        self._codes = {}
+    
+    def __len__(self):
+        return len(self._codes)
+    
+    def warm(self):
+        """
+        Precarga los códigos de los visitantes registrados en eventos activos
+        
+        Returns:
+            int: Número de códigos cargados
+        """
+        from models.database import db
+        from models.event import Event
+        from models.visitor import Visitor, VisitorCheckIn, EventVisitor
+        
+        check_ins = db.select(Visitor.registration_code, Visitor.id).join(
+            VisitorCheckIn, VisitorCheckIn.visitor_id == Visitor.id
+        ).join(Event, Event.id == VisitorCheckIn.event_id).where(Event.is_active == True)
+        registrations = db.select(Visitor.registration_code, Visitor.id).join(
+            EventVisitor, EventVisitor.visitor_id == Visitor.id
+        ).join(Event, Event.id == EventVisitor.event_id).where(Event.is_active == True)
+        
+        rows = db.session.execute(db.union(check_ins, registrations).limit(self.max_size))
+        # Reemplazar el diccionario completo para no dejar lecturas a medias
+        self._codes = {code: visitor_id for code, visitor_id in rows}
+        return len(self._codes)
+
+# Índice global de códigos de registro (uno por worker)
+registration_code_index = RegistrationCodeIndex()
+
+def _track_visitor_changes(session, flush_context):
+    """Anota los visitantes creados o eliminados en la transacción actual"""
+    from models.visitor import Visitor
+    
+    pending = session.info.setdefault('registration_code_changes', [])
+    pending.extend(('add', obj.registration_code, obj.id) for obj in session.new if isinstance(obj, Visitor))
+    pending.extend(('discard', obj.registration_code, obj.id) for obj in session.deleted if isinstance(obj, Visitor))
+
+def _apply_visitor_changes(session):
+    """Aplica al índice los cambios de visitantes ya confirmados"""
+    for action, code, visitor_id in session.info.pop('registration_code_changes', []):
+        if action == 'add':
+            registration_code_index.add(code, visitor_id)
+        else:
+            registration_code_index.discard(code)
+
+def _discard_visitor_changes(session, previous_transaction):
+    """Olvida los cambios de visitantes de una transacción revertida"""
+    session.info.pop('registration_code_changes', None)
+
+def init_registration_code_index(app):
+    """
+    Configura el índice de códigos de registro y lo precarga
+    
+    Args:
+        app: Aplicación Flask
+        
+    Returns:
+        RegistrationCodeIndex: Índice configurado
+    """
+    from sqlalchemy import event
+    from sqlalchemy.orm import Session
+    from models.database import db
+    
+    registration_code_index.max_size = app.config.get('REGISTRATION_CODE_CACHE_SIZE', registration_code_index.max_size)
+    
+    # Mantener el índice al día con las altas y bajas confirmadas
+    if not event.contains(Session, 'after_flush', _track_visitor_changes):
+        event.listen(Session, 'after_flush', _track_visitor_changes)
+        event.listen(Session, 'after_commit', _apply_visitor_changes)
+        event.listen(Session, 'after_soft_rollback', _discard_visitor_changes)
+    
+    with app.app_context():
+        try:
+            loaded = registration_code_index.warm()
+            app.logger.info(f"Índice de códigos de registro precargado con {loaded} códigos")
+        except Exception as e:
+            # La base de datos puede no estar creada todavía; el índice se llenará con los registros
+            db.session.rollback()
+            app.logger.warning(f"No se pudo precargar el índice de códigos: {str(e)}")
+    
+    return registration_code_index
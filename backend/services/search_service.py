@@ -0,0 +1,86 @@
+"""
+Servicio de búsqueda de visitantes
+
+Centraliza la búsqueda por nombre, email, teléfono y código de registro para
+que todos los endpoints usen los índices de texto en lugar de LIKE '%término%'
+sobre la tabla completa:
+
+- PostgreSQL: ILIKE sobre columnas con índices GIN de trigramas (pg_trgm).
+- SQLite: MATCH sobre la tabla FTS5 visitors_fts (tokenizador de trigramas).
+
+Los índices se crean junto con la tabla visitors (ver models/visitor.py) o con
+migrations/add_visitor_search_index.py en bases de datos existentes.
+"""
+from sqlalchemy import case, func, inspect, or_, select, text
+from models.database import db
+from models.visitor import Visitor
+
+# El tokenizador de trigramas no puede buscar términos más cortos
+FTS_MIN_TERM_LENGTH = 3
+
+class SearchService:
+    """
+    Clase de servicio para la búsqueda de visitantes
+    """
+
+    # Motores (por URL) que ya tienen la tabla visitors_fts
+    _fts_available = {}
+
+    @staticmethod
+    def visitor_search(term):
+        """
+        Construye el filtro y la relevancia para buscar visitantes
+
+        Args:
+            term (str): Término de búsqueda
+
+        Returns:
+            tuple: (condición, relevancia). La relevancia es mayor para
+            coincidencias exactas de código (3) y email (2), luego para nombres
+            que empiezan por el término (1); ordenar de forma descendente.
+        """
+        term = (term or '').strip()
+        condition = SearchService._match_condition(term)
+        rank = case(
+            (func.upper(Visitor.registration_code) == term.upper(), 3),
+            (func.lower(Visitor.email) == term.lower(), 2),
+            (Visitor.name.ilike(f'{SearchService._escape_like(term)}%', escape='\\'), 1),
+            else_=0
+        )
+        return condition, rank
+
+    @staticmethod
+    def _match_condition(term):
+        """
+        Obtiene la condición de coincidencia según el motor de base de datos
+        """
+        if (db.engine.dialect.name == 'sqlite'
+                and len(term) >= FTS_MIN_TERM_LENGTH
+                and SearchService._has_fts_table()):
+            phrase = '"' + term.replace('"', '""') + '"'
+            return Visitor.id.in_(
+                select(text('rowid')).select_from(text('visitors_fts'))
+                .where(text('visitors_fts MATCH :search_phrase').bindparams(search_phrase=phrase))
+            )
+
+        # PostgreSQL usa los índices de trigramas con ILIKE
+        pattern = f'%{SearchService._escape_like(term)}%'
+        return or_(
+            Visitor.name.ilike(pattern, escape='\\'),
+            Visitor.email.ilike(pattern, escape='\\'),
+            Visitor.phone.ilike(pattern, escape='\\'),
+            Visitor.registration_code.ilike(pattern, escape='\\')
+        )
+
+    @staticmethod
+    def _escape_like(term):
+        """Escapa los comodines de LIKE en el término"""
+        return term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+    @staticmethod
+    def _has_fts_table():
+        """Comprueba (una vez por motor) si existe la tabla visitors_fts"""
+        engine_key = str(db.engine.url)
+        if engine_key not in SearchService._fts_available:
+            SearchService._fts_available[engine_key] = inspect(db.engine).has_table('visitors_fts')
+        return SearchService._fts_available[engine_key]
@@ -0,0 +1,104 @@
+"""
+Valores cacheados que se recalculan en un solo worker a la vez
+
+Las entradas se validan con las generaciones de cache.py: bump_generation
+(o invalidate_tags) con el mismo nombre las deja obsoletas. Las usa el
+dashboard de analíticas (api/dashboard_analytics.py).
+"""
+import time
+import uuid
+from flask import current_app
+from cache import cache, get_generation
+
+def _record_metric(name, metric, amount=1):
+    cache.cache.inc(f"metrics/{name}/{metric}", amount)
+
+def get_cache_metrics(name):
+    """
+    Obtiene las métricas de uso de un conjunto cacheado con get_or_recompute
+    
+    Args:
+        name (str): Nombre del conjunto
+        
+    Returns:
+        dict: hits, stale_hits, misses, recomputes, tiempos de recálculo y generación
+    """
+    metrics = {
+        metric: cache.get(f"metrics/{name}/{metric}") or 0
+        for metric in ('hits', 'stale_hits', 'misses', 'recomputes', 'recompute_ms_total', 'last_recompute_ms')
+    }
+    metrics['avg_recompute_ms'] = round(metrics['recompute_ms_total'] / metrics['recomputes'], 1) if metrics['recomputes'] else 0
+    metrics['generation'] = get_generation(name)
+    return metrics
+
+def get_or_recompute(name, compute, timeout=60, stale_timeout=600, lock_timeout=30, wait_timeout=5):
+    """
+    Obtiene un valor cacheado recalculándolo en un solo worker a la vez
+    
+    La entrada es fresca si no superó `timeout` y su generación coincide con
+    la actual. Si no lo es, el worker que obtiene el candado recalcula y el
+    resto devuelve el valor anterior (hasta `stale_timeout`). Sin valor
+    anterior, los demás esperan hasta `wait_timeout` a que termine el cálculo.
+    
+    Args:
+        name (str): Nombre del conjunto cacheado
+        compute (callable): Función que calcula el valor (serializable)
+        timeout (int): Segundos en que la entrada se considera fresca
+        stale_timeout (int): Segundos adicionales en que se sirve el valor anterior
+        lock_timeout (int): Duración máxima del candado de recálculo
+        wait_timeout (int): Espera máxima sin valor anterior
+        
+    Returns:
+        object: Valor calculado o cacheado
+    """
+    entry_key = f"single_flight/{name}"
+    lock_key = f"single_flight/{name}/lock"
+    
+    try:
+        generation = get_generation(name)
+        entry = cache.get(entry_key)
+    except Exception as e:
+        # Sin backend de caché disponible se calcula directamente
+        current_app.logger.warning(f"Caché no disponible para '{name}': {str(e)}")
+        return compute()
+    
+    if entry and entry['generation'] == generation and entry['expires_at'] > time.time():
+        _record_metric(name, 'hits')
+        return entry['value']
+    
+    deadline = time.time() + wait_timeout
+    while True:
+        token = uuid.uuid4().hex
+        if cache.add(lock_key, token, timeout=lock_timeout):
+            try:
+                _record_metric(name, 'misses')
+                started = time.perf_counter()
+                value = compute()
+                elapsed_ms = int((time.perf_counter() - started) * 1000)
+                cache.set(entry_key, {
+                    'value': value,
+                    'generation': generation,
+                    'expires_at': time.time() + timeout
+                }, timeout=timeout + stale_timeout)
+                _record_metric(name, 'recomputes')
+                _record_metric(name, 'recompute_ms_total', elapsed_ms)
+                cache.set(f"metrics/{name}/last_recompute_ms", elapsed_ms, timeout=0)
+                return value
+            finally:
+                # Liberar el candado solo si sigue siendo nuestro
+                if cache.get(lock_key) == token:
+                    cache.delete(lock_key)
+        
+        # Otro worker está recalculando: servir el valor anterior si existe
+        if entry:
+            _record_metric(name, 'stale_hits')
+            return entry['value']
+        
+        if time.time() >= deadline:
+            _record_metric(name, 'misses')
+            return compute()
+        time.sleep(0.05)
+        entry = cache.get(entry_key)
+        if entry and entry['generation'] == get_generation(name):
+            _record_metric(name, 'hits')
+            return entry['value']
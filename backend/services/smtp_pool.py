@@ -0,0 +1,193 @@
+"""
+Pool de conexiones SMTP persistentes para envíos masivos
+
+Cada conexión se abre, negocia STARTTLS e inicia sesión una sola vez y luego
+se reutiliza para muchos mensajes. Si el servidor cierra una conexión, se
+reconecta y se reintenta el mensaje una vez.
+"""
+import smtplib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from queue import Empty, LifoQueue
+
+# Errores que indican que la conexión ya no sirve (se reconecta y reintenta)
+CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, ConnectionError, TimeoutError)
+
+class RateLimiter:
+    """
+    Limita el número de mensajes por segundo entre todos los hilos
+    """
+
+    def __init__(self, rate):
+        """
+        Args:
+            rate (float): Mensajes por segundo (None o 0 = sin límite)
+        """
+        self.interval = 1.0 / rate if rate else 0
+        self._next_slot = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        """Bloquea hasta que se pueda enviar el siguiente mensaje"""
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next_slot, now)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+class PooledConnection:
+    """
+    Conexión SMTP del pool que se reabre si el servidor la cierra
+    """
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.smtp = None
+
+    def send(self, message):
+        """
+        Envía un mensaje, reconectando una vez si la conexión se perdió
+
+        Args:
+            message (EmailMessage): Mensaje con From/To ya definidos
+        """
+        for attempt in range(2):
+            if self.smtp is None:
+                self.smtp = self.pool.connect()
+            try:
+                self.smtp.send_message(message)
+                return
+            except CONNECTION_ERRORS:
+                self.close()
+                if attempt:
+                    raise
+
+    def close(self):
+        """Cierra la conexión sin propagar errores"""
+        if self.smtp is not None:
+            try:
+                self.smtp.quit()
+            except Exception:
+                pass
+            self.smtp = None
+
+class SMTPConnectionPool:
+    """
+    Pool de conexiones SMTP autenticadas y reutilizables
+
+    Es seguro entre hilos: cada hilo toma una conexión, envía un lote y la
+    devuelve. Como mucho se abren `size` conexiones a la vez.
+    """
+
+    def __init__(self, server, port, username=None, password=None, use_tls=False, use_ssl=False,
+                 size=4, timeout=30):
+        self.server = server
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.use_ssl = use_ssl
+        self.size = size
+        self.timeout = timeout
+        self._idle = LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self.connections_opened = 0
+
+    def connect(self):
+        """
+        Abre una conexión nueva (STARTTLS e inicio de sesión si corresponde)
+
+        Returns:
+            smtplib.SMTP: Conexión lista para enviar
+        """
+        if self.use_ssl:
+            smtp = smtplib.SMTP_SSL(self.server, self.port, timeout=self.timeout)
+        else:
+            smtp = smtplib.SMTP(self.server, self.port, timeout=self.timeout)
+            if self.use_tls:
+                smtp.starttls()
+        if self.username and self.password:
+            smtp.login(self.username, self.password)
+        self.connections_opened += 1
+        return smtp
+
+    @contextmanager
+    def connection(self):
+        """
+        Toma una conexión del pool y la devuelve al terminar
+
+        Yields:
+            PooledConnection: Conexión para enviar mensajes
+        """
+        self._slots.acquire()
+        try:
+            try:
+                connection = self._idle.get_nowait()
+            except Empty:
+                connection = PooledConnection(self)
+            try:
+                yield connection
+            except Exception:
+                connection.close()
+                raise
+            self._idle.put(connection)
+        finally:
+            self._slots.release()
+
+    def send(self, message):
+        """
+        Envía un único mensaje con una conexión del pool
+        """
+        with self.connection() as connection:
+            connection.send(message)
+
+    def send_many(self, messages, batch_size=50, rate_limit=None):
+        """
+        Envía mensajes en lotes repartidos entre las conexiones del pool
+
+        Args:
+            messages (list): Tuplas (clave, EmailMessage); la clave identifica al destinatario
+            batch_size (int): Mensajes enviados por conexión antes de devolverla al pool
+            rate_limit (float): Máximo de mensajes por segundo (None = sin límite)
+
+        Returns:
+            list: Tuplas (clave, enviado, error) en el orden de los mensajes
+        """
+        limiter = RateLimiter(rate_limit)
+        batches = [messages[start:start + batch_size] for start in range(0, len(messages), batch_size)]
+
+        def send_batch(batch):
+            results = []
+            try:
+                with self.connection() as connection:
+                    for key, message in batch:
+                        limiter.wait()
+                        try:
+                            connection.send(message)
+                            results.append((key, True, None))
+                        except CONNECTION_ERRORS:
+                            raise
+                        except Exception as e:
+                            # Rechazo del destinatario u otro error del mensaje: se sigue con el lote
+                            results.append((key, False, str(e)))
+            except Exception as e:
+                # La conexión no se pudo recuperar: el resto del lote falla
+                sent = {key for key, _, _ in results}
+                results.extend((key, False, str(e)) for key, _ in batch if key not in sent)
+            return results
+
+        with ThreadPoolExecutor(max_workers=self.size) as executor:
+            return [result for batch_results in executor.map(send_batch, batches) for result in batch_results]
+
+    def close(self):
+        """Cierra todas las conexiones inactivas"""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except Empty:
+                return
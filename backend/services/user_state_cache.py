@@ -0,0 +1,81 @@
+"""
+Caché por worker del estado de autorización de los usuarios
+
+La consultan los decoradores de utils/decorators.py; init_cache la suscribe
+al canal de invalidaciones y aplica AUTHZ_USER_CACHE_TTL.
+"""
+import threading
+import time
+
+class UserStateCache:
+    """
+    Estado de autorización de los usuarios (rol y si está activo) por worker
+    
+    Los decoradores de utils/decorators.py confían en el rol y los permisos
+    firmados en el token y solo consultan aquí si el usuario sigue activo con
+    ese rol. Los cambios en un usuario llegan como la etiqueta 'user:{id}' por
+    el canal de invalidaciones; el TTL acota la revocación si se pierde un
+    mensaje.
+    """
+    
+    def __init__(self, ttl=30):
+        self.ttl = ttl
+        self._entries = {}  # user_id -> (expira, estado)
+        self._lock = threading.Lock()
+        self.version = 0
+    
+    def get(self, user_id):
+        """
+        Obtiene el estado de un usuario, consultándolo si no está o expiró
+        
+        Args:
+            user_id (int): ID del usuario
+            
+        Returns:
+            dict: {'role': str, 'is_active': bool}, o None si el usuario no existe
+        """
+        entry = self._entries.get(user_id)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
+        
+        version = self.version
+        state = self._load(user_id)
+        if self.ttl:
+            with self._lock:
+                # Una invalidación durante la consulta deja el estado leído obsoleto
+                if version == self.version:
+                    self._entries[user_id] = (time.monotonic() + self.ttl, state)
+        return state
+    
+    def invalidate(self, tags):
+        """
+        Descarta los usuarios con etiqueta 'user:{id}' entre las invalidadas
+        
+        Args:
+            tags (iterable): Etiquetas invalidadas (None = todos los usuarios)
+        """
+        with self._lock:
+            self.version += 1
+            if tags is None:
+                self._entries.clear()
+                return
+            for tag in tags:
+                if tag.startswith('user:'):
+                    self._entries.pop(int(tag[5:]), None)
+    
+    def _load(self, user_id):
+        from models.database import db
+        from models.user import User
+        
+        row = db.session.execute(
+            db.select(User.role, User.is_active).where(User.id == user_id)
+        ).first()
+        if row is None:
+            return None
+        return {'role': row.role, 'is_active': bool(row.is_active)}
+    
+    def __len__(self):
+        return len(self._entries)
+
+# Estado de autorización de los usuarios (uno por worker)
+user_state_cache = UserStateCache()
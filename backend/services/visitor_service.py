@@ -1,9 +1,16 @@
 """
 Servicio para la gestión de visitantes
 """
+import re
 from models.visitor import Visitor, VisitorCheckIn
+from models.event import Event
 from models.database import db
 from datetime import datetime
+from sqlalchemy import and_, case, func, or_, select
+from services.registration_code_index import registration_code_index
+
+# Caracteres aceptados en un teléfono ingresado en el kiosco
+PHONE_PATTERN = re.compile(r'^\+?[\d\s().-]{7,20}$')
 
 class VisitorService:
     """
@@ -111,3 +118,211 @@ class VisitorService:
         
         result = query.first()
         return {'total_check_ins': result.total_check_ins if result else 0}
+    
+    @staticmethod
+    def classify_lookup(raw):
+        """
+        Clasifica el texto ingresado en el kiosco una sola vez
+        
+        Un mismo valor puede ser candidato a varios criterios (por ejemplo,
+        "123456" puede ser un código, un ID o un teléfono).
+        
+        Args:
+            raw (str): Texto escaneado o escrito por el visitante
+            
+        Returns:
+            dict: Criterios candidatos (code, id, email, phone)
+        """
+        value = (raw or '').strip()
+        criteria = {}
+        if not value:
+            return criteria
+        
+        if '@' in value:
+            criteria['email'] = value.lower()
+            return criteria
+        
+        if value.isalnum() and len(value) <= Visitor.registration_code.type.length:
+            criteria['code'] = value.upper()
+        if value.isdigit():
+            criteria['id'] = int(value)
+        if PHONE_PATTERN.match(value):
+            criteria['phone'] = value
+        return criteria
+    
+    @staticmethod
+    def resolve_verification_code(raw):
+        """
+        Resuelve un código de kiosco a un visitante y sus registros en una sola consulta
+        
+        El visitante se elige con una subconsulta sobre columnas indexadas
+        (registration_code, id, lower(email), phone) priorizando el código de
+        registro, y sus registros con el evento se obtienen en el mismo viaje.
+        
+        Args:
+            raw (str): Texto escaneado o escrito por el visitante
+            
+        Returns:
+            tuple: (visitor, [(check_in, event), ...]) o (None, []) si no existe
+        """
+        criteria = VisitorService.classify_lookup(raw)
+        if not criteria:
+            return None, []
+        
+        # Los escaneos de códigos conocidos se resuelven por clave primaria
+        if 'code' in criteria:
+            cached_id = registration_code_index.get(criteria['code'])
+            if cached_id is not None:
+                rows = VisitorService._registration_rows(and_(
+                    Visitor.id == cached_id,
+                    Visitor.registration_code == criteria['code']
+                ))
+                if rows:
+                    return VisitorService._split_registration_rows(rows)
+                # Entrada obsoleta: descartarla y buscar en la base de datos
+                registration_code_index.discard(criteria['code'])
+        
+        predicates = []
+        priority = []
+        if 'code' in criteria:
+            predicates.append(Visitor.registration_code == criteria['code'])
+            priority.append((Visitor.registration_code == criteria['code'], 0))
+        if 'id' in criteria:
+            predicates.append(Visitor.id == criteria['id'])
+            priority.append((Visitor.id == criteria['id'], 1))
+        if 'email' in criteria:
+            predicates.append(func.lower(Visitor.email) == criteria['email'])
+        if 'phone' in criteria:
+            predicates.append(Visitor.phone == criteria['phone'])
+        
+        visitor_id = select(Visitor.id).where(or_(*predicates))
+        if priority:
+            visitor_id = visitor_id.order_by(case(*priority, else_=2))
+        visitor_id = visitor_id.order_by(Visitor.id).limit(1).scalar_subquery()
+        
+        rows = VisitorService._registration_rows(Visitor.id == visitor_id)
+        if rows and rows[0][0].registration_code:
+            registration_code_index.add(rows[0][0].registration_code, rows[0][0].id)
+        return VisitorService._split_registration_rows(rows)
+    
+    @staticmethod
+    def _registration_rows(visitor_filter):
+        """
+        Obtiene el visitante que cumple el filtro junto con sus registros y eventos
+        """
+        return db.session.query(Visitor, VisitorCheckIn, Event).outerjoin(
+            VisitorCheckIn, VisitorCheckIn.visitor_id == Visitor.id
+        ).outerjoin(
+            Event, Event.id == VisitorCheckIn.event_id
+        ).filter(
+            visitor_filter
+        ).order_by(VisitorCheckIn.id).all()
+    
+    @staticmethod
+    def _split_registration_rows(rows):
+        """
+        Separa el visitante de la lista de (check_in, event)
+        """
+        if not rows:
+            return None, []
+        
+        registrations = [(check_in, event) for _, check_in, event in rows if check_in is not None]
+        return rows[0][0], registrations
+    
+    @staticmethod
+    def get_visitor_summaries(after_id=None, limit=100):
+        """
+        Obtiene el resumen de una página de visitantes con tres consultas
+        
+        La página se recorre por ID (keyset); el último check-in de cada
+        visitante se obtiene con ROW_NUMBER() y las visitas por tipo de evento
+        con un GROUP BY, ambos sobre el rango de IDs de la página.
+        
+        Args:
+            after_id (int): Último ID de la página anterior (None = desde el inicio)
+            limit (int): Visitantes por página
+            
+        Returns:
+            list: Resúmenes de visitantes ordenados por ID
+        """
+        query = db.session.query(
+            Visitor.id,
+            Visitor.name,
+            Visitor.email,
+            Visitor.phone,
+            Visitor.registration_code,
+            Visitor.interests
+        ).order_by(Visitor.id)
+        if after_id:
+            query = query.filter(Visitor.id > after_id)
+        visitors = query.limit(limit).all()
+        if not visitors:
+            return []
+        
+        in_page = VisitorCheckIn.visitor_id.between(visitors[0].id, visitors[-1].id)
+        
+        # Último check-in por visitante
+        ranked = db.session.query(
+            VisitorCheckIn.visitor_id,
+            VisitorCheckIn.event_id,
+            VisitorCheckIn.check_in_time,
+            func.row_number().over(
+                partition_by=VisitorCheckIn.visitor_id,
+                order_by=(VisitorCheckIn.check_in_time.desc().nulls_last(), VisitorCheckIn.id.desc())
+            ).label('position')
+        ).filter(in_page).subquery()
+        
+        last_events = {
+            row.visitor_id: {
+                "title": row.title,
+                "type": row.event_type,
+                "date": row.check_in_time.isoformat() if row.check_in_time else None
+            }
+            for row in db.session.query(
+                ranked.c.visitor_id, ranked.c.check_in_time, Event.title, Event.event_type
+            ).join(
+                Event, Event.id == ranked.c.event_id
+            ).filter(ranked.c.position == 1)
+        }
+        
+        # Visitas por (visitante, tipo de evento)
+        visit_stats = {}
+        for visitor_id, event_type, visits in db.session.query(
+            VisitorCheckIn.visitor_id, Event.event_type, func.count(VisitorCheckIn.id)
+        ).join(
+            Event, Event.id == VisitorCheckIn.event_id
+        ).filter(in_page).group_by(VisitorCheckIn.visitor_id, Event.event_type):
+            visit_stats.setdefault(visitor_id, {})[event_type or 'Otros'] = visits
+        
+        return [
+            {
+                "id": visitor.id,
+                "name": visitor.name,
+                "email": visitor.email,
+                "phone": visitor.phone,
+                "code": visitor.registration_code,
+                "last_event": last_events.get(visitor.id),
+                "interests": visitor.interests.split(',') if visitor.interests else [],
+                "total_visits": visit_stats.get(visitor.id, {})
+            }
+            for visitor in visitors
+        ]
+    
+    @staticmethod
+    def iter_visitor_summaries(batch_size=1000):
+        """
+        Recorre los resúmenes de todos los visitantes por lotes
+        
+        Args:
+            batch_size (int): Visitantes por lote (tres consultas por lote)
+            
+        Yields:
+            dict: Resumen de cada visitante
+        """
+        after_id = None
+        while True:
+            summaries = VisitorService.get_visitor_summaries(after_id, batch_size)
+            yield from summaries
+            if len(summaries) < batch_size:
+                return
+            after_id = summaries[-1]['id']
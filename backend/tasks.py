@@ -1,17 +1,33 @@
 """
 Tareas asíncronas usando Celery
 """
-from celery import Celery
+from celery import Celery, group
+from celery.schedules import crontab
+from celery.signals import worker_process_init, worker_process_shutdown
 from flask import Flask
 import os
 import json
-import smtplib
+import time
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from datetime import datetime, timedelta
 
 celery = Celery(__name__)
 
+# Tareas periódicas (requieren un proceso beat: celery -A app:celery beat)
+BEAT_SCHEDULE = {
+    # Particiones de los próximos meses y retención de auditoría, una vez al día
+    'maintain-audit-log': {
+        'task': 'tasks.maintain_audit_log',
+        'schedule': crontab(hour=3, minute=0)
+    },
+    # Trabajos de exportación y archivos más antiguos que EXPORT_JOB_RETENTION_HOURS
+    'purge-export-jobs': {
+        'task': 'tasks.purge_export_jobs',
+        'schedule': crontab(minute=15)
+    }
+}
+
 def init_celery(app: Flask):
     """
     Inicializa Celery con la configuración de la aplicación Flask
@@ -20,6 +36,13 @@ def init_celery(app: Flask):
         app (Flask): Aplicación Flask
     """
     celery.conf.update(app.config)
+    celery.conf.update(
+        broker_url=app.config.get('CELERY_BROKER_URL'),
+        result_backend=app.config.get('CELERY_RESULT_BACKEND'),
+        # Sin broker (desarrollo) las tareas se ejecutan en el mismo proceso
+        task_always_eager=app.config.get('CELERY_TASK_ALWAYS_EAGER', False),
+        beat_schedule=BEAT_SCHEDULE
+    )
     
     class ContextTask(celery.Task):
         def __call__(self, *args, **kwargs):
@@ -29,6 +52,58 @@ def init_celery(app: Flask):
     celery.Task = ContextTask
     return celery
 
+@worker_process_init.connect
+def _reset_smtp_pool(**kwargs):
+    """Evita compartir con el proceso padre conexiones SMTP abiertas antes del fork"""
+    from services.email_service import reset_smtp_pool
+    reset_smtp_pool()
+
+@worker_process_init.connect
+def _start_cache_invalidation(**kwargs):
+    """Escucha las invalidaciones (usuarios, permisos, códigos) en cada proceso hijo"""
+    from cache import start_invalidation_bus
+    start_invalidation_bus()
+
+@worker_process_shutdown.connect
+def _close_smtp_pool(**kwargs):
+    """Cierra las conexiones SMTP al terminar el proceso del worker"""
+    from services.email_service import close_smtp_pool
+    close_smtp_pool()
+
+@worker_process_shutdown.connect
+def _drain_audit_log(**kwargs):
+    """Inserta los registros de auditoría pendientes (los hijos del pool no ejecutan atexit)"""
+    from services.audit_service import audit_log_writer
+    audit_log_writer.close()
+
+def build_email(to, subject, body, is_html=False, sender=None):
+    """
+    Crea el mensaje MIME de un correo
+    
+    Args:
+        to (str): Destinatario
+        subject (str): Asunto
+        body (str): Cuerpo del mensaje
+        is_html (bool): Indica si el cuerpo es HTML
+        sender (str): Remitente (por defecto MAIL_DEFAULT_SENDER)
+        
+    Returns:
+        MIMEMultipart: Mensaje listo para enviar
+    """
+    from flask import current_app
+    
+    msg = MIMEMultipart()
+    msg['From'] = sender or current_app.config.get('MAIL_DEFAULT_SENDER')
+    msg['To'] = to
+    msg['Subject'] = subject
+    
+    # Agregar cuerpo
+    if is_html:
+        msg.attach(MIMEText(body, 'html'))
+    else:
+        msg.attach(MIMEText(body, 'plain'))
+    return msg
+
 @celery.task(name="tasks.send_email")
 def send_email(to, subject, body, is_html=False):
     """
@@ -44,48 +119,15 @@ def send_email(to, subject, body, is_html=False):
         bool: True si se envió correctamente, False en caso contrario
     """
     from flask import current_app
+    from services.email_service import get_smtp_pool
     
-    # Obtener configuración de correo
-    mail_server = current_app.config.get('MAIL_SERVER')
-    mail_port = current_app.config.get('MAIL_PORT')
-    mail_username = current_app.config.get('MAIL_USERNAME')
-    mail_password = current_app.config.get('MAIL_PASSWORD')
-    mail_use_tls = current_app.config.get('MAIL_USE_TLS')
-    mail_use_ssl = current_app.config.get('MAIL_USE_SSL')
-    mail_default_sender = current_app.config.get('MAIL_DEFAULT_SENDER')
-    
-    if not mail_server:
+    if not current_app.config.get('MAIL_SERVER'):
         current_app.logger.error("No se ha configurado el servidor de correo")
         return False
     
     try:
-        # Crear mensaje
-        msg = MIMEMultipart()
-        msg['From'] = mail_default_sender
-        msg['To'] = to
-        msg['Subject'] = subject
-        
-        # Agregar cuerpo
-        if is_html:
-            msg.attach(MIMEText(body, 'html'))
-        else:
-            msg.attach(MIMEText(body, 'plain'))
-        
-        # Conectar al servidor
-        if mail_use_ssl:
-            server = smtplib.SMTP_SSL(mail_server, mail_port)
-        else:
-            server = smtplib.SMTP(mail_server, mail_port)
-            if mail_use_tls:
-                server.starttls()
-        
-        # Iniciar sesión si es necesario
-        if mail_username and mail_password:
-            server.login(mail_username, mail_password)
-        
-        # Enviar correo
-        server.send_message(msg)
-        server.quit()
+        # Enviar con una conexión ya autenticada del pool
+        get_smtp_pool().send(build_email(to, subject, body, is_html))
         
         current_app.logger.info(f"Correo enviado a {to}: {subject}")
         return True
@@ -93,6 +135,92 @@ def send_email(to, subject, body, is_html=False):
         current_app.logger.error(f"Error al enviar correo: {str(e)}")
         return False
 
+@celery.task(name="tasks.send_email_batch")
+def send_email_batch(messages):
+    """
+    Envía un lote de correos sobre las conexiones del pool
+    
+    Args:
+        messages (list): Diccionarios con to, subject, body e is_html
+        
+    Returns:
+        dict: Reporte del lote (enviados, fallidos, errores, segundos y mensajes por segundo)
+    """
+    from flask import current_app
+    from services.email_service import get_smtp_pool
+    
+    if not current_app.config.get('MAIL_SERVER'):
+        current_app.logger.error("No se ha configurado el servidor de correo")
+        return _delivery_report(0, len(messages), [], 0.0)
+    
+    started = time.perf_counter()
+    results = get_smtp_pool().send_many(
+        [
+            (message['to'], build_email(message['to'], message['subject'], message['body'], message.get('is_html', False)))
+            for message in messages
+        ],
+        batch_size=current_app.config.get('MAIL_CONNECTION_BATCH_SIZE', 50),
+        rate_limit=current_app.config.get('MAIL_RATE_LIMIT')
+    )
+    elapsed = time.perf_counter() - started
+    
+    errors = [{'to': to, 'error': error} for to, sent, error in results if not sent]
+    report = _delivery_report(len(results) - len(errors), len(errors), errors, elapsed)
+    current_app.logger.info(
+        f"Lote de correos: {report['sent']} enviados, {report['failed']} fallidos, "
+        f"{report['messages_per_second']} mensajes/s"
+    )
+    return report
+
+def _delivery_report(sent, failed, errors, seconds):
+    """Reporte de entrega de un lote de correos"""
+    return {
+        'sent': sent,
+        'failed': failed,
+        'errors': errors,
+        'seconds': round(seconds, 3),
+        'messages_per_second': round(sent / seconds, 1) if seconds else 0.0
+    }
+
+def deliver_emails(messages, batch_size=None):
+    """
+    Reparte correos en lotes y los envía con un group de send_email_batch
+    
+    Args:
+        messages (list): Diccionarios con to, subject, body e is_html
+        batch_size (int): Correos por tarea (por defecto MAIL_BATCH_SIZE)
+        
+    Returns:
+        GroupResult: Resultado del group (un reporte por lote)
+    """
+    from flask import current_app
+    
+    batch_size = batch_size or current_app.config.get('MAIL_BATCH_SIZE', 200)
+    return group(
+        send_email_batch.s(messages[start:start + batch_size])
+        for start in range(0, len(messages), batch_size)
+    ).apply_async()
+
+def summarize_deliveries(reports, seconds=None):
+    """
+    Combina los reportes de varios lotes en un reporte de rendimiento
+    
+    Args:
+        reports (list): Reportes devueltos por send_email_batch
+        seconds (float): Duración total medida (por defecto la del lote más lento)
+        
+    Returns:
+        dict: Totales y mensajes por segundo
+    """
+    reports = [report for report in reports if report]
+    seconds = seconds if seconds is not None else max((report['seconds'] for report in reports), default=0.0)
+    return _delivery_report(
+        sum(report['sent'] for report in reports),
+        sum(report['failed'] for report in reports),
+        [error for report in reports for error in report['errors']],
+        seconds
+    )
+
 @celery.task(name="tasks.send_registration_confirmation")
 def send_registration_confirmation(visitor_data, event_data):
     """
@@ -153,21 +281,20 @@ def send_registration_confirmation(visitor_data, event_data):
     
     return send_email.delay(to, subject, body, is_html=True)
 
-@celery.task(name="tasks.send_event_reminder")
-def send_event_reminder(visitor_data, event_data):
+def event_reminder_email(visitor_data, event_data):
     """
-    Envía un recordatorio de evento a un visitante
+    Crea el correo de recordatorio de un evento
     
     Args:
         visitor_data (dict): Datos del visitante
         event_data (dict): Datos del evento
         
     Returns:
-        bool: True si se envió correctamente, False en caso contrario
+        dict: Correo (to, subject, body, is_html), o None si el visitante no tiene email
     """
     to = visitor_data.get('email')
     if not to:
-        return False
+        return None
     
     subject = f"Recordatorio - {event_data.get('title')}"
     
@@ -211,18 +338,91 @@ def send_event_reminder(visitor_data, event_data):
     </html>
     """
     
-    return send_email.delay(to, subject, body, is_html=True)
+    return {'to': to, 'subject': subject, 'body': body, 'is_html': True}
+
+@celery.task(name="tasks.send_event_reminder")
+def send_event_reminder(visitor_data, event_data):
+    """
+    Envía un recordatorio de evento a un visitante
+    
+    Args:
+        visitor_data (dict): Datos del visitante
+        event_data (dict): Datos del evento
+        
+    Returns:
+        bool: True si se envió correctamente, False en caso contrario
+    """
+    message = event_reminder_email(visitor_data, event_data)
+    if not message:
+        return False
+    
+    return send_email.delay(message['to'], message['subject'], message['body'], is_html=True)
+
+def iter_reminder_batches(event, batch_size):
+    """
+    Recorre por páginas los registros de un evento pendientes de recordatorio
+    
+    Pagina por EventVisitor.id a partir de la marca del evento y trae los
+    datos del visitante en la misma consulta (sin cargas perezosas por fila).
+    
+    Args:
+        event (Event): Evento con reminder_watermark
+        batch_size (int): Registros por página
+        
+    Yields:
+        tuple: (último EventVisitor.id de la página, lista de correos de la página)
+    """
+    from models.visitor import EventVisitor, Visitor
+    from models.database import db
+    
+    event_data = {
+        'title': event.title,
+        'start_date': event.start_date.isoformat(),
+        'location': event.location
+    }
+    last_id = event.reminder_watermark or 0
+    
+    while True:
+        page = db.session.execute(
+            db.select(EventVisitor.id, EventVisitor.registration_code, Visitor.name, Visitor.email)
+            .join(Visitor, Visitor.id == EventVisitor.visitor_id)
+            .where(
+                EventVisitor.event_id == event.id,
+                EventVisitor.status == 'REGISTERED',
+                EventVisitor.id > last_id
+            )
+            .order_by(EventVisitor.id)
+            .limit(batch_size)
+        ).all()
+        if not page:
+            return
+        
+        last_id = page[-1].id
+        messages = []
+        for row in page:
+            message = event_reminder_email(
+                {'name': row.name, 'email': row.email, 'registration_code': row.registration_code},
+                event_data
+            )
+            if message:
+                messages.append(message)
+        yield last_id, messages
 
 @celery.task(name="tasks.schedule_event_reminders")
 def schedule_event_reminders():
     """
     Programa recordatorios para eventos próximos
+    
+    Encola una tarea send_email_batch por cada página de REMINDER_BATCH_SIZE
+    registros y, tras encolarla, avanza la marca reminder_watermark del
+    evento. Volver a ejecutar la tarea solo procesa los registros nuevos.
     """
     from models.event import Event
-    from models.visitor import EventVisitor
     from models.database import db
     from flask import current_app
     
+    batch_size = current_app.config.get('REMINDER_BATCH_SIZE', 500)
+    
     try:
         # Buscar eventos que comienzan en las próximas 24 horas
         now = datetime.utcnow()
@@ -234,114 +434,265 @@ def schedule_event_reminders():
         ).all()
         
         for event in upcoming_events:
-            # Buscar visitantes registrados para este evento
-            registrations = EventVisitor.query.filter(
-                EventVisitor.event_id == event.id,
-                EventVisitor.status == 'REGISTERED'
-            ).all()
-            
-            event_dict = event.to_dict()
-            
-            # Enviar recordatorio a cada visitante
-            for registration in registrations:
-                visitor_dict = registration.visitor.to_dict() if registration.visitor else {}
-                visitor_dict['registration_code'] = registration.registration_code
-                
-                send_event_reminder.delay(visitor_dict, event_dict)
+            scheduled = 0
+            for last_id, messages in iter_reminder_batches(event, batch_size):
+                if messages:
+                    send_email_batch.delay(messages)
+                    scheduled += len(messages)
                 
-                current_app.logger.info(f"Recordatorio programado para visitante {visitor_dict.get('name')} - Evento: {event_dict.get('title')}")
+                # Guardar la marca por página: si la tarea se interrumpe, se retoma desde aquí
+                db.session.execute(
+                    db.update(Event).where(Event.id == event.id).values(reminder_watermark=last_id)
+                )
+                db.session.commit()
+            
+            current_app.logger.info(f"Recordatorios programados: {scheduled} - Evento: {event.title}")
         
         return True
     except Exception as e:
+        db.session.rollback()
         current_app.logger.error(f"Error al programar recordatorios: {str(e)}")
         return False
 
 @celery.task(name="tasks.generate_event_report")
-def generate_event_report(event_id, format='json'):
+def generate_event_report(event_id, format='json', compress=False):
     """
     Genera un reporte de un evento
     
+    Las estadísticas salen de un GROUP BY por estado y los registros se
+    escriben a medida que se leen (ver ExportService.write_event_report), por
+    lo que la memoria no depende del número de registros.
+    
     Args:
         event_id (int): ID del evento
-        format (str): Formato del reporte (json, csv, etc.)
+        format (str): Formato del reporte (json o csv)
+        compress (bool): Comprimir el archivo con gzip (.json.gz / .csv.gz)
         
     Returns:
         str: Ruta del archivo generado
     """
+    import tempfile
+    from models.database import db
     from models.event import Event
-    from models.visitor import EventVisitor
+    from services.export_service import EVENT_REPORT_FORMATS, ExportService
     from flask import current_app
-    import csv
     
+    if format not in EVENT_REPORT_FORMATS:
+        current_app.logger.error(f"Formato no soportado: {format}")
+        return None
+    
+    temp_path = None
     try:
-        event = Event.query.get(event_id)
+        event = db.session.get(Event, event_id)
         if not event:
             current_app.logger.error(f"No se encontró el evento con ID {event_id}")
             return None
         
-        # Obtener registros para este evento
-        registrations = EventVisitor.query.filter_by(event_id=event_id).all()
-        
-        # Preparar datos para el reporte
-        report_data = {
-            'event': event.to_dict(),
-            'statistics': {
-                'total_registrations': len([r for r in registrations if r.status != 'CANCELED']),
-                'checked_in': len([r for r in registrations if r.status == 'CHECKED_IN']),
-                'no_show': len([r for r in registrations if r.status == 'NO_SHOW']),
-                'canceled': len([r for r in registrations if r.status == 'CANCELED']),
-                'attendance_rate': round(len([r for r in registrations if r.status == 'CHECKED_IN']) / 
-                                       max(1, len([r for r in registrations if r.status != 'CANCELED'])) * 100, 2)
-            },
-            'registrations': [
-                {
-                    'id': r.id,
-                    'visitor_name': r.visitor.name if r.visitor else 'N/A',
-                    'visitor_email': r.visitor.email if r.visitor else 'N/A',
-                    'registration_code': r.registration_code,
-                    'registration_date': r.registration_date.isoformat(),
-                    'check_in_time': r.check_in_time.isoformat() if r.check_in_time else None,
-                    'status': r.status
-                }
-                for r in registrations
-            ]
-        }
-        
         # Generar archivo según formato
         timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
-        filename = f"event_report_{event_id}_{timestamp}"
+        extension = f"{format}.gz" if compress else format
+        folder = current_app.config.get('UPLOADS_FOLDER')
+        output_path = os.path.join(folder, f"event_report_{event_id}_{timestamp}.{extension}")
         
-        if format == 'json':
-            output_path = os.path.join(current_app.config.get('UPLOADS_FOLDER'), f"{filename}.json")
-            with open(output_path, 'w') as f:
-                json.dump(report_data, f, indent=2)
-            return output_path
+        # Escribir en un temporal y renombrar al terminar
+        fd, temp_path = tempfile.mkstemp(prefix=f"event_report_{event_id}_", suffix='.part', dir=folder)
+        os.close(fd)
+        rows = ExportService.write_event_report(event, temp_path, format=format, compress=compress)
+        os.replace(temp_path, output_path)
+        temp_path = None
         
-        elif format == 'csv':
-            output_path = os.path.join(current_app.config.get('UPLOADS_FOLDER'), f"{filename}.csv")
-            with open(output_path, 'w', newline='') as f:
-                writer = csv.writer(f)
-                
-                # Escribir encabezados
-                writer.writerow(['ID', 'Visitante', 'Email', 'Código', 'Fecha de Registro', 'Check-in', 'Estado'])
-                
-                # Escribir datos
-                for reg in report_data['registrations']:
-                    writer.writerow([
-                        reg['id'],
-                        reg['visitor_name'],
-                        reg['visitor_email'],
-                        reg['registration_code'],
-                        reg['registration_date'],
-                        reg['check_in_time'] or 'N/A',
-                        reg['status']
-                    ])
-            return output_path
-        
-        else:
-            current_app.logger.error(f"Formato no soportado: {format}")
-            return None
+        current_app.logger.info(f"Reporte del evento {event_id} generado: {rows} registros")
+        return output_path
             
     except Exception as e:
+        if temp_path and os.path.exists(temp_path):
+            os.remove(temp_path)
         current_app.logger.error(f"Error al generar reporte: {str(e)}")
-        return None 
\ No newline at end of file
+        return None
+
+@celery.task(name="tasks.refresh_check_in_rollups")
+def refresh_check_in_rollups(days=2):
+    """
+    Recalcula los agregados de check-ins de los últimos días
+    
+    Los agregados se actualizan al guardar cada check-in; esta tarea periódica
+    corrige desviaciones (por ejemplo, borrados masivos fuera del ORM).
+    
+    Args:
+        days (int): Días a recalcular (None = todo el historial)
+        
+    Returns:
+        int: Número de buckets recalculados
+    """
+    from services.analytics_service import AnalyticsService
+    from flask import current_app
+    
+    try:
+        since = (datetime.utcnow() - timedelta(days=days)).date() if days else None
+        buckets = AnalyticsService.rebuild_check_in_rollups(since)
+        current_app.logger.info(f"Agregados de check-ins recalculados: {buckets} buckets")
+        return buckets
+    except Exception as e:
+        current_app.logger.error(f"Error al recalcular agregados de check-ins: {str(e)}")
+        return None
+
+@celery.task(name="tasks.export_event_excel")
+def export_event_excel(job_id):
+    """
+    Genera la exportación Excel de un evento para un ExportJob
+    
+    El archivo se escribe en un temporal dentro de EXPORTS_FOLDER con
+    xlsxwriter en modo constant_memory y se renombra al terminar, de modo que
+    la descarga nunca ve un archivo a medias.
+    
+    Args:
+        job_id (str): ID del trabajo de exportación
+        
+    Returns:
+        str: Ruta del archivo generado, o None si falló
+    """
+    import tempfile
+    from models.database import db
+    from models.event import Event
+    from models.export_job import ExportJob
+    from services.export_service import ExportService
+    from flask import current_app
+    
+    job = db.session.get(ExportJob, job_id)
+    if not job:
+        current_app.logger.error(f"No se encontró el trabajo de exportación {job_id}")
+        return None
+    
+    job.status = ExportJob.STATUS_RUNNING
+    job.started_at = datetime.utcnow()
+    db.session.commit()
+    
+    temp_path = None
+    try:
+        event = db.session.get(Event, job.event_id)
+        if not event:
+            raise ValueError(f"No se encontró el evento con ID {job.event_id}")
+        
+        folder = ExportService.export_folder()
+        fd, temp_path = tempfile.mkstemp(prefix=f"{job.id}_", suffix='.xlsx.part', dir=folder)
+        os.close(fd)
+        
+        query = ExportService.filtered_event_registrations(event.id, job.filters)
+        row_count = ExportService.write_event_workbook(event, query, temp_path)
+        
+        output_path = os.path.join(folder, f"{job.id}.xlsx")
+        os.replace(temp_path, output_path)
+        temp_path = None
+        
+        job.status = ExportJob.STATUS_COMPLETED
+        job.file_path = output_path
+        job.filename = f'evento_{event.id}_{event.title.replace(" ", "_")}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.xlsx'
+        job.row_count = row_count
+        job.completed_at = datetime.utcnow()
+        db.session.commit()
+        
+        current_app.logger.info(f"Exportación {job.id} completada: {row_count} registros")
+        return output_path
+    except Exception as e:
+        db.session.rollback()
+        if temp_path and os.path.exists(temp_path):
+            os.remove(temp_path)
+        
+        job = db.session.get(ExportJob, job_id)
+        job.status = ExportJob.STATUS_FAILED
+        job.error = str(e)
+        job.completed_at = datetime.utcnow()
+        db.session.commit()
+        
+        current_app.logger.error(f"Error en la exportación {job_id}: {str(e)}")
+        return None
+
+@celery.task(name="tasks.purge_export_jobs")
+def purge_export_jobs(hours=None):
+    """
+    Elimina los trabajos de exportación antiguos y sus archivos
+    
+    Args:
+        hours (int): Antigüedad máxima en horas (por defecto EXPORT_JOB_RETENTION_HOURS)
+        
+    Returns:
+        int: Número de trabajos eliminados
+    """
+    from models.database import db
+    from models.export_job import ExportJob
+    from flask import current_app
+    
+    hours = hours or current_app.config.get('EXPORT_JOB_RETENTION_HOURS', 24)
+    cutoff = datetime.utcnow() - timedelta(hours=hours)
+    
+    expired = ExportJob.query.filter(ExportJob.created_at < cutoff).all()
+    for job in expired:
+        if job.file_path and os.path.exists(job.file_path):
+            os.remove(job.file_path)
+        db.session.delete(job)
+    db.session.commit()
+    
+    current_app.logger.info(f"Trabajos de exportación eliminados: {len(expired)}")
+    return len(expired)
+
+@celery.task(name="tasks.maintain_audit_log")
+def maintain_audit_log(retention_months=None):
+    """
+    Mantenimiento periódico (diario) del almacenamiento de auditoría
+    
+    Crea por adelantado las particiones de los próximos meses y elimina las
+    que quedan fuera del periodo de retención (en SQLite borra por lotes).
+    
+    Args:
+        retention_months (int): Meses a conservar (por defecto AUDIT_LOG_RETENTION_MONTHS)
+        
+    Returns:
+        dict: Particiones creadas y eliminadas, y filas borradas
+    """
+    from services.audit_service import AuditLogService
+    from models.database import db
+    from flask import current_app
+    
+    try:
+        created = AuditLogService.ensure_partitions()
+        retention = AuditLogService.apply_retention(retention_months)
+        current_app.logger.info(
+            f"Auditoría: {len(created)} particiones creadas, {len(retention['partitions'])} eliminadas, "
+            f"{retention['rows']} filas borradas (corte {retention['cutoff']:%Y-%m-%d})"
+        )
+        return {'created': created, 'dropped': retention['partitions'], 'rows': retention['rows']}
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error en el mantenimiento de auditoría: {str(e)}")
+        return None
+
+@celery.task(name="tasks.send_bulk_invitations")
+def send_bulk_invitations(job_id):
+    """
+    Procesa un envío masivo de invitaciones (InvitationJob)
+    
+    Args:
+        job_id (str): ID del envío
+        
+    Returns:
+        dict: Estado final del envío, o None si falló
+    """
+    from models.database import db
+    from models.invitation_job import InvitationJob
+    from services.invitation_service import InvitationService
+    from flask import current_app
+    
+    try:
+        job = InvitationService.process_job(job_id)
+        current_app.logger.info(f"Invitaciones {job.id}: {job.sent} enviadas, {job.skipped} omitidas, {job.failed} fallidas")
+        return job.to_dict()
+    except Exception as e:
+        db.session.rollback()
+        job = db.session.get(InvitationJob, job_id)
+        if job:
+            job.status = InvitationJob.STATUS_FAILED
+            job.error = str(e)
+            job.completed_at = datetime.utcnow()
+            db.session.commit()
+        current_app.logger.error(f"Error en el envío de invitaciones {job_id}: {str(e)}")
+        return None
@@ -18,6 +18,8 @@ from models.user import User
 from models.event import Event
 from models.visitor import Visitor # Asumiendo que existe este modelo
 from models.kiosk import Kiosk     # Asumiendo que existe este modelo
+from cache import cache, local_cache
+from services.registration_code_index import registration_code_index
 
 USER_PASSWORD = "TestPassword123!"
 ADMIN_PASSWORD = "AdminPassword123!"
@@ -68,6 +70,11 @@ def session(app, db):
         connection = db.engine.connect()
         transaction = connection.begin()
 
+        # Las respuestas cacheadas de un test no deben servirse en el siguiente
+        cache.clear()
+        local_cache.invalidate(None)
+        registration_code_index.clear()
+
         # Aquí podrías limpiar todas las tablas si prefieres un estado completamente virgen
         # en lugar de depender solo del rollback.
         # for table in reversed(db.metadata.sorted_tables):
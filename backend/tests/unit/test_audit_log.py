@@ -0,0 +1,97 @@
+"""
+Pruebas para la escritura de auditoría en segundo plano
+"""
+import threading
+from queue import Queue
+import pytest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event as sa_event
+from services.user_state_cache import user_state_cache
+from models.database import db
+from models.permission import AuditLog
+from models.user import User
+from services.audit_service import AuditLogWriter, audit_log_writer
+from services.auth_service import AuthService
+from utils.decorators import permission_required
+
+@permission_required('events.export')
+def export_view():
+    return 'ok'
+
+class TestAuditLogWriter:
+    """
+    Pruebas para AuditLogWriter y el registro de accesos de los decoradores
+    """
+
+    @pytest.fixture
+    def writer(self, app, session, monkeypatch):
+        monkeypatch.setattr(audit_log_writer, 'batch_size', 10)
+        monkeypatch.setattr(audit_log_writer, 'flush_interval', 0.05)
+        yield audit_log_writer
+        audit_log_writer.close()
+
+    def _count(self, action):
+        return AuditLog.query.filter_by(action=action).count()
+
+    def test_access_log_leaves_request_thread(self, app, session, writer):
+        """
+        Prueba que los accesos auditados no ejecutan SQL en el hilo de la petición
+        """
+        user_state_cache.invalidate(None)
+        admin = User(username='auditor', email='auditor@test.com', first_name='Eva', last_name='Ruiz', role='admin')
+        admin.set_password('Password123!')
+        session.add(admin)
+        session.commit()
+        with app.app_context():
+            token = create_access_token(identity=str(admin.id), additional_claims=AuthService.token_claims(admin))
+        headers = {'Authorization': f'Bearer {token}'}
+        with app.test_request_context('/api/v1/events/7/export', headers=headers):
+            assert export_view() == 'ok'
+        assert writer.flush()
+
+        request_thread = threading.get_ident()
+        statements = []
+        record = lambda *args: statements.append((threading.get_ident(), args[2]))
+        sa_event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            for _ in range(25):
+                with app.test_request_context('/api/v1/events/7/export', headers=headers):
+                    assert export_view() == 'ok'
+            request_statements = [sql for thread, sql in statements if thread == request_thread]
+            assert writer.flush()
+        finally:
+            sa_event.remove(db.engine, 'before_cursor_execute', record)
+
+        assert request_statements == []
+        assert self._count('ACCESS:events.export') == 26
+        inserts = [sql for _, sql in statements if sql.startswith('INSERT INTO audit_logs')]
+        assert 3 <= len(inserts) <= 5
+        assert AuditLog.query.filter_by(action='ACCESS:events.export').first().entity_id == 7
+
+    def test_close_drains_pending_records(self, app, session, writer, monkeypatch):
+        """
+        Prueba que close() inserta los registros que aún esperaban en la cola
+        """
+        monkeypatch.setattr(writer, 'flush_interval', 60)
+        monkeypatch.setattr(writer, 'batch_size', 1000)
+        for i in range(5):
+            writer.write(action='DRAIN', entity_type='event', entity_id=i)
+
+        writer.close()
+
+        assert self._count('DRAIN') == 5
+
+    def test_full_queue_drops_without_blocking(self, app, monkeypatch):
+        """
+        Prueba que con la cola llena los registros se descartan y se cuentan
+        """
+        writer = AuditLogWriter(queue_size=2)
+        writer.app = app
+        queue = Queue(maxsize=2)
+        monkeypatch.setattr(writer, '_start', lambda: queue)
+
+        for i in range(5):
+            writer.write(action='OVERFLOW', entity_type='event', entity_id=i)
+
+        assert queue.qsize() == 2
+        assert writer.dropped == 3
@@ -0,0 +1,129 @@
+"""
+Pruebas para el almacenamiento y la consulta de los registros de auditoría
+"""
+from datetime import datetime, timedelta
+import pytest
+from flask_jwt_extended import create_access_token
+from services.user_state_cache import user_state_cache
+from models.database import db
+from models.permission import AuditLog
+from models.user import User
+from services.audit_service import AuditLogService, month_start
+from services.auth_service import AuthService
+
+NOW = datetime(2026, 10, 17, 12, 0)
+
+class TestAuditLogStore:
+    """
+    Pruebas para AuditLogService y /api/v1/audit-logs
+    """
+
+    @pytest.fixture
+    def logs(self, session):
+        rows = []
+        for i in range(30):
+            rows.append({
+                'user_id': i % 3 + 1,
+                'action': 'UPDATE',
+                'entity_type': 'event',
+                'entity_id': i % 5,
+                # Varios registros comparten created_at para probar el desempate por id
+                'created_at': NOW - timedelta(hours=i // 2)
+            })
+        rows += [
+            {'user_id': 1, 'action': 'DELETE', 'entity_type': 'visitor', 'entity_id': 9,
+             'created_at': month_start(NOW, -13) + timedelta(days=3)},
+            {'user_id': 1, 'action': 'DELETE', 'entity_type': 'visitor', 'entity_id': 9,
+             'created_at': month_start(NOW, -12) - timedelta(seconds=1)},
+            {'user_id': 1, 'action': 'DELETE', 'entity_type': 'visitor', 'entity_id': 9,
+             'created_at': month_start(NOW, -12)},
+        ]
+        session.execute(db.insert(AuditLog), rows)
+        session.commit()
+        return rows
+
+    def test_keyset_pages_cover_every_row_once(self, logs):
+        """
+        Prueba que recorrer las páginas devuelve todos los registros en orden, sin repetir
+        """
+        seen, cursor = [], None
+        while True:
+            page, cursor = AuditLogService.query(entity_type='event', cursor=cursor, limit=7)
+            seen.extend((log.created_at, log.id) for log in page)
+            if cursor is None:
+                break
+
+        assert len(seen) == 30
+        assert len(set(seen)) == 30
+        assert seen == sorted(seen, reverse=True)
+
+    def test_filters_by_entity_user_and_range(self, logs):
+        """
+        Prueba los filtros de entidad, usuario y rango de fechas
+        """
+        entity, _ = AuditLogService.query(entity_type='event', entity_id=2, limit=100)
+        in_range, _ = AuditLogService.query(user_id=1, start=NOW - timedelta(hours=4), end=NOW, limit=100)
+
+        assert len(entity) == 6 and {log.entity_id for log in entity} == {2}
+        assert {log.user_id for log in in_range} == {1}
+        assert all(NOW - timedelta(hours=4) <= log.created_at < NOW for log in in_range)
+        assert len(in_range) == 3
+
+    def test_entity_query_uses_composite_index(self, logs):
+        """
+        Prueba que "¿quién tocó la entidad X?" se resuelve con el índice compuesto
+        """
+        query = AuditLog.query.filter_by(entity_type='event', entity_id=2).order_by(
+            AuditLog.created_at.desc(), AuditLog.id.desc()
+        ).limit(10)
+        sql = str(query.statement.compile(db.engine, compile_kwargs={'literal_binds': True}))
+
+        plan = ' '.join(row[-1] for row in db.session.execute(db.text(f"EXPLAIN QUERY PLAN {sql}")))
+
+        assert 'ix_audit_logs_entity_created' in plan
+        assert 'TEMP B-TREE' not in plan
+
+    def test_retention_deletes_whole_months(self, logs):
+        """
+        Prueba que la retención sin particionado borra por lotes hasta el inicio del mes de corte
+        """
+        result = AuditLogService.apply_retention(12, now=NOW, batch_size=1)
+
+        assert result['cutoff'] == datetime(2025, 10, 1)
+        assert result['rows'] == 2
+        remaining = AuditLog.query.filter_by(action='DELETE').all()
+        assert [log.created_at for log in remaining] == [month_start(NOW, -12)]
+
+    def test_endpoint_pages_with_cursor(self, app, session, logs):
+        """
+        Prueba el endpoint con next_cursor y un cursor inválido
+        """
+        user_state_cache.invalidate(None)
+        admin = User(username='auditadmin', email='auditadmin@test.com', first_name='Ada', last_name='Ruiz', role='admin')
+        admin.set_password('Password123!')
+        session.add(admin)
+        session.commit()
+        with app.app_context():
+            token = create_access_token(identity=str(admin.id), additional_claims=AuthService.token_claims(admin))
+        client = app.test_client()
+        headers = {'Authorization': f'Bearer {token}'}
+
+        first = client.get('/api/v1/audit-logs?entity_type=event&entity_id=3&limit=4', headers=headers)
+        second = client.get(
+            f"/api/v1/audit-logs?entity_type=event&entity_id=3&limit=4&cursor={first.json['next_cursor']}",
+            headers=headers
+        )
+        invalid = client.get('/api/v1/audit-logs?cursor=no-es-un-cursor', headers=headers)
+
+        assert first.status_code == 200
+        assert len(first.json['items']) == 4
+        assert len(second.json['items']) == 2 and second.json['next_cursor'] is None
+        assert invalid.status_code == 400
+
+    def test_month_start(self):
+        """
+        Prueba el cálculo de meses para las particiones
+        """
+        assert month_start(datetime(2026, 1, 31), -1) == datetime(2025, 12, 1)
+        assert month_start(datetime(2026, 11, 5), 2) == datetime(2027, 1, 1)
+        assert AuditLogService.partition_name(datetime(2027, 1, 1)) == 'audit_logs_2027_01'
@@ -0,0 +1,126 @@
+"""
+Pruebas para la autorización con claims del token y el estado cacheado de usuarios
+"""
+import pytest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event as sa_event
+from services.user_state_cache import user_state_cache
+from models.database import db
+from models.permission import Role
+from models.user import User
+from services.auth_service import AuthService
+from utils.decorators import admin_required, permission_required, role_required
+
+@role_required(['admin', 'staff'])
+def staff_view():
+    return 'ok'
+
+@admin_required()
+def admin_view():
+    return 'ok'
+
+@permission_required('events.export')
+def export_view():
+    return 'ok'
+
+class TestClaimsAuthorization:
+    """
+    Pruebas para role_required, admin_required y permission_required
+    """
+
+    @pytest.fixture
+    def user(self, session):
+        user_state_cache.invalidate(None)
+        user = User(
+            username='staff1', email='staff1@test.com', first_name='Ana', last_name='Pérez',
+            role='staff', is_active=True
+        )
+        user.set_password('Password123!')
+        session.add(user)
+        session.commit()
+        return user
+
+    def _call(self, app, view, user, **claims):
+        with app.app_context():
+            token = create_access_token(
+                identity=str(user.id),
+                additional_claims={**AuthService.token_claims(user), **claims}
+            )
+        with app.test_request_context(headers={'Authorization': f'Bearer {token}'}):
+            rv = view()
+        return rv if isinstance(rv, str) else rv[1]
+
+    def test_authorized_requests_skip_database(self, app, user):
+        """
+        Prueba que, con el estado del usuario en caché, autorizar no consulta la base de datos
+        """
+        assert self._call(app, staff_view, user) == 'ok'
+
+        statements = []
+        record = lambda *args: statements.append(args[2])
+        sa_event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            results = [self._call(app, staff_view, user) for _ in range(5)]
+            denied = self._call(app, admin_view, user)
+        finally:
+            sa_event.remove(db.engine, 'before_cursor_execute', record)
+
+        assert results == ['ok'] * 5
+        assert denied == 403
+        assert statements == []
+
+    def test_deactivated_user_is_rejected(self, app, session, user):
+        """
+        Prueba que desactivar al usuario invalida su estado cacheado
+        """
+        assert self._call(app, staff_view, user) == 'ok'
+
+        user.is_active = False
+        session.commit()
+
+        assert self._call(app, staff_view, user) == 403
+
+    def test_role_change_outdates_token(self, app, session, user):
+        """
+        Prueba que un token con el rol anterior deja de ser válido
+        """
+        assert self._call(app, staff_view, user) == 'ok'
+
+        user.role = 'viewer'
+        session.commit()
+
+        assert self._call(app, staff_view, user, role='staff') == 401
+
+    def test_token_without_permission_claims_is_outdated(self, app, user):
+        """
+        Prueba que un token emitido sin permisos firmados pide iniciar sesión de nuevo
+        """
+        with app.app_context():
+            token = create_access_token(identity=str(user.id), additional_claims={'role': user.role, 'email': user.email})
+        with app.test_request_context(headers={'Authorization': f'Bearer {token}'}):
+            rv = export_view()
+
+        assert rv[1] == 401
+        assert rv[0].json['error'] == 'Token is outdated, please log in again'
+
+    def test_permissions_come_from_claims(self, app, user):
+        """
+        Prueba que permission_required usa los permisos firmados en el token
+        """
+        assert self._call(app, export_view, user) == 403
+        assert self._call(app, export_view, user, permissions=['events.export']) == 'ok'
+
+    def test_token_claims_include_role_permissions(self, session, user):
+        """
+        Prueba que las claims incluyen los permisos del rol asignado
+        """
+        from models.permission import Permission
+
+        role = Role(name='exporter', permissions=[Permission(name='events.export'), Permission(name='events.view')])
+        user.role_obj = role
+        session.commit()
+
+        claims = AuthService.token_claims(user)
+
+        assert claims['role'] == 'staff'
+        assert claims['permissions'] == ['events.export', 'events.view']
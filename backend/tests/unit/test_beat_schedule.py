@@ -0,0 +1,25 @@
+"""
+Pruebas para la programación de tareas periódicas de Celery
+"""
+from tasks import BEAT_SCHEDULE, celery
+
+class TestBeatSchedule:
+    """
+    Pruebas para BEAT_SCHEDULE
+    """
+
+    def test_maintenance_tasks_are_scheduled(self, app):
+        """
+        Prueba que el mantenimiento de auditoría y la purga de exportaciones están programados
+        """
+        scheduled = {entry['task'] for entry in celery.conf.beat_schedule.values()}
+
+        assert {'tasks.maintain_audit_log', 'tasks.purge_export_jobs'} <= scheduled
+        assert celery.conf.beat_schedule == BEAT_SCHEDULE
+
+    def test_scheduled_tasks_exist(self, app):
+        """
+        Prueba que cada entrada apunta a una tarea registrada
+        """
+        for entry in BEAT_SCHEDULE.values():
+            assert entry['task'] in celery.tasks
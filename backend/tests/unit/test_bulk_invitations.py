@@ -0,0 +1,127 @@
+"""
+Pruebas para el envío masivo de invitaciones sobre un servidor SMTP local
+"""
+import socket
+import time
+import pytest
+from datetime import datetime
+from email.mime.text import MIMEText
+from models.event import Event
+from models.invitation_job import InvitationJob, InvitationResult
+from models.kiosk import Kiosk
+from models.visitor import Visitor, VisitorCheckIn
+from services.invitation_service import InvitationService
+from services.smtp_pool import RateLimiter, SMTPConnectionPool
+
+controller_module = pytest.importorskip('aiosmtpd.controller')
+
+class RecordingHandler:
+    """Guarda los destinatarios de cada mensaje recibido"""
+
+    def __init__(self):
+        self.recipients = []
+
+    async def handle_DATA(self, server, session, envelope):
+        self.recipients.extend(envelope.rcpt_tos)
+        return '250 Message accepted for delivery'
+
+class TestBulkInvitations:
+    """
+    Pruebas para SMTPConnectionPool e InvitationService
+    """
+
+    def _start_server(self):
+        with socket.socket() as probe:
+            probe.bind(('127.0.0.1', 0))
+            port = probe.getsockname()[1]
+        handler = RecordingHandler()
+        controller = controller_module.Controller(handler, hostname='127.0.0.1', port=port)
+        controller.start()
+        return controller, handler
+
+    def _pool(self, controller, size=2):
+        return SMTPConnectionPool(controller.hostname, controller.port, size=size)
+
+    def _message(self, to_email):
+        message = MIMEText('Hola')
+        message['Subject'] = 'Prueba'
+        message['From'] = 'noreply@test.com'
+        message['To'] = to_email
+        return message
+
+    def test_pool_reuses_connections(self):
+        """
+        Prueba que muchos mensajes se envían con pocas conexiones
+        """
+        controller, handler = self._start_server()
+        pool = self._pool(controller)
+        try:
+            messages = [(i, self._message(f'persona{i}@test.com')) for i in range(40)]
+            results = pool.send_many(messages, batch_size=10)
+        finally:
+            pool.close()
+            controller.stop()
+
+        assert [key for key, sent, _ in results if sent] == list(range(40))
+        assert len(handler.recipients) == 40
+        assert pool.connections_opened <= 2
+
+    def test_pool_reconnects_after_disconnect(self):
+        """
+        Prueba que una conexión cerrada se reabre y el mensaje se reintenta
+        """
+        controller, handler = self._start_server()
+        pool = self._pool(controller, size=1)
+        try:
+            pool.send(self._message('antes@test.com'))
+            # Simular que el servidor cerró la conexión inactiva
+            with pool.connection() as connection:
+                connection.smtp.sock.shutdown(socket.SHUT_RDWR)
+            pool.send(self._message('despues@test.com'))
+        finally:
+            pool.close()
+            controller.stop()
+
+        assert handler.recipients == ['antes@test.com', 'despues@test.com']
+        assert pool.connections_opened == 2
+
+    def test_rate_limiter_spaces_messages(self):
+        """
+        Prueba que el limitador respeta los mensajes por segundo
+        """
+        limiter = RateLimiter(50)
+        started = time.monotonic()
+        for _ in range(11):
+            limiter.wait()
+
+        assert time.monotonic() - started >= 0.19
+
+    def test_process_job_records_results(self, session):
+        """
+        Prueba que el envío omite a los ya registrados y guarda un resultado por visitante
+        """
+        event = Event(title='Concierto', event_type='Música', location='Sala A',
+                      start_date=datetime.utcnow(), end_date=datetime.utcnow())
+        kiosk = Kiosk(name='Kiosco 1', location='Entrada')
+        visitors = [Visitor(name=f'Invitado {i}', email=f'invitado{i}@test.com') for i in range(3)]
+        session.add_all([event, kiosk] + visitors)
+        session.commit()
+        session.add(VisitorCheckIn(visitor_id=visitors[0].id, event_id=event.id, kiosk_id=kiosk.id))
+        session.commit()
+
+        job = InvitationService.create_job(event.id, [visitors[0].id, visitors[1].id, visitors[2].id, 999999])
+        controller, handler = self._start_server()
+        pool = self._pool(controller)
+        try:
+            job = InvitationService.process_job(job.id, pool=pool)
+        finally:
+            pool.close()
+            controller.stop()
+
+        assert job.status == InvitationJob.STATUS_COMPLETED
+        assert (job.total, job.sent, job.skipped, job.failed) == (4, 2, 1, 1)
+        assert sorted(handler.recipients) == ['invitado1@test.com', 'invitado2@test.com']
+
+        statuses = {result.visitor_id: result.status for result in job.results}
+        assert statuses[visitors[0].id] == InvitationResult.STATUS_SKIPPED
+        assert statuses[999999] == InvitationResult.STATUS_FAILED
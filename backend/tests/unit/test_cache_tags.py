@@ -0,0 +1,96 @@
+"""
+Pruebas para la invalidación de caché por etiquetas
+"""
+import pytest
+from datetime import datetime, timedelta
+from cache import cache, cache_clear_pattern, invalidate_tags, tagged_key
+from models.event import Event
+from models.kiosk import Kiosk
+
+class TestCacheTags:
+    """
+    Pruebas para cached(tags=...), invalidate_tags y los hooks de sesión
+    """
+
+    @pytest.fixture
+    def event(self, session):
+        cache.clear()
+        event = Event(
+            title='Evento cacheado',
+            location='Sala 1',
+            start_date=datetime.utcnow() + timedelta(days=1),
+            end_date=datetime.utcnow() + timedelta(days=1, hours=2)
+        )
+        session.add_all([event, Kiosk(name='Kiosco 1', location='Entrada')])
+        session.commit()
+        return event
+
+    def test_view_served_from_cache_until_tag_invalidated(self, app, session, event):
+        """
+        Prueba que la vista se sirve desde caché hasta invalidar su etiqueta
+        """
+        client = app.test_client()
+        assert client.get('/api/v1/events/').get_json()[0]['title'] == 'Evento cacheado'
+
+        # Un UPDATE directo no pasa por los hooks de sesión: la vista sigue cacheada
+        session.execute(Event.__table__.update().values(title='Título nuevo'))
+        session.commit()
+        assert client.get('/api/v1/events/').get_json()[0]['title'] == 'Evento cacheado'
+
+        invalidate_tags('events')
+        assert client.get('/api/v1/events/').get_json()[0]['title'] == 'Título nuevo'
+
+    def test_event_update_invalidates_views(self, app, session, event):
+        """
+        Prueba que modificar un evento con el ORM invalida su detalle y el listado
+        """
+        client = app.test_client()
+        client.get('/api/v1/events/')
+        client.get(f'/api/v1/events/{event.id}')
+
+        event.title = 'Evento modificado'
+        session.commit()
+
+        assert client.get('/api/v1/events/').get_json()[0]['title'] == 'Evento modificado'
+        assert client.get(f'/api/v1/events/{event.id}').get_json()['title'] == 'Evento modificado'
+
+    def test_registration_invalidates_event_visitors(self, app, event):
+        """
+        Prueba que registrar un visitante invalida la lista de visitantes del evento
+        """
+        client = app.test_client()
+        assert client.get(f'/api/v1/visitors/event/{event.id}').get_json() == []
+
+        response = client.post('/api/v1/visitors/register', json={
+            'name': 'Visitante Cache', 'email': 'cache@test.com', 'event_id': event.id
+        })
+        assert response.status_code == 201
+
+        visitors = client.get(f'/api/v1/visitors/event/{event.id}').get_json()
+        assert [visitor['email'] for visitor in visitors] == ['cache@test.com']
+
+    def test_lost_generation_never_reuses_old_keys(self, app):
+        """
+        Prueba que una generación expirada o desalojada no vuelve a un valor anterior
+        """
+        cache.clear()
+        first = tagged_key('vista', ['event:1'])
+        invalidate_tags('event:1')
+        second = tagged_key('vista', ['event:1'])
+        cache.delete('generation/event:1')
+        third = tagged_key('vista', ['event:1'])
+
+        assert len({first, second, third}) == 3
+
+    def test_cache_clear_pattern(self, app):
+        """
+        Prueba que cache_clear_pattern elimina solo las claves que coinciden
+        """
+        cache.clear()
+        cache.set('view/api/v1/events/1', 'a')
+        cache.set('view/api/v1/events/2', 'b')
+        cache.set('view/api/v1/visitors', 'c')
+
+        assert cache_clear_pattern('view/api/v1/events/*') == 2
+        assert cache.get('view/api/v1/events/1') is None
+        assert cache.get('view/api/v1/visitors') == 'c'
@@ -0,0 +1,84 @@
+"""
+Pruebas para el conteo agrupado de check-ins por evento
+"""
+from datetime import datetime, timedelta
+from sqlalchemy import event as sa_event
+from models.database import db
+from models.event import Event
+from models.visitor import Visitor, VisitorCheckIn
+from services.event_service import EventService
+
+class TestGetCheckInCounts:
+    """
+    Pruebas para EventService.get_check_in_counts
+    """
+
+    def _add_events(self, session, check_ins_per_event):
+        start = datetime.utcnow()
+        events = [
+            Event(title=f'Evento {n}', location='Sala', start_date=start, end_date=start + timedelta(hours=2))
+            for n in range(len(check_ins_per_event))
+        ]
+        visitors = [
+            Visitor(name=f'Visitante {n}', email=f'v{n}@test.com')
+            for n in range(max(check_ins_per_event))
+        ]
+        session.add_all(events + visitors)
+        session.commit()
+        for event, check_ins in zip(events, check_ins_per_event):
+            session.add_all([
+                VisitorCheckIn(visitor_id=visitor.id, event_id=event.id, kiosk_id=1)
+                for visitor in visitors[:check_ins]
+            ])
+        session.commit()
+        return [event.id for event in events]
+
+    def _count_statements(self, action):
+        statements = []
+        record = lambda *args: statements.append(args[2])
+        sa_event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            result = action()
+        finally:
+            sa_event.remove(db.engine, 'before_cursor_execute', record)
+        return result, len(statements)
+
+    def test_counts_zero_one_and_several(self, app, session):
+        """
+        Prueba los totales de eventos sin check-ins, con uno y con varios
+        """
+        empty, single, several = self._add_events(session, [0, 1, 3])
+
+        counts, statements = self._count_statements(
+            lambda: EventService.get_check_in_counts([empty, single, several])
+        )
+
+        assert counts == {single: 1, several: 3}
+        assert counts.get(empty, 0) == 0
+        assert statements == 1
+
+    def test_query_count_does_not_grow_with_events(self, app, session):
+        """
+        Prueba que se ejecuta una sola consulta sin importar el número de eventos
+        """
+        event_ids = self._add_events(session, [0, 1, 3, 2, 0, 5, 1, 4])
+
+        few, few_statements = self._count_statements(
+            lambda: EventService.get_check_in_counts(event_ids[:2])
+        )
+        every, every_statements = self._count_statements(
+            lambda: EventService.get_check_in_counts()
+        )
+
+        assert few == {event_ids[1]: 1}
+        assert every == {event_ids[n]: c for n, c in enumerate([0, 1, 3, 2, 0, 5, 1, 4]) if c}
+        assert few_statements == every_statements == 1
+
+    def test_empty_id_list_skips_query(self, app, session):
+        """
+        Prueba que una lista vacía de eventos no consulta la base de datos
+        """
+        counts, statements = self._count_statements(lambda: EventService.get_check_in_counts([]))
+
+        assert counts == {}
+        assert statements == 0
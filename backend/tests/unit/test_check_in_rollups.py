@@ -0,0 +1,113 @@
+"""
+Pruebas para los agregados de check-ins del dashboard
+"""
+import pytest
+from datetime import datetime, timedelta
+from models.analytics import CheckInRollup
+from models.event import Event
+from models.kiosk import Kiosk
+from models.visitor import Visitor, VisitorCheckIn
+from services.analytics_service import AnalyticsService
+
+class TestCheckInRollups:
+    """
+    Pruebas para la actualización incremental y la reconstrucción de check_in_rollups
+    """
+
+    def _snapshot(self):
+        return sorted(
+            (rollup.bucket_date, rollup.bucket_hour, rollup.event_id, rollup.check_in_count)
+            for rollup in CheckInRollup.query.filter(CheckInRollup.check_in_count != 0)
+        )
+
+    def _create_check_ins(self, session):
+        events = [
+            Event(title='Charla', location='Sala A', start_date=datetime.utcnow(), end_date=datetime.utcnow()),
+            Event(title='Concierto', location='Sala B', start_date=datetime.utcnow(), end_date=datetime.utcnow()),
+        ]
+        kiosk = Kiosk(name='Kiosco 1', location='Entrada')
+        visitors = [Visitor(name=f'Visitante {i}', email=f'rollup{i}@test.com') for i in range(4)]
+        session.add_all(events + visitors + [kiosk])
+        session.commit()
+
+        base = datetime(2025, 5, 20, 18, 30)
+        check_ins = [
+            VisitorCheckIn(visitor_id=visitor.id, event_id=events[i % 2].id, kiosk_id=kiosk.id,
+                           check_in_time=base + timedelta(hours=i))
+            for i, visitor in enumerate(visitors)
+        ]
+        session.add_all(check_ins)
+        session.commit()
+        return events, check_ins
+
+    def test_incremental_updates_match_rebuild(self, session):
+        """
+        Prueba que altas, cambios y bajas de check-ins dejan los mismos agregados que una reconstrucción
+        """
+        events, check_ins = self._create_check_ins(session)
+
+        check_ins[0].check_in_time = datetime(2025, 5, 21, 9, 0)
+        check_ins[1].event_id = events[0].id
+        session.delete(check_ins[2])
+        session.commit()
+
+        incremental = self._snapshot()
+        AnalyticsService.rebuild_check_in_rollups()
+
+        assert incremental == self._snapshot()
+        assert sum(rollup[3] for rollup in incremental) == 3
+
+    def test_rollup_readers(self, session):
+        """
+        Prueba las lecturas agregadas por evento, ubicación y hora
+        """
+        events, _ = self._create_check_ins(session)
+
+        assert AnalyticsService.get_event_counts() == {events[0].id: 2, events[1].id: 2}
+        assert AnalyticsService.get_location_counts() == {'Sala A': 2, 'Sala B': 2}
+        assert AnalyticsService.get_hour_counts(limit=2) == [(18, 1), (19, 1)]
+        assert sum(AnalyticsService.get_daily_counts(datetime(2025, 5, 20).date()).values()) == 4
+
+    def test_location_counts_follow_event_location(self, session):
+        """
+        Prueba que cambiar la ubicación del evento se refleja en los totales por ubicación
+        """
+        events, _ = self._create_check_ins(session)
+
+        events[1].location = 'Sala A'
+        session.commit()
+
+        assert AnalyticsService.get_location_counts() == {'Sala A': 4}
+
+    def test_failed_flush_leaves_no_pending_deltas(self, session):
+        """
+        Prueba que un flush fallido no aplica sus deltas en el siguiente commit
+        """
+        from sqlalchemy.exc import IntegrityError
+
+        events, check_ins = self._create_check_ins(session)
+        before = self._snapshot()
+
+        session.delete(check_ins[0])
+        session.add(Visitor(name=None, email='sin-nombre@test.com'))
+        with pytest.raises(IntegrityError):
+            session.flush()
+        session.rollback()
+
+        events[0].title = 'Charla renombrada'
+        session.commit()
+
+        assert self._snapshot() == before
+
+    def test_delete_event_removes_its_rollups(self, app, session):
+        """
+        Prueba que eliminar un evento elimina también sus agregados
+        """
+        events, _ = self._create_check_ins(session)
+        event_id = events[0].id
+
+        response = app.test_client().delete(f'/api/v1/events/{event_id}/')
+
+        assert response.status_code == 204
+        assert CheckInRollup.query.filter_by(event_id=event_id).count() == 0
+        assert AnalyticsService.get_event_counts() == {events[1].id: 2}
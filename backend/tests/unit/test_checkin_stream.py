@@ -0,0 +1,212 @@
+"""
+Pruebas para la difusión de check-ins y el endpoint SSE
+"""
+import json
+import pytest
+from datetime import datetime, timedelta
+import services.checkin_stream as checkin_stream
+from sqlalchemy import event as sa_event
+from services.checkin_stream import CheckInBroadcaster, RedisCheckInBroadcaster
+from models.database import db
+from models.event import Event
+from models.visitor import Visitor, VisitorCheckIn
+
+class TestCheckInBroadcaster:
+    """
+    Pruebas para el difusor en el mismo proceso
+    """
+
+    def test_publish_reaches_every_subscriber(self):
+        """
+        Prueba que cada cliente recibe el mensaje con un id incremental
+        """
+        broadcaster = CheckInBroadcaster()
+        first, second = broadcaster.subscribe(), broadcaster.subscribe()
+
+        broadcaster.publish({'type': 'check_in', 'event_id': 1})
+        broadcaster.publish({'type': 'check_in', 'event_id': 2})
+
+        assert [first.get_nowait()['id'], first.get_nowait()['id']] == [1, 2]
+        assert second.qsize() == 2
+
+        broadcaster.unsubscribe(first)
+        broadcaster.publish({'type': 'registration', 'event_id': 1})
+        assert first.empty()
+        assert broadcaster.subscriber_count == 1
+
+    def test_slow_subscriber_drops_oldest(self):
+        """
+        Prueba que un cliente lento conserva los mensajes más recientes
+        """
+        broadcaster = CheckInBroadcaster(queue_size=2)
+        queue = broadcaster.subscribe()
+
+        for event_id in range(5):
+            broadcaster.publish({'event_id': event_id})
+
+        assert [queue.get_nowait()['event_id'] for _ in range(2)] == [3, 4]
+
+class TestCheckInStream:
+    """
+    Pruebas para /api/v1/stream/checkins
+    """
+
+    @pytest.fixture
+    def registration(self, app, session, monkeypatch):
+        monkeypatch.setattr(checkin_stream, 'checkin_broadcaster', CheckInBroadcaster())
+        event = Event(
+            title='Evento en vivo',
+            location='Sala 1',
+            start_date=datetime.utcnow(),
+            end_date=datetime.utcnow() + timedelta(hours=2)
+        )
+        visitor = Visitor(name='Ana', email='ana@test.com', phone='555')
+        session.add_all([event, visitor])
+        session.commit()
+        session.add(VisitorCheckIn(visitor_id=visitor.id, event_id=event.id, kiosk_id=1))
+        session.commit()
+        return event.id, visitor.id
+
+    def _next_event(self, chunks):
+        chunk = next(chunks)
+        chunk = chunk.decode() if isinstance(chunk, bytes) else chunk
+        fields = dict(line.split(': ', 1) for line in chunk.strip().split('\n'))
+        return fields['event'], json.loads(fields['data'])
+
+    def test_stream_sends_snapshot_and_check_ins(self, app, registration):
+        """
+        Prueba que el stream envía los totales iniciales y el delta de cada registro y check-in
+        """
+        event_id, visitor_id = registration
+        client = app.test_client()
+
+        response = client.get(f'/api/v1/stream/checkins?event_id={event_id}', buffered=False)
+        chunks = iter(response.response)
+        try:
+            assert response.mimetype == 'text/event-stream'
+            assert next(chunks).startswith(b'retry:')
+            assert self._next_event(chunks) == ('snapshot', {'check_ins': {str(event_id): 1}})
+
+            registered = client.post('/api/v1/visitors/register', json={
+                'name': 'Luis', 'email': 'luis@test.com', 'event_id': event_id
+            })
+            assert registered.status_code == 201
+
+            name, message = self._next_event(chunks)
+            assert name == 'checkin'
+            assert message['type'] == 'registration'
+            assert message['visitor_id'] == registered.json['visitor_id']
+            assert (message['delta'], message['check_ins']) == (1, 2)
+
+            checkin = client.post(f'/api/v1/events/{event_id}/visitors/{visitor_id}/checkin')
+            assert checkin.status_code == 200
+            name, message = self._next_event(chunks)
+            assert message['type'] == 'check_in'
+            assert (message['delta'], message['check_ins']) == (0, 2)
+        finally:
+            response.close()
+
+        assert checkin_stream.checkin_broadcaster.subscriber_count == 0
+
+    def _statements(self, action):
+        statements = []
+        record = lambda *args: statements.append(args[2])
+        sa_event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            action()
+        finally:
+            sa_event.remove(db.engine, 'before_cursor_execute', record)
+        return statements
+
+    def test_publish_without_subscribers_skips_count_query(self, app, registration, monkeypatch):
+        """
+        Prueba que sin clientes conectados no se consulta el total de check-ins
+        """
+        warnings = []
+        monkeypatch.setattr(app.logger, 'warning', warnings.append)
+
+        statements = self._statements(lambda: checkin_stream.publish_check_in('check_in', *registration))
+
+        assert statements == []
+        assert warnings == []
+
+    def test_publish_reads_counter_column(self, app, registration):
+        """
+        Prueba que el total se lee de events.check_in_row_count sin contar filas
+        """
+        broadcaster = checkin_stream.checkin_broadcaster
+        queue = broadcaster.subscribe()
+
+        statements = self._statements(lambda: checkin_stream.publish_check_in('check_in', *registration))
+
+        assert queue.get_nowait()['check_ins'] == 1
+        assert len(statements) == 1
+        assert 'count(' not in statements[0].lower()
+
+class FakeRedis:
+    """
+    Cliente Redis mínimo en memoria para los conjuntos ordenados y publish
+    """
+
+    def __init__(self):
+        self.sorted_sets = {}
+        self.published = []
+
+    def zadd(self, key, mapping):
+        self.sorted_sets.setdefault(key, {}).update(mapping)
+
+    def zrem(self, key, member):
+        self.sorted_sets.get(key, {}).pop(member, None)
+
+    def zremrangebyscore(self, key, low, high):
+        high = float(high)
+        members = self.sorted_sets.get(key, {})
+        for member, score in list(members.items()):
+            if score <= high:
+                del members[member]
+
+    def zcount(self, key, low, high):
+        return sum(1 for score in self.sorted_sets.get(key, {}).values() if score >= float(low))
+
+    def publish(self, channel, data):
+        self.published.append((channel, data))
+
+class TestRedisCheckInBroadcaster:
+    """
+    Pruebas para la presencia de clientes entre workers
+    """
+
+    def test_has_listeners_follows_connected_workers(self, monkeypatch):
+        """
+        Prueba que solo hay oyentes mientras algún worker tiene clientes
+        """
+        now = [1000.0]
+        monkeypatch.setattr(checkin_stream.time, 'time', lambda: now[0])
+        client = FakeRedis()
+        other_worker = RedisCheckInBroadcaster(client, 'checkin-stream', presence_ttl=60)
+        publisher = RedisCheckInBroadcaster(client, 'checkin-stream', presence_ttl=60)
+
+        assert not publisher.has_listeners
+
+        queue = other_worker.subscribe()
+        now[0] += 1
+        assert publisher.has_listeners
+
+        other_worker.unsubscribe(queue)
+        now[0] += 1
+        assert not publisher.has_listeners
+
+    def test_presence_expires_for_dead_workers(self, monkeypatch):
+        """
+        Prueba que un worker que termina sin retirarse deja de contar al caducar
+        """
+        now = [1000.0]
+        monkeypatch.setattr(checkin_stream.time, 'time', lambda: now[0])
+        client = FakeRedis()
+        RedisCheckInBroadcaster(client, 'checkin-stream', presence_ttl=60).subscribe()
+        publisher = RedisCheckInBroadcaster(client, 'checkin-stream', presence_ttl=60)
+
+        now[0] += 30
+        assert publisher.has_listeners
+        now[0] += 31
+        assert not publisher.has_listeners
@@ -0,0 +1,101 @@
+"""
+Pruebas para los ETag y las respuestas 304 de las vistas cacheadas
+"""
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import event as sa_event
+from cache import cache, get_generation, local_cache
+from models.database import db
+from models.event import Event
+from models.kiosk import Kiosk
+
+class TestConditionalGet:
+    """
+    Pruebas para If-None-Match en las vistas con etiquetas
+    """
+
+    @pytest.fixture
+    def event(self, session):
+        cache.clear()
+        local_cache.invalidate(None)
+        event = Event(
+            title='Evento condicional',
+            location='Sala 1',
+            start_date=datetime.utcnow() + timedelta(days=1),
+            end_date=datetime.utcnow() + timedelta(days=1, hours=2)
+        )
+        session.add(event)
+        session.commit()
+        return event
+
+    def test_not_modified_without_queries(self, app, event):
+        """
+        Prueba que un If-None-Match vigente responde 304 sin consultar la base de datos
+        """
+        client = app.test_client()
+        first = client.get('/api/v1/events/')
+        etag = first.headers['ETag']
+        assert first.status_code == 200
+        assert first.headers['Cache-Control'] == 'no-cache'
+
+        statements = []
+        record = lambda *args: statements.append(args[2])
+        sa_event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            cached = client.get('/api/v1/events/', headers={'If-None-Match': etag})
+            local_cache.invalidate(None)
+            shared = client.get('/api/v1/events/', headers={'If-None-Match': etag})
+        finally:
+            sa_event.remove(db.engine, 'before_cursor_execute', record)
+
+        assert cached.status_code == 304
+        assert shared.status_code == 304
+        assert cached.get_data() == b''
+        assert statements == []
+
+    def test_event_change_produces_new_etag(self, app, session, event):
+        """
+        Prueba que modificar el evento cambia el ETag de su detalle
+        """
+        client = app.test_client()
+        etag = client.get(f'/api/v1/events/{event.id}').headers['ETag']
+
+        event.location = 'Sala 2'
+        session.commit()
+
+        response = client.get(f'/api/v1/events/{event.id}', headers={'If-None-Match': etag})
+        assert response.status_code == 200
+        assert response.get_json()['location'] == 'Sala 2'
+        assert response.headers['ETag'] != etag
+
+    def test_registration_keeps_event_data_tag(self, app, event):
+        """
+        Prueba que un registro invalida las estadísticas pero no los datos de los eventos
+        """
+        events_generation = get_generation('events')
+        stats_generation = get_generation('event-stats')
+
+        response = app.test_client().post('/api/v1/visitors/register', json={
+            'name': 'Visitante', 'email': 'condicional@test.com', 'event_id': event.id
+        })
+
+        assert response.status_code == 201
+        assert get_generation('events') == events_generation
+        assert get_generation('event-stats') != stats_generation
+
+    def test_heartbeat_keeps_kiosk_tag(self, session, event):
+        """
+        Prueba que el heartbeat del kiosco no invalida sus eventos, pero desactivarlo sí
+        """
+        kiosk = Kiosk(name='Kiosco 1', location='Entrada')
+        session.add(kiosk)
+        session.commit()
+        generation = get_generation(f'kiosk:{kiosk.id}')
+
+        kiosk.last_heartbeat = datetime.utcnow()
+        session.commit()
+        assert get_generation(f'kiosk:{kiosk.id}') == generation
+
+        kiosk.is_active = False
+        session.commit()
+        assert get_generation(f'kiosk:{kiosk.id}') != generation
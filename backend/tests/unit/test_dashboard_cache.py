@@ -0,0 +1,42 @@
+"""
+Pruebas para la caché del dashboard con recálculo único
+"""
+import pytest
+from cache import bump_generation, cache
+from services.single_flight import get_cache_metrics, get_or_recompute
+
+class TestDashboardCache:
+    """
+    Pruebas para get_or_recompute y la invalidación por generación
+    """
+
+    def test_fresh_value_is_served_from_cache(self, app):
+        """
+        Prueba que el valor solo se calcula una vez mientras está fresco
+        """
+        cache.clear()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return {'total': len(calls)}
+
+        assert get_or_recompute('prueba', compute) == {'total': 1}
+        assert get_or_recompute('prueba', compute) == {'total': 1}
+        assert len(calls) == 1
+        assert get_cache_metrics('prueba')['hits'] == 1
+
+    def test_stale_value_served_while_other_worker_recomputes(self, app):
+        """
+        Prueba que, con el candado tomado por otro worker, se sirve el valor anterior
+        """
+        cache.clear()
+        get_or_recompute('prueba', lambda: 'anterior')
+        bump_generation('prueba')
+        cache.add('single_flight/prueba/lock', 'otro-worker', timeout=30)
+
+        assert get_or_recompute('prueba', lambda: 'nuevo') == 'anterior'
+        assert get_cache_metrics('prueba')['stale_hits'] == 1
+
+        cache.delete('single_flight/prueba/lock')
+        assert get_or_recompute('prueba', lambda: 'nuevo') == 'nuevo'
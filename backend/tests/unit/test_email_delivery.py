@@ -0,0 +1,107 @@
+"""
+Pruebas para el envío de correos de las tareas de Celery sobre un servidor SMTP local
+"""
+import socket
+import pytest
+from services import email_service
+from tasks import send_email, send_email_batch, summarize_deliveries
+
+controller_module = pytest.importorskip('aiosmtpd.controller')
+
+class RecordingHandler:
+    """Guarda los destinatarios de cada mensaje recibido"""
+
+    def __init__(self):
+        self.recipients = []
+
+    async def handle_DATA(self, server, session, envelope):
+        self.recipients.extend(envelope.rcpt_tos)
+        return '250 Message accepted for delivery'
+
+class TestEmailDelivery:
+    """
+    Pruebas para send_email y send_email_batch con el pool del worker
+    """
+
+    @pytest.fixture
+    def smtp_server(self, app, monkeypatch):
+        with socket.socket() as probe:
+            probe.bind(('127.0.0.1', 0))
+            port = probe.getsockname()[1]
+        handler = RecordingHandler()
+        controller = controller_module.Controller(handler, hostname='127.0.0.1', port=port)
+        controller.start()
+
+        monkeypatch.setitem(app.config, 'MAIL_SERVER', '127.0.0.1')
+        monkeypatch.setitem(app.config, 'MAIL_PORT', port)
+        monkeypatch.setitem(app.config, 'MAIL_USERNAME', None)
+        monkeypatch.setitem(app.config, 'MAIL_PASSWORD', None)
+        monkeypatch.setitem(app.config, 'MAIL_USE_TLS', False)
+        monkeypatch.setitem(app.config, 'MAIL_USE_SSL', False)
+        monkeypatch.setitem(app.config, 'MAIL_DEFAULT_SENDER', 'noreply@test.com')
+        monkeypatch.setitem(app.config, 'MAIL_POOL_SIZE', 2)
+        monkeypatch.setitem(app.config, 'MAIL_CONNECTION_BATCH_SIZE', 10)
+        monkeypatch.setattr(email_service, '_smtp_pool', None)
+        yield handler
+        if email_service._smtp_pool is not None:
+            email_service._smtp_pool.close()
+        controller.stop()
+
+    def _messages(self, count):
+        return [
+            {'to': f'persona{i}@test.com', 'subject': 'Recordatorio', 'body': '<p>Hola</p>', 'is_html': True}
+            for i in range(count)
+        ]
+
+    def test_send_email_batch_reports_throughput(self, smtp_server):
+        """
+        Prueba que un lote se envía con pocas conexiones y reporta mensajes por segundo
+        """
+        report = send_email_batch(self._messages(30))
+
+        assert report['sent'] == 30
+        assert report['failed'] == 0
+        assert report['messages_per_second'] > 0
+        assert len(smtp_server.recipients) == 30
+        assert email_service._smtp_pool.connections_opened <= 2
+
+    def test_send_email_reuses_worker_pool(self, smtp_server):
+        """
+        Prueba que envíos sucesivos reutilizan la misma conexión del pool
+        """
+        for i in range(5):
+            assert send_email(f'persona{i}@test.com', 'Aviso', 'Hola') is True
+
+        assert len(smtp_server.recipients) == 5
+        assert email_service._smtp_pool.connections_opened == 1
+
+    def test_tasks_and_invitations_share_the_process_pool(self, smtp_server):
+        """
+        Prueba que las tareas usan el pool de email_service y que el fin del worker lo cierra
+        """
+        from celery.signals import worker_process_shutdown
+
+        assert send_email('persona@test.com', 'Aviso', 'Hola') is True
+        pool = email_service._smtp_pool
+
+        assert email_service.get_smtp_pool() is pool
+        worker_process_shutdown.send(sender=None)
+        assert email_service._smtp_pool is None
+        assert pool.connections_opened == 1
+
+    def test_summarize_deliveries(self):
+        """
+        Prueba que los reportes de varios lotes se combinan
+        """
+        reports = [
+            {'sent': 10, 'failed': 0, 'errors': [], 'seconds': 0.5, 'messages_per_second': 20.0},
+            {'sent': 8, 'failed': 2, 'errors': [{'to': 'x@test.com', 'error': '550'}], 'seconds': 1.0,
+             'messages_per_second': 8.0},
+            None
+        ]
+
+        summary = summarize_deliveries(reports)
+
+        assert (summary['sent'], summary['failed'], summary['seconds']) == (18, 2, 1.0)
+        assert summary['messages_per_second'] == 18.0
+        assert len(summary['errors']) == 1
@@ -0,0 +1,182 @@
+"""
+Pruebas para los contadores desnormalizados de eventos
+"""
+import pytest
+from datetime import datetime, timedelta
+from models.event import Event
+from models.visitor import Visitor, VisitorCheckIn
+from services.event_service import EventService
+
+class TestEventCounters:
+    """
+    Pruebas para registration_count, checked_in_count, check_in_row_count y su reconciliación
+    """
+
+    def _create_event(self, session, capacity=0):
+        event = Event(
+            title='Evento con contadores',
+            location='Sala 1',
+            start_date=datetime.utcnow() + timedelta(days=1),
+            end_date=datetime.utcnow() + timedelta(days=1, hours=2),
+            capacity=capacity
+        )
+        session.add(event)
+        session.commit()
+        return event
+
+    def _create_visitors(self, session, count):
+        visitors = [
+            Visitor(name=f'Visitante {i}', email=f'contador{i}@test.com')
+            for i in range(count)
+        ]
+        session.add_all(visitors)
+        session.flush()
+        return visitors
+
+    def test_register_respects_capacity(self, session):
+        """
+        Prueba que register_visitor no supera la capacidad del evento
+        """
+        event = self._create_event(session, capacity=2)
+        visitors = self._create_visitors(session, 3)
+
+        registrations = [event.register_visitor(visitor) for visitor in visitors]
+        session.commit()
+        session.refresh(event)
+
+        assert registrations[2] is None
+        assert event.registration_count == 2
+        assert event.available_capacity == 0
+
+    def test_status_changes_update_counters(self, session):
+        """
+        Prueba que check-in, cancelación y no-show ajustan los contadores
+        """
+        event = self._create_event(session)
+        visitors = self._create_visitors(session, 3)
+        first, second, third = [event.register_visitor(visitor) for visitor in visitors]
+        session.commit()
+
+        first.check_in()
+        second.check_in()
+        second.cancel_registration('Cancelado por el visitante')
+        third.mark_as_no_show()
+        session.commit()
+        session.refresh(event)
+
+        assert event.registration_count == 2
+        assert event.checked_in_count == 1
+
+    def test_reconcile_counters(self, session):
+        """
+        Prueba que la reconciliación recalcula los contadores desde event_visitors
+        """
+        event = self._create_event(session)
+        visitors = self._create_visitors(session, 2)
+        registration = event.register_visitor(visitors[0])
+        event.register_visitor(visitors[1])
+        registration.check_in()
+        session.commit()
+
+        event.registration_count = 10
+        event.checked_in_count = 10
+        session.commit()
+
+        EventService.reconcile_counters([event.id])
+        session.refresh(event)
+
+        assert event.registration_count == 2
+        assert event.checked_in_count == 1
+
+    def test_check_ins_update_check_in_row_count(self, session):
+        """
+        Prueba que crear, mover y eliminar VisitorCheckIn ajusta check_in_row_count
+        """
+        event = self._create_event(session)
+        other = self._create_event(session)
+        visitors = self._create_visitors(session, 3)
+        check_ins = [VisitorCheckIn(visitor_id=visitor.id, event_id=event.id, kiosk_id=1) for visitor in visitors]
+        session.add_all(check_ins)
+        session.commit()
+        session.refresh(event)
+        assert event.check_in_row_count == 3
+
+        check_ins[0].event_id = other.id
+        session.delete(check_ins[1])
+        session.commit()
+        session.refresh(event)
+        session.refresh(other)
+
+        assert (event.check_in_row_count, other.check_in_row_count) == (1, 1)
+
+    def test_reconcile_check_in_row_count(self, session):
+        """
+        Prueba que la reconciliación recalcula check_in_row_count desde visitor_check_ins
+        """
+        event = self._create_event(session)
+        visitors = self._create_visitors(session, 2)
+        session.add_all([VisitorCheckIn(visitor_id=visitor.id, event_id=event.id, kiosk_id=1) for visitor in visitors])
+        session.commit()
+
+        # Un DELETE masivo no pasa por los hooks del ORM
+        VisitorCheckIn.query.filter_by(visitor_id=visitors[0].id).delete()
+        session.commit()
+        session.refresh(event)
+        assert event.check_in_row_count == 2
+
+        EventService.reconcile_counters([event.id])
+        session.refresh(event)
+
+        assert event.check_in_row_count == 1
+
+    def test_failed_flush_leaves_no_pending_deltas(self, session):
+        """
+        Prueba que un flush fallido no aplica sus cambios en el siguiente commit
+        """
+        from sqlalchemy.exc import IntegrityError
+
+        event = self._create_event(session)
+        visitors = self._create_visitors(session, 2)
+        check_ins = [VisitorCheckIn(visitor_id=visitor.id, event_id=event.id, kiosk_id=1) for visitor in visitors]
+        session.add_all(check_ins)
+        session.commit()
+
+        session.delete(check_ins[0])
+        session.add(Visitor(name=None, email='sin-nombre@test.com'))
+        with pytest.raises(IntegrityError):
+            session.flush()
+        session.rollback()
+
+        # Commit sin relación con los check-ins
+        event.title = 'Evento renombrado'
+        session.commit()
+        session.refresh(event)
+
+        assert VisitorCheckIn.query.filter_by(event_id=event.id).count() == 2
+        assert event.check_in_row_count == 2
+
+    def test_registration_route_enforces_capacity(self, app, session):
+        """
+        Prueba que el registro por la API reserva cupo y el check-in ajusta checked_in_count
+        """
+        event = self._create_event(session, capacity=1)
+        client = app.test_client()
+
+        first = client.post('/api/v1/visitors/register', json={
+            'name': 'Ana', 'email': 'ana@test.com', 'event_id': event.id
+        })
+        second = client.post('/api/v1/visitors/register', json={
+            'name': 'Luis', 'email': 'luis@test.com', 'event_id': event.id
+        })
+        missing = client.post('/api/v1/visitors/register', json={
+            'name': 'Eva', 'email': 'eva@test.com', 'event_id': event.id + 100
+        })
+        checkin = client.post(f"/api/v1/events/{event.id}/visitors/{first.json['visitor_id']}/checkin")
+        session.refresh(event)
+
+        assert first.status_code == 201
+        assert second.status_code == 409
+        assert missing.status_code == 404
+        assert checkin.status_code == 200
+        assert Visitor.query.filter_by(email='luis@test.com').first() is None
+        assert (event.registration_count, event.checked_in_count, event.check_in_row_count) == (1, 1, 1)
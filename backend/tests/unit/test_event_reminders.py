@@ -0,0 +1,86 @@
+"""
+Pruebas para la programación por lotes de recordatorios de eventos
+"""
+import pytest
+from datetime import datetime, timedelta
+import tasks
+from models.event import Event
+from models.visitor import Visitor
+
+class RecordingTask:
+    """Sustituye a send_email_batch y guarda los lotes encolados"""
+
+    def __init__(self):
+        self.batches = []
+
+    def delay(self, messages):
+        self.batches.append(messages)
+
+class TestEventReminders:
+    """
+    Pruebas para schedule_event_reminders y reminder_watermark
+    """
+
+    @pytest.fixture
+    def batches(self, app, monkeypatch):
+        recorder = RecordingTask()
+        monkeypatch.setattr(tasks, 'send_email_batch', recorder)
+        monkeypatch.setitem(app.config, 'REMINDER_BATCH_SIZE', 2)
+        return recorder.batches
+
+    def _create_event(self, session):
+        event = Event(
+            title='Evento con recordatorio',
+            location='Sala 1',
+            start_date=datetime.utcnow() + timedelta(hours=3),
+            end_date=datetime.utcnow() + timedelta(hours=5)
+        )
+        session.add(event)
+        session.commit()
+        return event
+
+    def _register(self, session, event, emails):
+        registrations = []
+        for email in emails:
+            visitor = Visitor(name=f'Visitante {email}', email=email)
+            session.add(visitor)
+            registrations.append(event.register_visitor(visitor))
+        session.commit()
+        return registrations
+
+    def test_reminders_enqueued_in_batches(self, session, batches):
+        """
+        Prueba que los recordatorios se encolan por páginas y avanzan la marca del evento
+        """
+        event = self._create_event(session)
+        registrations = self._register(session, event, [f'recordatorio{i}@test.com' for i in range(5)])
+        registrations[1].status = 'CANCELED'
+        session.commit()
+
+        assert tasks.schedule_event_reminders() is True
+
+        recipients = [message['to'] for batch in batches for message in batch]
+        assert recipients == ['recordatorio0@test.com', 'recordatorio2@test.com',
+                              'recordatorio3@test.com', 'recordatorio4@test.com']
+        assert [len(batch) for batch in batches] == [2, 2]
+        assert registrations[3].registration_code in batches[1][0]['body']
+
+        session.expire_all()
+        assert session.get(Event, event.id).reminder_watermark == registrations[-1].id
+
+    def test_rerun_only_sends_new_registrations(self, session, batches):
+        """
+        Prueba que volver a ejecutar la tarea no repite recordatorios
+        """
+        event = self._create_event(session)
+        self._register(session, event, ['primero@test.com', 'segundo@test.com'])
+
+        tasks.schedule_event_reminders()
+        tasks.schedule_event_reminders()
+        assert len(batches) == 1
+
+        self._register(session, event, ['tercero@test.com'])
+        tasks.schedule_event_reminders()
+
+        assert [message['to'] for message in batches[-1]] == ['tercero@test.com']
+        assert len(batches) == 2
@@ -0,0 +1,87 @@
+"""
+Pruebas para la generación de reportes de eventos
+"""
+import csv
+import gzip
+import json
+import pytest
+from datetime import datetime, timedelta
+from models.event import Event
+from models.visitor import Visitor
+from services.export_service import ExportService
+from tasks import generate_event_report
+
+class TestEventReports:
+    """
+    Pruebas para generate_event_report y ExportService.event_report_statistics
+    """
+
+    @pytest.fixture
+    def report_event(self, session, app, monkeypatch, tmp_path):
+        monkeypatch.setitem(app.config, 'UPLOADS_FOLDER', str(tmp_path))
+        event = Event(
+            title='Evento con reporte',
+            location='Sala 1',
+            start_date=datetime.utcnow() + timedelta(days=1),
+            end_date=datetime.utcnow() + timedelta(days=1, hours=2)
+        )
+        session.add(event)
+        session.commit()
+
+        statuses = ['REGISTERED', 'CHECKED_IN', 'CHECKED_IN', 'NO_SHOW', 'CANCELED']
+        for i, status in enumerate(statuses):
+            visitor = Visitor(name=f'Visitante {i}', email=f'reporte{i}@test.com')
+            session.add(visitor)
+            registration = event.register_visitor(visitor)
+            session.flush()
+            registration.status = status
+        session.commit()
+        return event
+
+    def test_statistics_grouped_by_status(self, report_event):
+        """
+        Prueba que las estadísticas se calculan a partir de los estados
+        """
+        statistics = ExportService.event_report_statistics(report_event.id)
+
+        assert statistics == {
+            'total_registrations': 4,
+            'checked_in': 2,
+            'no_show': 1,
+            'canceled': 1,
+            'attendance_rate': 50.0
+        }
+
+    def test_json_report(self, report_event):
+        """
+        Prueba que el reporte JSON incluye evento, estadísticas y registros
+        """
+        path = generate_event_report(report_event.id, format='json')
+
+        with open(path) as f:
+            report = json.load(f)
+
+        assert path.endswith('.json')
+        assert report['event']['title'] == 'Evento con reporte'
+        assert report['statistics']['checked_in'] == 2
+        assert [r['visitor_email'] for r in report['registrations']] == [f'reporte{i}@test.com' for i in range(5)]
+
+    def test_compressed_csv_report(self, report_event):
+        """
+        Prueba que el reporte CSV se puede generar comprimido con gzip
+        """
+        path = generate_event_report(report_event.id, format='csv', compress=True)
+
+        with gzip.open(path, 'rt', encoding='utf-8', newline='') as f:
+            rows = list(csv.reader(f))
+
+        assert path.endswith('.csv.gz')
+        assert rows[0][0] == 'ID'
+        assert len(rows) == 6
+        assert rows[5][6] == 'CANCELED'
+
+    def test_unsupported_format(self, report_event):
+        """
+        Prueba que un formato desconocido no genera archivo
+        """
+        assert generate_event_report(report_event.id, format='pdf') is None
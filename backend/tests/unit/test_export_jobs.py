@@ -0,0 +1,97 @@
+"""
+Pruebas para las exportaciones Excel en segundo plano
+"""
+import os
+import zipfile
+import pytest
+from datetime import datetime
+from models.event import Event
+from models.export_job import ExportJob
+from models.kiosk import Kiosk
+from models.visitor import Visitor, VisitorCheckIn
+from tasks import export_event_excel, purge_export_jobs
+
+class TestExportJobs:
+    """
+    Pruebas para la tarea export_event_excel
+    """
+
+    def _create_event(self, session, visitors=3):
+        event = Event(title='Feria del libro', description='Feria', location='Sala A',
+                      start_date=datetime.utcnow(), end_date=datetime.utcnow())
+        kiosk = Kiosk(name='Kiosco 1', location='Entrada')
+        people = [Visitor(name=f'Lector {i}', email=f'lector{i}@test.com') for i in range(visitors)]
+        session.add_all([event, kiosk] + people)
+        session.commit()
+
+        session.add_all([
+            VisitorCheckIn(visitor_id=visitor.id, event_id=event.id, kiosk_id=kiosk.id)
+            for visitor in people
+        ])
+        session.commit()
+        return event
+
+    def _create_job(self, session, event_id, filters=None):
+        job = ExportJob(event_id=event_id)
+        job.filters = filters
+        session.add(job)
+        session.commit()
+        return job.id
+
+    def _sheet_rows(self, path):
+        with zipfile.ZipFile(path) as workbook:
+            return workbook.read('xl/worksheets/sheet2.xml').decode('utf-8').count('<row ')
+
+    def test_job_writes_workbook(self, session, app):
+        """
+        Prueba que la tarea genera el archivo y marca el trabajo como completado
+        """
+        event = self._create_event(session)
+        job_id = self._create_job(session, event.id, {'sort_by': 'name', 'sort_order': 'asc'})
+        app.config['EXPORTS_FOLDER'] = os.path.join(app.instance_path, 'test-exports')
+
+        path = export_event_excel(job_id)
+        session.expire_all()
+        job = session.get(ExportJob, job_id)
+
+        assert job.status == ExportJob.STATUS_COMPLETED
+        assert job.file_path == path and os.path.exists(path)
+        assert job.row_count == 3
+        assert job.filename.endswith('.xlsx')
+        # Cabecera + 3 registros; no quedan temporales en la carpeta
+        assert self._sheet_rows(path) == 4
+        assert not [name for name in os.listdir(os.path.dirname(path)) if name.endswith('.part')]
+
+        purge_export_jobs(hours=-1)
+        session.expire_all()
+        assert not os.path.exists(path)
+        assert session.get(ExportJob, job_id) is None
+
+    def test_job_applies_filters(self, session, app):
+        """
+        Prueba que los filtros guardados en el trabajo se aplican al archivo
+        """
+        event = self._create_event(session)
+        job_id = self._create_job(session, event.id, {'search': 'Lector 1'})
+        app.config['EXPORTS_FOLDER'] = os.path.join(app.instance_path, 'test-exports')
+
+        path = export_event_excel(job_id)
+
+        assert self._sheet_rows(path) == 2
+        os.remove(path)
+
+    def test_job_failure_is_recorded(self, session, app):
+        """
+        Prueba que un error deja el trabajo como fallido con el mensaje
+        """
+        event = self._create_event(session)
+        job_id = self._create_job(session, event.id, {'start_date': '20-05-2025'})
+        app.config['EXPORTS_FOLDER'] = os.path.join(app.instance_path, 'test-exports')
+
+        assert export_event_excel(job_id) is None
+        session.expire_all()
+        job = session.get(ExportJob, job_id)
+
+        assert job.status == ExportJob.STATUS_FAILED
+        assert job.error
+        assert job.file_path is None
@@ -0,0 +1,99 @@
+"""
+Pruebas para las exportaciones CSV por streaming
+"""
+import csv
+import io
+import pytest
+from datetime import datetime, timedelta
+from models.event import Event
+from models.kiosk import Kiosk
+from models.visitor import Visitor, VisitorCheckIn
+from services.export_service import ExportService, EVENT_EXPORT_HEADERS, VISITOR_EXPORT_HEADERS
+
+class TestExportStreaming:
+    """
+    Pruebas para ExportService
+    """
+
+    def _create_registrations(self, session):
+        events = [
+            Event(title='Charla', location='Sala A', start_date=datetime.utcnow(), end_date=datetime.utcnow()),
+            Event(title='Concierto', location='Sala B', start_date=datetime.utcnow(), end_date=datetime.utcnow()),
+        ]
+        kiosk = Kiosk(name='Kiosco 1', location='Entrada')
+        base = datetime(2025, 5, 20, 10, 0)
+        visitors = [
+            Visitor(name=f'Visitante {i}', email=f'export{i}@test.com', created_at=base + timedelta(minutes=i))
+            for i in range(3)
+        ]
+        session.add_all(events + visitors + [kiosk])
+        session.commit()
+
+        pending = VisitorCheckIn(visitor_id=visitors[1].id, event_id=events[0].id, kiosk_id=kiosk.id)
+        session.add_all([
+            VisitorCheckIn(visitor_id=visitors[0].id, event_id=events[0].id, kiosk_id=kiosk.id,
+                           check_in_time=base + timedelta(hours=1)),
+            VisitorCheckIn(visitor_id=visitors[0].id, event_id=events[1].id, kiosk_id=kiosk.id,
+                           check_in_time=base + timedelta(hours=2)),
+            pending,
+        ])
+        session.commit()
+
+        # Registro sin check-in todavía
+        pending.check_in_time = None
+        session.commit()
+        return events, visitors
+
+    def test_iter_csv_yields_chunks(self):
+        """
+        Prueba que las filas se entregan en bloques del tamaño indicado
+        """
+        chunks = list(ExportService.iter_csv(([i, f'fila {i}'] for i in range(5)), chunk_rows=2))
+
+        assert len(chunks) == 3
+        assert list(csv.reader(io.StringIO(''.join(chunks)))) == [[str(i), f'fila {i}'] for i in range(5)]
+
+    def test_event_registrations_single_query(self, session):
+        """
+        Prueba los registros de un evento, sus estadísticas y el filtro de check-in
+        """
+        events, visitors = self._create_registrations(session)
+
+        query = ExportService.event_registrations_query(events[0].id)
+        assert ExportService.registration_stats(query) == (2, 1)
+
+        rows = list(ExportService.registration_rows(query.order_by(Visitor.id)))
+        assert [row[0] for row in rows] == [visitors[0].id, visitors[1].id]
+        assert [row[6] for row in rows] == ['Sí', 'No']
+        assert len(rows[0]) == len(EVENT_EXPORT_HEADERS)
+
+        pending = query.filter(VisitorCheckIn.check_in_time.is_(None))
+        assert [row[2] for row in ExportService.registration_rows(pending)] == ['Visitante 1']
+
+    def test_visitor_rows_group_check_ins(self, session):
+        """
+        Prueba que cada visitante aparece una vez con todos sus check-ins
+        """
+        _, visitors = self._create_registrations(session)
+
+        rows = list(ExportService.visitor_check_in_rows(Visitor.query))
+
+        assert [row[1] for row in rows] == ['Visitante 2', 'Visitante 1', 'Visitante 0']
+        assert rows[0][5] == 'Ninguno'
+        assert rows[1][5] == 'Charla ()'
+        assert rows[2][5] == 'Charla (2025-05-20 11:00); Concierto (2025-05-20 12:00)'
+        assert len(rows[0]) == len(VISITOR_EXPORT_HEADERS)
+
+    def test_csv_response_streams(self, app):
+        """
+        Prueba que la respuesta CSV se transmite sin construir el archivo completo
+        """
+        with app.test_request_context():
+            response = ExportService.csv_response(
+                [['ID', 'Nombre']], ([i, f'fila {i}'] for i in range(3)), 'prueba.csv'
+            )
+            assert response.is_streamed
+            assert response.headers['Content-Disposition'] == 'attachment; filename=prueba.csv'
+            body = response.get_data(as_text=True)
+
+        assert body.splitlines() == ['ID,Nombre', '0,fila 0', '1,fila 1', '2,fila 2']
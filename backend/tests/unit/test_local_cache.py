@@ -0,0 +1,101 @@
+"""
+Pruebas para el primer nivel de caché en memoria (LocalResponseCache)
+"""
+import time
+import pytest
+from datetime import datetime, timedelta
+from cache import LocalResponseCache, cache, invalidate_tags, local_cache
+from models.event import Event
+
+class TestLocalCache:
+    """
+    Pruebas para la LRU por worker y su uso en el decorador cached
+    """
+
+    def test_lru_evicts_least_recently_used(self):
+        """
+        Prueba que al superar max_size se desaloja la entrada menos usada
+        """
+        lru = LocalResponseCache(max_size=2, ttl=60)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        lru.get('a')
+        lru.set('c', 3)
+
+        assert lru.get('a') == 1
+        assert lru.get('b') is None
+        assert lru.get('c') == 3
+
+    def test_entries_expire_after_ttl(self):
+        """
+        Prueba que las entradas dejan de servirse al vencer el TTL
+        """
+        lru = LocalResponseCache(max_size=10, ttl=0.05)
+        lru.set('a', 1)
+        time.sleep(0.06)
+
+        assert lru.get('a') is None
+        assert len(lru) == 0
+
+    def test_invalidate_by_tag(self):
+        """
+        Prueba que invalidar una etiqueta solo descarta sus entradas
+        y que un valor calculado antes de la invalidación no se guarda
+        """
+        lru = LocalResponseCache(max_size=10, ttl=60)
+        lru.set('evento', 1, tags=['event:1'])
+        lru.set('otro', 2, tags=['event:2'])
+        version = lru.version
+
+        lru.invalidate(['event:1'])
+        lru.set('calculado', 3, tags=['event:2'], version=version)
+
+        assert lru.get('evento') is None
+        assert lru.get('otro') == 2
+        assert lru.get('calculado') is None
+
+    def test_view_hit_skips_shared_backend(self, app, session, monkeypatch):
+        """
+        Prueba que un acierto en memoria no consulta el backend compartido
+        """
+        cache.clear()
+        local_cache.invalidate(None)
+        event = Event(
+            title='Evento en memoria',
+            location='Sala 1',
+            start_date=datetime.utcnow() + timedelta(days=1),
+            end_date=datetime.utcnow() + timedelta(days=1, hours=2)
+        )
+        session.add(event)
+        session.commit()
+
+        client = app.test_client()
+        first = client.get(f'/api/v1/events/{event.id}').get_data()
+
+        backend_reads = []
+        original_get = cache.get
+        monkeypatch.setattr(cache, 'get', lambda key: backend_reads.append(key) or original_get(key))
+        assert client.get(f'/api/v1/events/{event.id}').get_data() == first
+        assert backend_reads == []
+
+        invalidate_tags(f'event:{event.id}')
+        client.get(f'/api/v1/events/{event.id}')
+        assert backend_reads
+
+    def test_requests_start_invalidation_listener(self, app, monkeypatch):
+        """
+        Prueba que cualquier petición inicia la escucha de invalidaciones, no solo las vistas cacheadas
+        """
+        import cache as cache_module
+
+        class RecordingBus(cache_module.InvalidationBus):
+            started = 0
+
+            def start(self):
+                RecordingBus.started += 1
+
+        monkeypatch.setattr(cache_module, 'invalidation_bus', RecordingBus())
+
+        app.test_client().get('/api/v1/no-existe')
+
+        assert RecordingBus.started == 1
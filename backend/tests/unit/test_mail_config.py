@@ -0,0 +1,44 @@
+"""
+Pruebas para la lectura de las variables de correo
+"""
+import pytest
+from config.config import LEGACY_MAIL_VARIABLES, mail_env
+
+class TestMailEnv:
+    """
+    Pruebas para mail_env y el respaldo de los nombres SMTP_* y EMAIL_FROM*
+    """
+
+    @pytest.fixture(autouse=True)
+    def clean_env(self, monkeypatch):
+        for name, legacy in LEGACY_MAIL_VARIABLES.items():
+            monkeypatch.delenv(name, raising=False)
+            monkeypatch.delenv(legacy, raising=False)
+
+    def test_legacy_variable_is_used_with_warning(self, monkeypatch):
+        """
+        Prueba que una instalación con solo SMTP_SERVER sigue funcionando y recibe un aviso
+        """
+        monkeypatch.setenv('SMTP_SERVER', 'smtp.anterior.test')
+        monkeypatch.setenv('EMAIL_FROM_NAME', 'Remitente anterior')
+
+        with pytest.warns(UserWarning, match='SMTP_SERVER'):
+            assert mail_env('MAIL_SERVER', 'localhost') == 'smtp.anterior.test'
+        with pytest.warns(UserWarning, match='EMAIL_FROM_NAME'):
+            assert mail_env('MAIL_SENDER_NAME') == 'Remitente anterior'
+
+    def test_new_variable_takes_precedence(self, monkeypatch):
+        """
+        Prueba que MAIL_* gana sobre el nombre anterior
+        """
+        monkeypatch.setenv('MAIL_USERNAME', 'nuevo')
+        monkeypatch.setenv('SMTP_USERNAME', 'anterior')
+
+        assert mail_env('MAIL_USERNAME') == 'nuevo'
+
+    def test_default_without_either_name(self):
+        """
+        Prueba que sin ninguna de las dos variables se usa el valor por defecto
+        """
+        assert mail_env('MAIL_PORT', 25) == 25
+        assert mail_env('MAIL_USE_SSL', 'False') == 'False'
@@ -0,0 +1,120 @@
+"""
+Pruebas para los permisos precompilados por rol
+"""
+import pytest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event as sa_event
+from services.user_state_cache import user_state_cache
+from models.database import db
+from models.permission import Permission, Role, permission_registry
+from models.user import User
+from services.auth_service import AuthService
+from utils.decorators import permissions_required
+
+@permissions_required(['events.export', 'events.view'])
+def export_view():
+    return 'ok'
+
+class TestPermissionRegistry:
+    """
+    Pruebas para PermissionRegistry y User.has_permission
+    """
+
+    @pytest.fixture
+    def user(self, session):
+        permission_registry.invalidate()
+        user_state_cache.invalidate(None)
+        role = Role(name='operador', permissions=[Permission(name='events.view'), Permission(name='events.export')])
+        session.add(Permission(name='users.manage'))
+        user = User(
+            username='operador1', email='operador1@test.com', first_name='Luis', last_name='Gómez',
+            role='staff', is_active=True, role_obj=role
+        )
+        user.set_password('Password123!')
+        session.add(user)
+        session.commit()
+        return user
+
+    def test_checks_do_not_load_relationships(self, user):
+        """
+        Prueba que, con el registro cargado, las verificaciones no consultan la base de datos
+        """
+        assert user.has_permission('events.view')
+
+        statements = []
+        record = lambda *args: statements.append(args[2])
+        sa_event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            results = (
+                user.has_permission('events.export'),
+                user.has_permission('users.manage'),
+                user.has_permissions(['events.view', 'events.export']),
+                user.has_permissions(['events.view', 'users.manage'])
+            )
+        finally:
+            sa_event.remove(db.engine, 'before_cursor_execute', record)
+
+        assert results == (True, False, True, False)
+        assert statements == []
+
+    def test_role_change_recompiles_registry(self, session, user):
+        """
+        Prueba que añadir un permiso a un rol se refleja tras el commit
+        """
+        assert not user.has_permission('users.manage')
+
+        user.role_obj.permissions.append(Permission.query.filter_by(name='users.manage').one())
+        session.commit()
+
+        assert user.has_permission('users.manage')
+
+    def test_mask_round_trip(self, user):
+        """
+        Prueba la conversión entre nombres de permisos y máscaras de bits
+        """
+        mask = permission_registry.mask_for(user.permission_names)
+
+        assert permission_registry.names_for(mask) == {'events.view', 'events.export'}
+        assert permission_registry.mask_for(['no.existe']) is None
+
+    def test_bitmask_claims_authorize(self, app, monkeypatch, user):
+        """
+        Prueba que los decoradores aceptan los permisos como máscara en el token
+        """
+        monkeypatch.setitem(app.config, 'JWT_PERMISSIONS_BITMASK', True)
+        with app.app_context():
+            claims = AuthService.token_claims(user)
+            allowed = create_access_token(identity=str(user.id), additional_claims=claims)
+            denied = create_access_token(identity=str(user.id), additional_claims={
+                **claims, 'perm_mask': format(permission_registry.mask_for(['events.view']), 'x')
+            })
+
+        assert 'permissions' not in claims
+        with app.test_request_context(headers={'Authorization': f'Bearer {allowed}'}):
+            assert export_view() == 'ok'
+        with app.test_request_context(headers={'Authorization': f'Bearer {denied}'}):
+            assert export_view()[1] == 403
+
+    def test_mask_from_another_bit_assignment_is_outdated(self, app, session, monkeypatch, user):
+        """
+        Prueba que crear o borrar permisos invalida las máscaras firmadas antes
+        """
+        monkeypatch.setitem(app.config, 'JWT_PERMISSIONS_BITMASK', True)
+        with app.app_context():
+            token = create_access_token(identity=str(user.id), additional_claims=AuthService.token_claims(user))
+
+        # Borrar un permiso y crear otro puede reutilizar su id en SQLite
+        session.delete(Permission.query.filter_by(name='users.manage').one())
+        session.commit()
+        session.add(Permission(name='audit.view'))
+        session.commit()
+
+        with app.test_request_context(headers={'Authorization': f'Bearer {token}'}):
+            rv = export_view()
+        assert rv[1] == 401
+
+        with app.app_context():
+            token = create_access_token(identity=str(user.id), additional_claims=AuthService.token_claims(user))
+        with app.test_request_context(headers={'Authorization': f'Bearer {token}'}):
+            assert export_view() == 'ok'
+        assert permission_registry.mask_for(['audit.view', 'events.export', 'events.view']) == 0b111
@@ -0,0 +1,76 @@
+"""
+Pruebas para la asignación de códigos de registro
+"""
+import pytest
+from datetime import datetime, timedelta
+from models.event import Event
+from models.visitor import Visitor
+from utils.registration_codes import (
+    CODE_ALPHABET, RegistrationCodeAllocator, code_space, encode, permute
+)
+
+class TestRegistrationCodes:
+    """
+    Pruebas para la permutación y el asignador de códigos
+    """
+
+    def test_permute_is_bijective(self):
+        """
+        Prueba que la permutación no repite valores dentro del espacio
+        """
+        space = code_space(2)
+        values = {permute(index, b'clave', 2) for index in range(space)}
+        assert values == set(range(space))
+
+    def test_encode_has_fixed_length(self):
+        """
+        Prueba que los códigos tienen longitud fija y usan el alfabeto permitido
+        """
+        assert encode(0) == 'AAAAAA'
+        code = encode(code_space() - 1)
+        assert len(code) == 6
+        assert all(char in CODE_ALPHABET for char in code)
+
+    def test_allocator_skips_existing_codes(self, app, session):
+        """
+        Prueba que el asignador no repite códigos ni reutiliza códigos heredados
+        """
+        key = app.config['SECRET_KEY'].encode()
+        legacy = Visitor(name='Heredado', email='heredado@test.com',
+                         registration_code=encode(permute(0, key)))
+        session.add(legacy)
+        session.commit()
+
+        codes = RegistrationCodeAllocator(block_size=8).allocate(20)
+
+        assert len(set(codes)) == 20
+        assert legacy.registration_code not in codes
+
+    def test_allocates_inside_a_transaction_that_already_wrote(self, session):
+        """
+        Prueba que se asigna un código después de escribir en la misma transacción
+        (en SQLite una conexión aparte esperaría al bloqueo de escritura)
+        """
+        session.add(Event(title='Con escritura previa', location='Sala 1',
+                          start_date=datetime.utcnow(), end_date=datetime.utcnow() + timedelta(hours=1)))
+        session.flush()
+
+        visitor = Visitor(name='Después de escribir', email='despues@test.com')
+        session.add(visitor)
+        session.commit()
+
+        assert len(visitor.registration_code) == 6
+
+    def test_rolled_back_block_is_not_reused(self, session):
+        """
+        Prueba que los códigos de un bloque revertido no se entregan junto con los del bloque que lo reemplaza
+        """
+        allocator = RegistrationCodeAllocator(block_size=8)
+        allocator.allocate(1)
+        session.rollback()
+
+        codes = allocator.allocate(16)
+        session.commit()
+
+        assert len(set(codes)) == 16
+
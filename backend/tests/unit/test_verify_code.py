@@ -0,0 +1,115 @@
+"""
+Pruebas para la resolución de códigos de verificación del kiosco
+"""
+import pytest
+from datetime import datetime, timedelta
+from models.event import Event
+from models.kiosk import Kiosk
+from models.visitor import Visitor, VisitorCheckIn
+from services.visitor_service import VisitorService
+from services.registration_code_index import init_registration_code_index, registration_code_index
+
+class TestVerifyCode:
+    """
+    Pruebas para VisitorService.classify_lookup y resolve_verification_code
+    """
+
+    def _create_registration(self, session):
+        event = Event(
+            title='Evento del kiosco',
+            location='Sala 1',
+            start_date=datetime.utcnow(),
+            end_date=datetime.utcnow() + timedelta(hours=2)
+        )
+        kiosk = Kiosk(name='Kiosco 1', location='Entrada')
+        visitor = Visitor(name='Ana', email='Ana@Example.com', phone='809-555-1234')
+        session.add_all([event, kiosk, visitor])
+        session.commit()
+        session.add(VisitorCheckIn(visitor_id=visitor.id, event_id=event.id, kiosk_id=kiosk.id))
+        session.commit()
+        return visitor, event
+
+    def test_classify_lookup(self):
+        """
+        Prueba que la entrada se clasifica en los criterios candidatos
+        """
+        assert VisitorService.classify_lookup(' abc123 ') == {'code': 'ABC123'}
+        assert VisitorService.classify_lookup('Ana@Example.com') == {'email': 'ana@example.com'}
+        assert VisitorService.classify_lookup('809-555-1234') == {'phone': '809-555-1234'}
+        assert VisitorService.classify_lookup('42') == {'code': '42', 'id': 42}
+        assert VisitorService.classify_lookup('   ') == {}
+
+    def test_resolve_by_each_criteria(self, session):
+        """
+        Prueba que el visitante se resuelve por código, ID, email y teléfono
+        """
+        visitor, event = self._create_registration(session)
+
+        for value in [visitor.registration_code.lower(), str(visitor.id), 'ana@example.COM', '809-555-1234']:
+            found, registrations = VisitorService.resolve_verification_code(value)
+            assert found.id == visitor.id
+            assert [registered_event.id for _, registered_event in registrations] == [event.id]
+
+    def test_resolve_unknown_code(self, session):
+        """
+        Prueba que un código inexistente no devuelve visitante
+        """
+        self._create_registration(session)
+
+        assert VisitorService.resolve_verification_code('ZZZZZZ') == (None, [])
+
+    def test_code_index_follows_commits(self, app, session):
+        """
+        Prueba que el índice de códigos se precarga y sigue las altas confirmadas
+        """
+        init_registration_code_index(app)
+        visitor, _ = self._create_registration(session)
+        registration_code_index.clear()
+
+        assert registration_code_index.warm() == 1
+        assert registration_code_index.get(visitor.registration_code) == visitor.id
+
+        discarded = Visitor(name='Revertido', email='revertido@test.com')
+        session.add(discarded)
+        session.flush()
+        discarded_code = discarded.registration_code
+        session.rollback()
+        assert registration_code_index.get(discarded_code) is None
+
+        new_visitor = Visitor(name='Nuevo', email='nuevo@test.com')
+        session.add(new_visitor)
+        session.commit()
+        assert registration_code_index.get(new_visitor.registration_code) == new_visitor.id
+
+    def test_stale_index_entry_falls_back_to_database(self, session):
+        """
+        Prueba que una entrada obsoleta del índice se descarta y se consulta la base de datos
+        """
+        visitor, _ = self._create_registration(session)
+        other = Visitor(name='Otro', email='otro@test.com')
+        session.add(other)
+        session.commit()
+        registration_code_index.add(visitor.registration_code, other.id)
+
+        found, _ = VisitorService.resolve_verification_code(visitor.registration_code)
+
+        assert found.id == visitor.id
+        assert registration_code_index.get(visitor.registration_code) == visitor.id
+
+    def test_index_hit_reads_current_check_in_state(self, app, session):
+        """
+        Prueba que un código del índice devuelve el estado de check-in vigente
+        """
+        init_registration_code_index(app)
+        visitor, event = self._create_registration(session)
+        code = visitor.registration_code
+        registration_code_index.add(code, visitor.id)
+
+        _, registrations = VisitorService.resolve_verification_code(code)
+        assert registrations[0][0].check_in_time is not None
+
+        registrations[0][0].check_in_time = None
+        session.commit()
+
+        _, registrations = VisitorService.resolve_verification_code(code)
+        assert registrations[0][0].check_in_time is None
@@ -0,0 +1,140 @@
+"""
+Pruebas para la importación masiva de visitantes
+"""
+import io
+import pytest
+from flask_jwt_extended import create_access_token
+from services.user_state_cache import user_state_cache
+from models.user import User
+from models.visitor import Visitor
+from services.auth_service import AuthService
+from services.import_service import VisitorImportService
+from services.search_service import SearchService
+from utils.registration_codes import permute, permute_many
+
+CSV_ROWS = (
+    'Nombre;Correo;Teléfono;Empresa;Columna extra\n'
+    'Ana Pérez;Ana@Example.com;809-555-0101;Universidad Central;x\n'
+    'Luis Gómez;no-es-un-email;;;\n'
+    'José Núñez;jose@example.com;(809) 555 0102;;\n'
+    'Ana Repetida;ana@example.com;;;\n'
+    'Carla Ruiz;carla@example.com;12;;\n'
+    'Existente;EXISTENTE@example.com;;;\n'
+)
+
+class TestVisitorImport:
+    """
+    Pruebas para VisitorImportService y /api/v1/visitors/import
+    """
+
+    @pytest.fixture
+    def existing(self, session):
+        visitor = Visitor(name='Ya Registrado', email='existente@example.com')
+        session.add(visitor)
+        session.commit()
+        return visitor
+
+    def _import(self, content, file_format='csv', batch_size=None):
+        rows = VisitorImportService.read_rows(io.BytesIO(content), file_format)
+        return VisitorImportService.import_visitors(rows, batch_size=batch_size)
+
+    def test_imports_valid_rows_and_reports_errors(self, session, existing):
+        """
+        Prueba que las filas válidas se importan y las demás se reportan con su número de fila
+        """
+        report = self._import(CSV_ROWS.encode('utf-8'), batch_size=2)
+
+        assert (report['total'], report['imported'], report['skipped'], report['failed']) == (6, 2, 1, 3)
+        assert sorted((error['row'], error['field']) for error in report['errors']) == [
+            (3, 'email'), (5, 'email'), (6, 'phone'), (7, 'email')
+        ]
+
+        ana = Visitor.query.filter_by(email='ana@example.com').one()
+        assert (ana.name, ana.phone, ana.company) == ('Ana Pérez', '8095550101', 'Universidad Central')
+        assert Visitor.query.filter_by(email='jose@example.com').one().phone == '8095550102'
+        assert Visitor.query.count() == 3
+
+    def test_imported_visitors_get_unique_codes_and_are_searchable(self, session, existing):
+        """
+        Prueba que los visitantes importados reciben códigos únicos y entran en el índice de búsqueda
+        """
+        lines = ['name,email'] + [f'Visitante {chr(65 + i % 26)},visitante{i}@example.com' for i in range(300)]
+        report = self._import('\n'.join(lines).encode('utf-8'), batch_size=128)
+
+        codes = [code for (code,) in session.query(Visitor.registration_code)]
+        assert report['imported'] == 300
+        assert len(codes) == len(set(codes)) == 301
+        assert all(len(code) == 6 for code in codes)
+
+        condition, rank = SearchService.visitor_search('visitante299@')
+        assert [visitor.email for visitor in Visitor.query.filter(condition)] == ['visitante299@example.com']
+
+        # El trigger sigue activo para los registros posteriores
+        session.add(Visitor(name='Posterior', email='posterior@example.com'))
+        session.commit()
+        condition, rank = SearchService.visitor_search('posterior')
+        assert Visitor.query.filter(condition).count() == 1
+
+    def test_missing_required_columns(self, session):
+        """
+        Prueba que un archivo sin columna de email se rechaza
+        """
+        with pytest.raises(ValueError):
+            self._import(b'nombre,telefono\nAna,8095550101\n')
+
+    def test_permute_many_matches_permute(self):
+        """
+        Prueba que las tablas de rondas producen la misma permutación
+        """
+        key = b'clave-de-prueba'
+        indexes = list(range(200)) + [2 ** 31 + 7, 36 ** 6 - 1]
+        assert permute_many(indexes, key) == [permute(index, key) for index in indexes]
+
+    def test_xlsx_import(self, session):
+        """
+        Prueba la importación desde un archivo XLSX
+        """
+        openpyxl = pytest.importorskip('openpyxl')
+        workbook = openpyxl.Workbook()
+        sheet = workbook.active
+        sheet.append(['Nombre', 'Email', 'Teléfono'])
+        sheet.append(['Marta Díaz', 'marta@example.com', 8095550103])
+        sheet.append(['Sin Email', None, None])
+        content = io.BytesIO()
+        workbook.save(content)
+
+        report = self._import(content.getvalue(), 'xlsx')
+
+        assert (report['imported'], report['failed']) == (1, 1)
+        assert Visitor.query.filter_by(email='marta@example.com').one().phone == '8095550103'
+
+    def test_endpoint_requires_staff_and_imports_file(self, app, session):
+        """
+        Prueba el endpoint con un archivo CSV y con un formato no soportado
+        """
+        user_state_cache.invalidate(None)
+        staff = User(username='importstaff', email='importstaff@test.com', first_name='Iris', last_name='Mejía', role='staff')
+        staff.set_password('Password123!')
+        session.add(staff)
+        session.commit()
+        with app.app_context():
+            token = create_access_token(identity=str(staff.id), additional_claims=AuthService.token_claims(staff))
+        client = app.test_client()
+        headers = {'Authorization': f'Bearer {token}'}
+
+        response = client.post('/api/v1/visitors/import', headers=headers, data={
+            'file': (io.BytesIO(CSV_ROWS.encode('utf-8')), 'visitantes.csv')
+        }, content_type='multipart/form-data')
+        unsupported = client.post('/api/v1/visitors/import', headers=headers, data={
+            'file': (io.BytesIO(b'x'), 'visitantes.pdf')
+        }, content_type='multipart/form-data')
+        anonymous = client.post('/api/v1/visitors/import')
+        negative_batch = client.post('/api/v1/visitors/import?batch_size=-5', headers=headers, data={
+            'file': (io.BytesIO(b'name,email\nMarta,marta@example.com\n'), 'visitantes.csv')
+        }, content_type='multipart/form-data')
+
+        assert response.status_code == 200
+        assert (response.json['imported'], response.json['failed']) == (3, 3)
+        assert unsupported.status_code == 400
+        assert anonymous.status_code == 401
+        assert (negative_batch.status_code, negative_batch.json['imported']) == (200, 1)
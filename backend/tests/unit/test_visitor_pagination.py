@@ -0,0 +1,123 @@
+"""
+Pruebas para la paginación del listado de visitantes
+"""
+import pytest
+from datetime import datetime, timedelta
+from models.event import Event
+from models.visitor import Visitor, VisitorCheckIn
+
+class TestVisitorPagination:
+    """
+    Pruebas para get_visitors en modo offset y keyset
+
+    La vista se invoca directamente: en app.py la ruta /api/v1/visitors del
+    blueprint visitors_api se registra antes y atiende esa URL.
+    """
+
+    def _get(self, app, **params):
+        with app.test_request_context('/api/v1/visitors', query_string=params):
+            response = app.make_response(app.view_functions['get_visitors']())
+        return response
+
+    @pytest.fixture
+    def visitors(self, app, session):
+        start = datetime(2024, 1, 1)
+        events = [
+            Event(title=f'Evento {n}', location='Sala', start_date=start, end_date=start + timedelta(hours=2))
+            for n in range(2)
+        ]
+        session.add_all(events)
+        visitors = [
+            Visitor(name=f'Visitante {n}', email=f'v{n}@test.com', created_at=start + timedelta(minutes=n))
+            for n in range(5)
+        ]
+        # Dos visitantes con la misma fecha: el id desempata
+        visitors.append(Visitor(name='Visitante 5', email='v5@test.com', created_at=start + timedelta(minutes=4)))
+        session.add_all(visitors)
+        session.commit()
+        newest = visitors[-1]
+        session.add_all([
+            VisitorCheckIn(visitor_id=newest.id, event_id=events[0].id, kiosk_id=1),
+            VisitorCheckIn(visitor_id=newest.id, event_id=events[1].id, kiosk_id=1),
+            VisitorCheckIn(visitor_id=visitors[1].id, event_id=events[0].id, kiosk_id=1),
+        ])
+        session.commit()
+        # Orden esperado: created_at e id descendentes
+        ordered = sorted(visitors, key=lambda v: (v.created_at, v.id), reverse=True)
+        return [v.id for v in ordered], [e.id for e in events]
+
+    def _ids(self, items):
+        """IDs de visitante en orden, sin repetir las filas de cada check-in"""
+        ids = []
+        for item in items:
+            if not ids or ids[-1] != item['id']:
+                ids.append(item['id'])
+        return ids
+
+    def test_offset_pages_visitors(self, app, visitors):
+        """
+        Prueba que el modo offset pagina visitantes y cuenta el total
+        """
+        ordered, _ = visitors
+
+        first = self._get(app, limit=2, page=1).json
+        second = self._get(app, limit=2, page=2).json
+
+        assert first['pagination']['total'] == 6
+        assert first['pagination']['pages'] == 3
+        assert self._ids(first['items']) == ordered[:2]
+        assert self._ids(second['items']) == ordered[2:4]
+        # El visitante con dos check-ins ocupa dos elementos en la misma página
+        assert len(first['items']) == 3
+        assert {item['event_title'] for item in first['items'][:2]} == {'Evento 0', 'Evento 1'}
+        assert first['items'][0]['check_ins_count'] == 2
+
+    def test_keyset_walks_every_visitor_once(self, app, visitors):
+        """
+        Prueba que siguiendo next_cursor se recorren todos los visitantes en orden
+        """
+        ordered, _ = visitors
+
+        seen = []
+        response = self._get(app, limit=2).json
+        seen += self._ids(response['items'])
+        while response['pagination']['next_cursor']:
+            cursor = response['pagination']['next_cursor']
+            response = self._get(app, limit=2, **cursor).json
+            assert response['pagination']['total'] is None
+            assert response['pagination']['page'] is None
+            seen += self._ids(response['items'])
+
+        assert seen == ordered
+
+    def test_keyset_with_event_filter(self, app, visitors):
+        """
+        Prueba que el filtro por evento limita visitantes y check-ins de la página
+        """
+        ordered, event_ids = visitors
+
+        first = self._get(app, limit=1, event_id=event_ids[0]).json
+        cursor = first['pagination']['next_cursor']
+        second = self._get(app, limit=1, event_id=event_ids[0], **cursor).json
+
+        assert [item['event_title'] for item in first['items']] == ['Evento 0']
+        assert self._ids(first['items']) == [ordered[0]]
+        assert len(second['items']) == 1
+        assert second['items'][0]['event_title'] == 'Evento 0'
+
+    def test_limit_is_capped(self, app, visitors):
+        """
+        Prueba que limit se acota a 100 visitantes por página
+        """
+        response = self._get(app, limit=500).json
+
+        assert response['pagination']['limit'] == 100
+        assert response['pagination']['next_cursor'] is None
+
+    def test_invalid_cursor(self, app, visitors):
+        """
+        Prueba que un cursor con fecha inválida devuelve 400
+        """
+        response = self._get(app, after_id=1, after_created_at='ayer')
+
+        assert response.status_code == 400
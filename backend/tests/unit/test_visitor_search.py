@@ -0,0 +1,57 @@
+"""
+Pruebas para el servicio de búsqueda de visitantes
+"""
+import pytest
+from models.visitor import Visitor
+from services.search_service import SearchService
+
+class TestVisitorSearch:
+    """
+    Pruebas para SearchService.visitor_search
+    """
+
+    def _search(self, term):
+        condition, rank = SearchService.visitor_search(term)
+        return [visitor.name for visitor in Visitor.query.filter(condition).order_by(rank.desc(), Visitor.id)]
+
+    def test_search_ranks_exact_matches_first(self, session):
+        """
+        Prueba que las coincidencias exactas de código y email aparecen primero
+        """
+        session.add_all([
+            Visitor(name='Laura Gómez', email='laura@test.com'),
+            Visitor(name='Código exacto', email='otro@test.com', registration_code='LAURA1'),
+            Visitor(name='Email exacto', email='Laura1'),
+        ])
+        session.commit()
+
+        assert self._search('laura1')[:2] == ['Código exacto', 'Email exacto']
+        assert len(self._search('LAURA')) == 3
+
+    def test_search_follows_updates_and_deletes(self, session):
+        """
+        Prueba que el índice de búsqueda se mantiene sincronizado con la tabla
+        """
+        visitor = Visitor(name='Nombre original', email='sync@test.com', phone='809-555-0101')
+        session.add(visitor)
+        session.commit()
+
+        visitor.name = 'Nombre cambiado'
+        session.commit()
+        assert self._search('cambiado') == ['Nombre cambiado']
+        assert self._search('original') == []
+        assert self._search('555-0101') == ['Nombre cambiado']
+
+        session.delete(visitor)
+        session.commit()
+        assert self._search('cambiado') == []
+
+    def test_search_escapes_wildcards(self, session):
+        """
+        Prueba que los comodines de LIKE se buscan de forma literal
+        """
+        session.add(Visitor(name='Sin comodines', email='plain@test.com'))
+        session.commit()
+
+        assert self._search('%') == []
+        assert self._search('_') == []
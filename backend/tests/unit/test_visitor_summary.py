@@ -0,0 +1,86 @@
+"""
+Pruebas para el resumen de visitantes
+"""
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from models.database import db
+from models.event import Event
+from models.kiosk import Kiosk
+from models.visitor import Visitor, VisitorCheckIn
+from services.visitor_service import VisitorService
+
+class TestVisitorSummary:
+    """
+    Pruebas para VisitorService.get_visitor_summaries
+    """
+
+    def _create_data(self, session):
+        base = datetime(2025, 5, 20, 10, 0)
+        events = [
+            Event(title='Charla', event_type='Charlas', location='Sala A', start_date=base, end_date=base),
+            Event(title='Concierto', event_type='Música', location='Sala B', start_date=base, end_date=base),
+            Event(title='Sin tipo', location='Sala C', start_date=base, end_date=base),
+        ]
+        kiosk = Kiosk(name='Kiosco 1', location='Entrada')
+        visitors = [
+            Visitor(name=f'Visitante {i}', email=f'summary{i}@test.com', interests='arte,música' if i == 0 else None)
+            for i in range(4)
+        ]
+        session.add_all(events + visitors + [kiosk])
+        session.commit()
+
+        check_ins = [
+            (visitors[0], events[0], base),
+            (visitors[0], events[0], base + timedelta(days=1)),
+            (visitors[0], events[1], base + timedelta(days=2)),
+            (visitors[1], events[2], base),
+            (visitors[2], events[1], base),
+        ]
+        session.add_all([
+            VisitorCheckIn(visitor_id=visitor.id, event_id=ev.id, kiosk_id=kiosk.id, check_in_time=when)
+            for visitor, ev, when in check_ins
+        ])
+        session.commit()
+        return visitors
+
+    def test_summary_values(self, session):
+        """
+        Prueba el último evento, las visitas por tipo y los intereses
+        """
+        visitors = self._create_data(session)
+
+        summaries = {summary['id']: summary for summary in VisitorService.get_visitor_summaries()}
+
+        first = summaries[visitors[0].id]
+        assert first['last_event']['title'] == 'Concierto'
+        assert first['last_event']['type'] == 'Música'
+        assert first['total_visits'] == {'Charlas': 2, 'Música': 1}
+        assert first['interests'] == ['arte', 'música']
+
+        assert summaries[visitors[1].id]['total_visits'] == {'Otros': 1}
+        assert summaries[visitors[3].id]['last_event'] is None
+        assert summaries[visitors[3].id]['total_visits'] == {}
+
+    def test_summary_pages_use_fixed_queries(self, session):
+        """
+        Prueba que cada página usa tres consultas y que el cursor recorre todos los visitantes
+        """
+        visitors = self._create_data(session)
+        statements = []
+
+        def count_statement(*args):
+            statements.append(args)
+
+        event.listen(db.engine, 'before_cursor_execute', count_statement)
+        try:
+            first_page = VisitorService.get_visitor_summaries(limit=2)
+            queries = len(statements)
+            second_page = VisitorService.get_visitor_summaries(after_id=first_page[-1]['id'], limit=2)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', count_statement)
+
+        assert queries == 3
+        assert [summary['id'] for summary in first_page + second_page] == [visitor.id for visitor in visitors]
+        assert [summary['id'] for summary in VisitorService.iter_visitor_summaries(batch_size=3)] == \
+            [visitor.id for visitor in visitors]
@@ -3,7 +3,7 @@ Decoradores para protección de rutas y autorización
 """
 from functools import wraps
 from flask import jsonify, current_app, request
-from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity, get_jwt
 import json
 import time
 from flask_limiter import Limiter
@@ -14,6 +14,46 @@ limiter = Limiter(
     default_limits=["200 per day", "50 per hour"]
 )
 
+def _authorize():
+    """
+    Verifica el token y que el usuario siga activo con el rol firmado en él
+    
+    El rol y los permisos se leen de las claims del token; el estado del
+    usuario sale de user_state_cache, así que no hay consultas mientras la
+    entrada esté vigente.
+    
+    Returns:
+        tuple: (user_id, claims, None) si está autorizado, o
+            (None, None, respuesta de error)
+    """
+    from services.user_state_cache import user_state_cache
+    from models.permission import permission_registry
+    
+    verify_jwt_in_request()
+    user_id = int(get_jwt_identity())
+    claims = get_jwt()
+    
+    state = user_state_cache.get(user_id)
+    if state is None:
+        return None, None, (jsonify(error="User not found"), 404)
+    
+    if not state['is_active']:
+        return None, None, (jsonify(error="User account is disabled"), 403)
+    
+    # Un token emitido antes de un cambio de rol no conserva el rol anterior
+    if claims.get('role') != state['role']:
+        return None, None, (jsonify(error="Token is outdated, please log in again"), 401)
+    
+    # Los tokens emitidos antes de firmar los permisos no traen ninguna de las dos claims
+    if 'permissions' not in claims and 'perm_mask' not in claims:
+        return None, None, (jsonify(error="Token is outdated, please log in again"), 401)
+    
+    # Una máscara firmada con otra asignación de bits no se puede interpretar
+    if 'perm_mask' in claims and claims.get('perm_ver') != permission_registry.mask_version():
+        return None, None, (jsonify(error="Token is outdated, please log in again"), 401)
+    
+    return user_id, claims, None
+
 def admin_required():
     """
     Decorador para proteger rutas solo para administradores
@@ -21,24 +61,13 @@ def admin_required():
     def wrapper(fn):
         @wraps(fn)
         def decorator(*args, **kwargs):
-            verify_jwt_in_request()
-            user_id = get_jwt_identity()
+            user_id, claims, error = _authorize()
+            if error:
+                return error
             
-            print(f"DEBUG - admin_required - User ID: {user_id}")
-            
-            # Importar aquí para evitar importaciones circulares
-            from models.user import User
-            user = User.query.get(user_id)
-            
-            print(f"DEBUG - admin_required - User encontrado: {user is not None}")
-            if user:
-                print(f"DEBUG - admin_required - Rol del usuario: {user.role}")
-            
-            if not user or user.role != 'admin':
-                print(f"DEBUG - admin_required - Acceso denegado")
+            if claims['role'] != 'admin':
                 return jsonify(error="Admin privilege required"), 403
             
-            print(f"DEBUG - admin_required - Acceso permitido")
             return fn(*args, **kwargs)
         return decorator
     return wrapper
@@ -50,29 +79,36 @@ def role_required(allowed_roles):
     def wrapper(fn):
         @wraps(fn)
         def decorator(*args, **kwargs):
-            verify_jwt_in_request()
-            user_id = get_jwt_identity()
-            
-            print(f"DEBUG - role_required - User ID: {user_id}")
-            print(f"DEBUG - role_required - Roles permitidos: {allowed_roles}")
+            user_id, claims, error = _authorize()
+            if error:
+                return error
             
-            # Importar aquí para evitar importaciones circulares
-            from models.user import User
-            user = User.query.get(user_id)
-            
-            print(f"DEBUG - role_required - User encontrado: {user is not None}")
-            if user:
-                print(f"DEBUG - role_required - Rol del usuario: {user.role}")
-            
-            if not user or user.role not in allowed_roles:
-                print(f"DEBUG - role_required - Acceso denegado")
+            if claims['role'] not in allowed_roles:
                 return jsonify(error="Insufficient privileges"), 403
             
-            print(f"DEBUG - role_required - Acceso permitido")
             return fn(*args, **kwargs)
         return decorator
     return wrapper
 
+def _has_permissions(claims, permission_names):
+    """
+    Verifica permisos con las claims del token (los administradores tienen todos)
+    
+    Los tokens con 'perm_mask' (ya validada su versión en _authorize) se
+    comparan contra la máscara de los permisos requeridos (ver
+    AuthService.token_claims).
+    """
+    from models.permission import permission_registry
+    
+    if claims['role'] == 'admin':
+        return True
+    
+    if 'perm_mask' in claims:
+        required = permission_registry.mask_for(permission_names)
+        return required is not None and int(claims['perm_mask'], 16) & required == required
+    
+    return set(permission_names) <= set(claims.get('permissions', ()))
+
 def permission_required(permission_name):
     """
     Decorador para proteger rutas basado en permisos específicos
@@ -83,21 +119,15 @@ def permission_required(permission_name):
     def wrapper(fn):
         @wraps(fn)
         def decorator(*args, **kwargs):
-            verify_jwt_in_request()
-            user_id = get_jwt_identity()
-            
-            # Importar aquí para evitar importaciones circulares
-            from models.user import User
-            user = User.query.get(user_id)
-            
-            if not user:
-                return jsonify(error="User not found"), 404
+            user_id, claims, error = _authorize()
+            if error:
+                return error
                 
-            if not user.has_permission(permission_name):
+            if not _has_permissions(claims, [permission_name]):
                 return jsonify(error=f"Required permission: {permission_name}"), 403
             
             # Registrar acceso para auditoría si es necesario
-            _log_access(user, permission_name, request)
+            _log_access(user_id, permission_name, request)
             
             return fn(*args, **kwargs)
         return decorator
@@ -113,39 +143,32 @@ def permissions_required(permission_names):
     def wrapper(fn):
         @wraps(fn)
         def decorator(*args, **kwargs):
-            verify_jwt_in_request()
-            user_id = get_jwt_identity()
-            
-            # Importar aquí para evitar importaciones circulares
-            from models.user import User
-            user = User.query.get(user_id)
-            
-            if not user:
-                return jsonify(error="User not found"), 404
+            user_id, claims, error = _authorize()
+            if error:
+                return error
                 
-            if not user.has_permissions(permission_names):
+            if not _has_permissions(claims, permission_names):
                 return jsonify(error=f"Required permissions: {', '.join(permission_names)}"), 403
             
             # Registrar acceso para auditoría
             for permission in permission_names:
-                _log_access(user, permission, request)
+                _log_access(user_id, permission, request)
             
             return fn(*args, **kwargs)
         return decorator
     return wrapper
 
-def _log_access(user, permission, request):
+def _log_access(user_id, permission, request):
     """
     Registra acceso para auditoría
     
     Args:
-        user (User): Usuario que accede
+        user_id (int): ID del usuario que accede
         permission (str): Permiso utilizado
         request (Request): Objeto de solicitud Flask
     """
     try:
-        from models.permission import AuditLog
-        from models.database import db
+        from services.audit_service import audit_log_writer
         
         # Extraer información relevante de la solicitud
         entity_type = None
@@ -164,23 +187,20 @@ def _log_access(user, permission, request):
                     except (ValueError, IndexError):
                         pass
         
-        # Crear registro de auditoría
-        audit_log = AuditLog(
-            user_id=user.id,
+        # Encolar el registro; se inserta en bloque fuera de la petición
+        audit_log_writer.write(
+            user_id=user_id,
             action=f"ACCESS:{permission}",
             entity_type=entity_type or request.endpoint,
             entity_id=entity_id,
             ip_address=request.remote_addr,
-            user_agent=request.user_agent.string,
+            user_agent=request.user_agent.string[:255],
             details=json.dumps({
                 'method': request.method,
                 'path': request.path,
                 'args': dict(request.args),
             })
         )
-        
-        db.session.add(audit_log)
-        db.session.commit()
     except Exception as e:
         # No interrumpir el flujo principal si falla el registro de auditoría
         current_app.logger.error(f"Error al registrar auditoría: {str(e)}")
@@ -206,30 +226,23 @@ def log_action(action, entity_type, entity_id=None, details=None):
                 verify_jwt_in_request()
                 user_id = get_jwt_identity()
                 
-                from models.user import User
-                from models.permission import AuditLog
-                from models.database import db
-                
-                user = User.query.get(user_id)
+                from services.audit_service import audit_log_writer
                 
                 # Extraer el ID de la entidad de los argumentos o del resultado
                 actual_entity_id = entity_id
                 if actual_entity_id is None and isinstance(result, dict) and 'id' in result:
                     actual_entity_id = result['id']
                 
-                # Crear registro de auditoría
-                audit_log = AuditLog(
-                    user_id=user.id if user else None,
+                # Encolar el registro; se inserta en bloque fuera de la petición
+                audit_log_writer.write(
+                    user_id=int(user_id) if user_id else None,
                     action=action,
                     entity_type=entity_type,
                     entity_id=actual_entity_id,
                     ip_address=request.remote_addr,
-                    user_agent=request.user_agent.string if request else None,
+                    user_agent=request.user_agent.string[:255] if request else None,
                     details=json.dumps(details) if details else None
                 )
-                
-                db.session.add(audit_log)
-                db.session.commit()
             except Exception as e:
                 # No interrumpir el flujo principal si falla el registro de auditoría
                 current_app.logger.error(f"Error al registrar acción: {str(e)}")
@@ -0,0 +1,322 @@
+"""
+Asignación de códigos de registro sin colisiones
+
+Cada código se obtiene aplicando una permutación pseudoaleatoria (red de
+Feistel con clave secreta) a un número de secuencia único obtenido de la base
+de datos. Como la permutación es biyectiva sobre el espacio de códigos, dos
+números de secuencia distintos nunca producen el mismo código y no hace falta
+consultar la tabla de visitantes por cada candidato.
+
+Los números se reservan por bloques: en PostgreSQL con una secuencia nativa y
+en el resto de motores con la tabla registration_code_sequence, dentro de la
+transacción de la sesión (en SQLite otra conexión esperaría al bloqueo de
+escritura que la sesión ya tenga). Cada bloque se
+filtra con una única consulta contra los códigos heredados (generados al azar
+antes de este mecanismo), por lo que la unicidad también se mantiene frente a
+ellos.
+"""
+import hashlib
+import hmac
+import string
+import threading
+from array import array
+from collections import deque
+from functools import lru_cache
+from flask import current_app
+from sqlalchemy import event, insert, select, text, update
+from sqlalchemy.orm import Session
+
+CODE_ALPHABET = string.ascii_uppercase + string.digits
+CODE_LENGTH = 6
+FEISTEL_ROUNDS = 4
+# Clave de session.info con los códigos reservados en la transacción en curso
+SESSION_CODES_KEY = 'registration_code_blocks'
+# A partir de este tamaño de bloque se permuta con las tablas de rondas precalculadas
+ROUND_TABLE_MIN_BLOCK = 1024
+
+def code_space(length=CODE_LENGTH):
+    """
+    Obtiene el número total de códigos posibles para una longitud
+
+    Args:
+        length (int): Longitud del código
+
+    Returns:
+        int: Tamaño del espacio de códigos
+    """
+    return len(CODE_ALPHABET) ** length
+
+def _feistel(value, key, half_bits):
+    """
+    Aplica una red de Feistel balanceada sobre 2 * half_bits bits
+    """
+    mask = (1 << half_bits) - 1
+    left, right = value >> half_bits, value & mask
+    for round_number in range(FEISTEL_ROUNDS):
+        digest = hmac.new(key, f'{round_number}:{right}'.encode(), hashlib.sha256).digest()
+        left, right = right, left ^ (int.from_bytes(digest[:8], 'big') & mask)
+    return (left << half_bits) | right
+
+def permute(index, key, length=CODE_LENGTH):
+    """
+    Permuta un índice dentro del espacio de códigos
+
+    Usa cycle-walking sobre la red de Feistel para que el resultado quede
+    siempre dentro de [0, code_space(length)).
+
+    Args:
+        index (int): Número de secuencia (0 <= index < code_space(length))
+        key (bytes): Clave secreta de la permutación
+        length (int): Longitud del código
+
+    Returns:
+        int: Índice permutado
+    """
+    space = code_space(length)
+    if not 0 <= index < space:
+        raise ValueError(f"Índice fuera del espacio de códigos: {index}")
+
+    half_bits = ((space - 1).bit_length() + 1) // 2
+    value = index
+    while True:
+        value = _feistel(value, key, half_bits)
+        if value < space:
+            return value
+
+@lru_cache(maxsize=4)
+def _round_tables(key, half_bits):
+    """
+    Precalcula la función de ronda de la red de Feistel para cada mitad posible
+
+    Da los mismos valores que _feistel; con length=6 son 4 tablas de 65536
+    enteros de 16 bits (512 KB), que se calculan una vez por clave y proceso.
+    """
+    mask = (1 << half_bits) - 1
+    typecode = 'H' if half_bits <= 16 else 'L' if half_bits <= 32 else 'Q'
+    keyed = hmac.new(key, digestmod=hashlib.sha256)
+    tables = []
+    for round_number in range(FEISTEL_ROUNDS):
+        table = array(typecode, bytes(array(typecode).itemsize << half_bits))
+        prefix = f'{round_number}:'
+        for right in range(1 << half_bits):
+            digest = keyed.copy()
+            digest.update(f'{prefix}{right}'.encode())
+            table[right] = int.from_bytes(digest.digest()[:8], 'big') & mask
+        tables.append(table)
+    return tables
+
+def permute_many(indexes, key, length=CODE_LENGTH):
+    """
+    Permuta varios índices con el mismo resultado que permute
+
+    Usa tablas precalculadas de la función de ronda, por lo que conviene para
+    bloques grandes (importaciones); el primer uso por clave tarda alrededor de un segundo.
+
+    Args:
+        indexes (list): Números de secuencia
+        key (bytes): Clave secreta de la permutación
+        length (int): Longitud del código
+
+    Returns:
+        list: Índices permutados
+    """
+    space = code_space(length)
+    half_bits = ((space - 1).bit_length() + 1) // 2
+    mask = (1 << half_bits) - 1
+    tables = _round_tables(key, half_bits)
+
+    results = []
+    for index in indexes:
+        if not 0 <= index < space:
+            raise ValueError(f"Índice fuera del espacio de códigos: {index}")
+        value = index
+        while True:
+            left, right = value >> half_bits, value & mask
+            for table in tables:
+                left, right = right, left ^ table[right]
+            value = (left << half_bits) | right
+            if value < space:
+                break
+        results.append(value)
+    return results
+
+def encode(value, length=CODE_LENGTH):
+    """
+    Convierte un entero en un código alfanumérico de longitud fija
+
+    Args:
+        value (int): Valor a codificar
+        length (int): Longitud del código
+
+    Returns:
+        str: Código en mayúsculas y dígitos
+    """
+    base = len(CODE_ALPHABET)
+    chars = []
+    for _ in range(length):
+        value, remainder = divmod(value, base)
+        chars.append(CODE_ALPHABET[remainder])
+    return ''.join(reversed(chars))
+
+class RegistrationCodeAllocator:
+    """
+    Asignador de códigos de registro únicos con reserva por bloques
+
+    Mantiene en memoria (por proceso) los códigos pendientes del último bloque
+    reservado. Con secuencia nativa los números nunca se reutilizan, aunque la
+    transacción que los solicitó se revierta. Sin ella, el bloque reservado en
+    la transacción de la sesión queda en session.info hasta el commit (los
+    códigos sobrantes pasan entonces al resto del proceso) y se descarta si la
+    transacción se revierte, ya que la reserva se revierte con ella.
+    """
+
+    SEQUENCE_NAME = 'registration_code_seq'
+
+    def __init__(self, length=CODE_LENGTH, block_size=None):
+        self.length = length
+        self.block_size = block_size
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def next_code(self):
+        """
+        Obtiene el siguiente código libre
+
+        Returns:
+            str: Código de registro
+        """
+        return self.allocate(1)[0]
+
+    def allocate(self, count):
+        """
+        Obtiene varios códigos libres de una vez (por ejemplo, para importaciones)
+
+        Args:
+            count (int): Cantidad de códigos
+
+        Returns:
+            list: Lista de códigos únicos
+        """
+        from models.database import db
+
+        engine_key = str(db.engine.url)
+        if not db.engine.dialect.supports_sequences:
+            return self._allocate_in_session(engine_key, count)
+
+        with self._lock:
+            pending = self._pending.setdefault(engine_key, deque())
+            while len(pending) < count:
+                block_size = max(count - len(pending), self._block_size())
+                pending.extend(self._reserve_codes(block_size))
+            return [pending.popleft() for _ in range(count)]
+
+    def _allocate_in_session(self, engine_key, count):
+        """
+        Asigna códigos cuya reserva forma parte de la transacción de la sesión
+        """
+        from models.database import db
+
+        blocks = db.session.info.setdefault(SESSION_CODES_KEY, {})
+        local = blocks.setdefault(self, (engine_key, deque()))[1]
+
+        # Primero los códigos ya confirmados por transacciones anteriores
+        with self._lock:
+            pending = self._pending.setdefault(engine_key, deque())
+            while pending and len(local) < count:
+                local.append(pending.popleft())
+
+        while len(local) < count:
+            local.extend(self._reserve_codes(max(count - len(local), self._block_size())))
+        return [local.popleft() for _ in range(count)]
+
+    def _release(self, engine_key, codes):
+        """
+        Devuelve al proceso los códigos sobrantes de una transacción confirmada
+        """
+        with self._lock:
+            self._pending.setdefault(engine_key, deque()).extend(codes)
+
+    def _block_size(self):
+        if self.block_size:
+            return self.block_size
+        return current_app.config.get('REGISTRATION_CODE_BLOCK_SIZE', 64)
+
+    def _key(self):
+        key = current_app.config.get('REGISTRATION_CODE_KEY') or current_app.config.get('SECRET_KEY') or ''
+        return key.encode() if isinstance(key, str) else key
+
+    def _reserve_codes(self, count):
+        """
+        Reserva un bloque de números de secuencia y lo convierte en códigos
+        descartando los que ya existan como códigos heredados
+        """
+        from models.database import db
+        from models.visitor import Visitor
+
+        indexes = self._reserve_indexes(count)
+        if indexes and indexes[-1] >= code_space(self.length):
+            raise RuntimeError("Se agotó el espacio de códigos de registro")
+
+        key = self._key()
+        if len(indexes) >= ROUND_TABLE_MIN_BLOCK:
+            values = permute_many(indexes, key, self.length)
+        else:
+            values = [permute(index, key, self.length) for index in indexes]
+        codes = [encode(value, self.length) for value in values]
+
+        taken = {row[0] for row in db.session.execute(
+            select(Visitor.registration_code).where(Visitor.registration_code.in_(codes))
+        )}
+        return [code for code in codes if code not in taken]
+
+    def _reserve_indexes(self, count):
+        """
+        Reserva `count` números de secuencia que ningún otro proceso recibirá
+        (sin secuencia nativa, siempre que la transacción de la sesión se confirme)
+
+        Returns:
+            list: Números reservados en orden ascendente
+        """
+        from models.database import db
+        from models.visitor import RegistrationCodeSequence
+
+        if db.engine.dialect.supports_sequences:
+            # nextval no es transaccional: los valores no se reutilizan tras un rollback
+            rows = db.session.execute(
+                text(f"SELECT nextval('{self.SEQUENCE_NAME}') FROM generate_series(1, :count)"),
+                {'count': count}
+            )
+            return sorted(row[0] - 1 for row in rows)
+
+        # En la transacción de la sesión: el UPDATE toma el bloqueo de escritura
+        # (o usa el que la sesión ya tiene), así que el INSERT inicial no compite
+        table = RegistrationCodeSequence.__table__
+        connection = db.session.connection()
+        result = connection.execute(
+            update(table).where(table.c.id == 1)
+            .values(next_value=table.c.next_value + count)
+        )
+        if result.rowcount == 0:
+            connection.execute(insert(table).values(id=1, next_value=count))
+            return list(range(count))
+
+        start = connection.execute(
+            select(table.c.next_value).where(table.c.id == 1)
+        ).scalar() - count
+        return list(range(start, start + count))
+
+def _release_session_codes(session):
+    """Pasa al proceso los códigos sobrantes de una transacción confirmada"""
+    for allocator, (engine_key, codes) in session.info.pop(SESSION_CODES_KEY, {}).items():
+        if codes:
+            allocator._release(engine_key, codes)
+
+def _discard_session_codes(session):
+    """Descarta los códigos reservados en una transacción revertida"""
+    session.info.pop(SESSION_CODES_KEY, None)
+
+event.listen(Session, 'after_commit', _release_session_codes)
+event.listen(Session, 'after_rollback', _discard_session_codes)
+
+# Instancia global del asignador
+code_allocator = RegistrationCodeAllocator()
@@ -87,6 +87,43 @@ def validate_name(name):
         return False
     return re.match(REGEX_NAME, name) is not None
 
+# Versiones compiladas para validar lotes de filas (importaciones masivas)
+_match_email = re.compile(REGEX_EMAIL).match
+_match_name = re.compile(REGEX_NAME).match
+_match_phone = re.compile(REGEX_PHONE).match
+_PHONE_SEPARATORS = str.maketrans('', '', ' -().')
+
+def validate_visitor_rows(rows):
+    """
+    Valida y normaliza un lote de filas de visitantes con las reglas de
+    validate_name, validate_email y validate_phone
+    
+    Normaliza en el mismo recorrido: recorta espacios, pasa el email a
+    minúsculas y quita separadores del teléfono (que es opcional).
+    
+    Args:
+        rows (list): Diccionarios con name, email y phone
+        
+    Returns:
+        list: Por cada fila, None si es válida o un dict {'field', 'error'}
+    """
+    results = []
+    for row in rows:
+        name = ' '.join((row.get('name') or '').split())
+        email = (row.get('email') or '').strip().lower()
+        phone = (row.get('phone') or '').strip().translate(_PHONE_SEPARATORS)
+        row['name'], row['email'], row['phone'] = name, email, phone or None
+        
+        if not _match_name(name):
+            results.append({'field': 'name', 'error': 'Nombre inválido'})
+        elif not _match_email(email):
+            results.append({'field': 'email', 'error': 'Email inválido'})
+        elif phone and not _match_phone(phone):
+            results.append({'field': 'phone', 'error': 'Teléfono inválido'})
+        else:
+            results.append(None)
+    return results
+
 def sanitize_html(text):
     """
     Sanitiza texto para prevenir XSS